@@ -0,0 +1,54 @@
+"""Per-bot running PnL ledger
+
+Revision ID: 20261016_000004
+Revises: 20260223_000003
+Create Date: 2026-10-16 09:00:00
+
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261016_000004"
+down_revision: Union[str, Sequence[str], None] = "20260223_000003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "bot_ledgers",
+        sa.Column("bot_id", sa.Integer(), sa.ForeignKey("bots.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("realized_pnl_quote", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("open_locked_cost_quote", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("fees_paid_quote", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("open_trades", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("closed_trades", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.execute(
+        """
+        INSERT INTO bot_ledgers (
+            bot_id, realized_pnl_quote, open_locked_cost_quote, fees_paid_quote, open_trades, closed_trades
+        )
+        SELECT
+            bot_id,
+            COALESCE(SUM(realized_pnl_quote) FILTER (WHERE status = 'closed'), 0),
+            COALESCE(SUM(cost_basis_quote + fees_paid_quote) FILTER (WHERE status = 'open'), 0),
+            COALESCE(SUM(fees_paid_quote), 0),
+            COUNT(*) FILTER (WHERE status = 'open'),
+            COUNT(*) FILTER (WHERE status = 'closed')
+        FROM trades
+        WHERE bot_id IS NOT NULL
+        GROUP BY bot_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("bot_ledgers")
@@ -0,0 +1,33 @@
+"""Indexes for keyset pagination of list endpoints
+
+Revision ID: 20261016_000005
+Revises: 20261016_000004
+Create Date: 2026-10-16 12:00:00
+
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "20261016_000005"
+down_revision: Union[str, Sequence[str], None] = "20261016_000004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_orders_created_at", "orders", ["created_at"], unique=False)
+    op.create_index("ix_orders_bot_created_at", "orders", ["bot_id", "created_at"], unique=False)
+    op.create_index("ix_orders_symbol_created_at", "orders", ["symbol", "created_at"], unique=False)
+    op.create_index("ix_jobs_bot_created_at", "jobs", ["bot_id", "created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_jobs_bot_created_at", table_name="jobs")
+    op.drop_index("ix_orders_symbol_created_at", table_name="orders")
+    op.drop_index("ix_orders_bot_created_at", table_name="orders")
+    op.drop_index("ix_orders_created_at", table_name="orders")
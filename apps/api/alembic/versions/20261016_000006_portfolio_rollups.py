@@ -0,0 +1,42 @@
+"""Portfolio equity rollups per tier
+
+Revision ID: 20261016_000006
+Revises: 20261016_000005
+Create Date: 2026-10-16 15:00:00
+
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261016_000006"
+down_revision: Union[str, Sequence[str], None] = "20261016_000005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "portfolio_rollups",
+        sa.Column("bot_id", sa.Integer(), sa.ForeignKey("bots.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("tier", sa.String(length=8), primary_key=True),
+        sa.Column("bucket", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("equity_open", sa.Float(), nullable=False),
+        sa.Column("equity_high", sa.Float(), nullable=False),
+        sa.Column("equity_low", sa.Float(), nullable=False),
+        sa.Column("equity_close", sa.Float(), nullable=False),
+        sa.Column("cash", sa.Float(), nullable=False),
+        sa.Column("positions_value", sa.Float(), nullable=False),
+        sa.Column("samples", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_portfolio_rollups_tier_bucket", "portfolio_rollups", ["tier", "bucket"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_portfolio_rollups_tier_bucket", table_name="portfolio_rollups")
+    op.drop_table("portfolio_rollups")
@@ -0,0 +1,57 @@
+"""Change sequence columns for delta sync
+
+Revision ID: 20261016_000007
+Revises: 20261016_000006
+Create Date: 2026-10-16 18:00:00
+
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20261016_000007"
+down_revision: Union[str, Sequence[str], None] = "20261016_000006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Table -> whether ``change_seq`` gets its own index.
+_TABLES = {"bots": True, "trades": True, "orders": True, "jobs": True, "portfolio_snapshots": False}
+
+
+def upgrade() -> None:
+    # The writing transaction's id: assigned in start order and, unlike a
+    # sequence value, comparable with the snapshot xmin that bounds which
+    # transactions can still commit (see apps/api/sync.py).
+    op.execute(
+        """
+        CREATE FUNCTION set_change_seq() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_seq := pg_current_xact_id()::text::bigint;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table, indexed in _TABLES.items():
+        # Existing rows keep 0 and are picked up by a first sync.
+        op.add_column(table, sa.Column("change_seq", sa.BigInteger(), nullable=False, server_default="0"))
+        if indexed:
+            op.create_index(f"ix_{table}_change_seq", table, ["change_seq"], unique=False)
+        op.execute(
+            f"CREATE TRIGGER {table}_change_seq BEFORE INSERT OR UPDATE ON {table} "
+            "FOR EACH ROW EXECUTE FUNCTION set_change_seq()"
+        )
+
+
+def downgrade() -> None:
+    for table, indexed in _TABLES.items():
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_change_seq ON {table}")
+        if indexed:
+            op.drop_index(f"ix_{table}_change_seq", table_name=table)
+        op.drop_column(table, "change_seq")
+    op.execute("DROP FUNCTION IF EXISTS set_change_seq()")
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import RowMapping, Select, select, true
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from apps.api.pagination import read_columns
+from apps.api.sse_hub import SseEvent, SseHub
+from packages.core.events import topic_pattern
+from packages.core.job_state import ACTIVE_JOB_STATUSES
+from packages.core.models import Bot, BotLedger, Job, PortfolioSnapshot, Trade
+from packages.core.schemas import BotRead, DashboardBot, DashboardRead, JobRead, PortfolioSnapshotRead, TradeRead
+
+_MAX_BOTS = 200
+_RECENT_TRADES = 20
+_ACTIVE_JOBS = 50
+
+# Events that change what the dashboard shows beyond the TTL's tolerance.
+# Per-tick snapshots and trade marks only age the cached copy by one TTL.
+INVALIDATED_BY = frozenset({"bot.state", "trade.opened", "trade.closed", "system.notice"})
+
+
+def _bots_query() -> Select[Any]:
+    latest = (
+        select(
+            PortfolioSnapshot.id,
+            PortfolioSnapshot.equity,
+            PortfolioSnapshot.cash,
+            PortfolioSnapshot.positions_value,
+            PortfolioSnapshot.timestamp,
+        )
+        .where(PortfolioSnapshot.bot_id == Bot.id)
+        .order_by(PortfolioSnapshot.timestamp.desc())
+        .limit(1)
+        .lateral("latest")
+    )
+    return (
+        select(
+            *read_columns(Bot, BotRead),
+            BotLedger.open_trades,
+            BotLedger.realized_pnl_quote,
+            latest.c.id.label("snapshot_id"),
+            latest.c.equity,
+            latest.c.cash,
+            latest.c.positions_value,
+            latest.c.timestamp,
+        )
+        .select_from(Bot)
+        .outerjoin(latest, true())
+        .outerjoin(BotLedger, BotLedger.bot_id == Bot.id)
+        .order_by(Bot.created_at.desc(), Bot.id.desc())
+        .limit(_MAX_BOTS)
+    )
+
+
+_SNAPSHOT_COLUMNS = ("snapshot_id", "equity", "cash", "positions_value", "timestamp")
+
+
+def _latest_snapshot(row: RowMapping) -> dict[str, Any] | None:
+    if row["snapshot_id"] is None:
+        return None
+    snapshot = {name: row[name] for name in _SNAPSHOT_COLUMNS[1:]}
+    return {"id": row["snapshot_id"], "bot_id": row["id"], **snapshot}
+
+
+def _dashboard_bot(row: RowMapping, snapshot: dict[str, Any] | None) -> DashboardBot:
+    fields = {name: value for name, value in row.items() if name not in _SNAPSHOT_COLUMNS}
+    fields["open_trades"] = fields["open_trades"] or 0
+    fields["realized_pnl_quote"] = fields["realized_pnl_quote"] or 0.0
+    fields["latest_snapshot"] = PortfolioSnapshotRead.model_validate(snapshot) if snapshot is not None else None
+    return DashboardBot.model_validate(fields)
+
+
+async def build_dashboard(
+    session_factory: async_sessionmaker[AsyncSession],
+    with_live_marks: Callable[[Sequence[RowMapping]], Awaitable[list[dict[str, Any]]]],
+    with_job_states: Callable[[Sequence[RowMapping]], Awaitable[list[dict[str, Any]]]],
+    with_live_portfolios: Callable[[list[dict[str, Any]]], Awaitable[list[dict[str, Any]]]],
+) -> DashboardRead:
+    """Run the dashboard's bounded queries concurrently, one pooled session each.
+
+    A single asyncpg connection cannot run statements concurrently, so each
+    query borrows its own session; every query is capped by a LIMIT. Open
+    trades, active jobs and the bots' latest snapshots get their live state
+    from Redis through ``with_live_marks``, ``with_job_states`` and
+    ``with_live_portfolios``.
+    """
+
+    async def _rows(query: Select[Any]) -> Sequence[RowMapping]:
+        async with session_factory() as session:
+            return (await session.execute(query)).mappings().all()
+
+    bot_rows, trade_rows, job_rows = await asyncio.gather(
+        _rows(_bots_query()),
+        _rows(
+            select(*read_columns(Trade, TradeRead))
+            .order_by(Trade.created_at.desc(), Trade.id.desc())
+            .limit(_RECENT_TRADES)
+        ),
+        _rows(
+            select(*read_columns(Job, JobRead))
+            .where(Job.status.in_(ACTIVE_JOB_STATUSES))
+            .order_by(Job.created_at.desc(), Job.id.desc())
+            .limit(_ACTIVE_JOBS)
+        ),
+    )
+
+    snapshots_by_bot = {row["id"]: _latest_snapshot(row) for row in bot_rows}
+    await with_live_portfolios([snapshot for snapshot in snapshots_by_bot.values() if snapshot is not None])
+    bots = [_dashboard_bot(row, snapshots_by_bot[row["id"]]) for row in bot_rows]
+    snapshots = [bot.latest_snapshot for bot in bots if bot.latest_snapshot is not None]
+    return DashboardRead(
+        generated_at=datetime.now(timezone.utc),
+        portfolio=max(snapshots, key=lambda snapshot: snapshot.timestamp, default=None),
+        bots=bots,
+        recent_trades=[TradeRead.model_validate(row) for row in await with_live_marks(trade_rows)],
+        active_jobs=[JobRead.model_validate(row) for row in await with_job_states(job_rows)],
+    )
+
+
+class DashboardCache:
+    """Caches the serialized dashboard for ``ttl_seconds``, dropped early by state-changing events.
+
+    Concurrent misses share one rebuild. The cache is attached to the SSE hub
+    as a listener on every bot topic, which the hub usually holds already for
+    unfiltered SSE clients.
+    """
+
+    patterns = (topic_pattern(None, None),)
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._body: bytes | None = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self._attached = False
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def attach(self, hub: SseHub) -> None:
+        if not self._attached:
+            self._attached = True
+            await hub.attach(self)
+
+    def offer(self, event: SseEvent, data: dict[str, Any]) -> None:
+        if event[1] in INVALIDATED_BY:
+            self.invalidate()
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._body = None
+        self.invalidations += 1
+
+    def _fresh(self) -> bytes | None:
+        if self._body is not None and time.monotonic() < self._expires_at:
+            return self._body
+        return None
+
+    async def get(self, build: Callable[[], Awaitable[bytes]]) -> bytes:
+        body = self._fresh()
+        if body is not None:
+            self.hits += 1
+            return body
+        async with self._lock:
+            body = self._fresh()
+            if body is not None:
+                self.hits += 1
+                return body
+            self.misses += 1
+            generation = self._generation
+            body = await build()
+            # An event during the rebuild may have made it stale already.
+            if generation == self._generation:
+                self._body = body
+                self._expires_at = time.monotonic() + self.ttl_seconds
+            return body
+
+    def stats(self) -> dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations}
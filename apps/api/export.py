@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zlib
+from collections.abc import AsyncIterator, Callable
+from typing import Any, Literal
+
+from sqlalchemy import Select
+
+from packages.core.database import get_async_engine
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES: dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _encode_ndjson(columns: list[str], rows: list[Any], default: Callable[[Any], Any]) -> str:
+    return "".join(json.dumps(dict(zip(columns, row)), default=default) + "\n" for row in rows)
+
+
+def _encode_csv(rows: list[Any], default: Callable[[Any], Any]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_csv_value(value, default) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+def _csv_value(value: Any, default: Callable[[Any], Any]) -> Any:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=default)
+    return default(value)
+
+
+async def stream_export(
+    query: Select[Any],
+    fmt: ExportFormat,
+    compress: bool,
+    batch_rows: int,
+    default: Callable[[Any], Any] = str,
+) -> AsyncIterator[bytes]:
+    """Encode ``query``'s rows as they arrive from a server-side cursor.
+
+    Rows are fetched ``batch_rows`` at a time and each batch is written as one
+    chunk, so memory stays flat however many rows the export holds. With
+    ``compress`` the chunks are gzipped incrementally.
+    """
+    gzip = zlib.compressobj(wbits=31) if compress else None
+
+    def _out(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return gzip.compress(data) if gzip is not None else data
+
+    async with get_async_engine().connect() as conn:
+        result = await conn.stream(query.execution_options(yield_per=batch_rows))
+        columns = list(result.keys())
+        if fmt == "csv":
+            header = io.StringIO()
+            csv.writer(header).writerow(columns)
+            yield _out(header.getvalue())
+        async for rows in result.partitions():
+            chunk = _out(_encode_csv(rows, default) if fmt == "csv" else _encode_ndjson(columns, rows, default))
+            if chunk:
+                yield chunk
+
+    if gzip is not None:
+        yield gzip.flush()
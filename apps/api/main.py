@@ -3,52 +3,107 @@ from __future__ import annotations
 import asyncio
 import json
 from collections.abc import AsyncGenerator
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from functools import lru_cache
 from pathlib import Path
 from typing import Any, Literal
 from urllib import error as urlerror
 from urllib import request as urlrequest
 
-import ccxt
+import numpy as np
 import redis.asyncio as redis
-from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from redis.commands.core import AsyncScript
 from sse_starlette.sse import EventSourceResponse
 from sqlalchemy import asc, desc, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from apps.api.dashboard import DashboardCache, build_dashboard
 from apps.api.database import get_db
+from apps.api.export import MEDIA_TYPES, ExportFormat, stream_export
+from apps.api.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    fetch_page,
+    filter_time_range,
+    read_columns,
+)
+from apps.api.responses import RawJSONResponse, dump_rows, dumps_json
+from apps.api.sse_hub import SseHub
+from apps.api.sync import SYNC_DEFAULT_ROWS, SYNC_MAX_ROWS, decode_sync_cursor, fetch_changes, sync_datasets
 from apps.worker.celery_app import celery_app
+from packages.core.backtest import backtest_artifact_path
+from packages.core.bot_control import BOT_CONTROL_CHANNEL, encode_control
+from packages.core.candles import get_candle_store, timeframe_ms
+from packages.core.events import (
+    EVENTS_STREAM_KEY,
+    PUBLISH_EVENTS_LUA,
+    event_envelope,
+    parse_event_id,
+    publish_args,
+)
+from packages.core.downsample import lttb_indices
+from packages.core.exchange import get_exchange_pool
+from packages.core.database import get_async_session_factory
+from packages.core.job_state import ACTIVE_JOB_STATUSES, load_job_states, overlay_job_states
+from packages.core.ledger import ledger_trade_closed, ledger_trade_opened
+from packages.core.marks import (
+    LiveMark,
+    load_live_marks,
+    load_live_portfolios,
+    overlay_live_marks,
+    overlay_live_portfolios,
+)
 from packages.core.models import Bot, Job, Order, PortfolioSnapshot, Strategy, Trade
+from packages.core.optimize import expand_candidates, optimization_artifact_path
+from packages.core.rollups import history_query, pick_tier, raw_snapshot_step
 from packages.core.schemas import (
+    BacktestCreate,
+    BacktestResultRead,
+    BacktestStartResponse,
     BotCreate,
     BotKnobsUpdate,
     BotRead,
     BotStartResponse,
     BotStopResponse,
+    DashboardRead,
     JobRead,
+    KnobRange,
+    Knobs,
     MarketOhlcvResponse,
     MarketTicker,
     OllamaModel,
+    OptimizeCreate,
+    OptimizeResultRead,
     OrderCreate,
     OrderExecutionResponse,
     OrderRead,
+    PortfolioHistoryPoint,
+    PortfolioHistoryRead,
     PortfolioSnapshotRead,
+    SyncRead,
     TradeCloseResponse,
     TradeRead,
 )
 from packages.core.settings import Settings, get_settings
+from packages.core.strategies import get_strategy
+from packages.core.ticker_cache import TickerCache, normalize_ticker
 
 app = FastAPI(title="Local-First Binance Bot API", version="2.0.0")
 router = APIRouter()
 
+MAX_OHLCV_ROWS = 50_000
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 
@@ -84,65 +139,64 @@ def _parse_symbols(symbols: str) -> list[str]:
 
 
 def _fetch_binance_tickers(symbols: list[str]) -> list[dict[str, Any]]:
-    exchange = ccxt.binance({"enableRateLimit": True})
-    try:
-        exchange.load_markets()
-        tickers: dict[str, Any]
+    def _fetch(exchange: Any) -> dict[str, Any]:
         try:
-            tickers = exchange.fetch_tickers(symbols)
+            return exchange.fetch_tickers(symbols)
         except Exception:
-            tickers = {symbol: exchange.fetch_ticker(symbol) for symbol in symbols}
+            return {symbol: exchange.fetch_ticker(symbol) for symbol in symbols}
 
-        payload: list[dict[str, Any]] = []
-        for symbol in symbols:
-            ticker = tickers.get(symbol)
-            if not ticker:
-                continue
+    tickers = get_exchange_pool().call(_fetch)
+    payload = [row for row in (normalize_ticker(symbol, tickers.get(symbol)) for symbol in symbols) if row]
 
-            last_price = ticker.get("last") or ticker.get("close")
-            if last_price is None:
-                continue
+    if not payload:
+        raise RuntimeError("No ticker data returned from Binance")
 
-            payload.append(
-                {
-                    "symbol": symbol,
-                    "price": float(last_price),
-                    "change_24h": (
-                        float(ticker["percentage"]) if ticker.get("percentage") is not None else None
-                    ),
-                    "timestamp": ticker.get("timestamp"),
-                }
-            )
+    return payload
 
-        if not payload:
-            raise RuntimeError("No ticker data returned from Binance")
 
-        return payload
-    finally:
-        close_method = getattr(exchange, "close", None)
-        if callable(close_method):
-            close_method()
+def _load_ohlcv(
+    symbol: str,
+    timeframe: str,
+    limit: int,
+    since: int | None,
+    until: int | None,
+) -> list[list[float | int]]:
+    store = get_candle_store()
+    rows = store.load(symbol, timeframe, since=since, until=until, limit=limit).to_rows()
+
+    # The forming candle is never stored; fetch it live for open-ended requests.
+    if until is None and (since is None or len(rows) < limit):
+        partial = store.fetch_partial(symbol, timeframe)
+        if partial is not None and (not rows or partial[0] > rows[-1][0]):
+            rows.append(partial)
+            if since is None:
+                rows = rows[-limit:]
 
+    if not rows:
+        raise RuntimeError("No OHLCV data returned from Binance")
+    return rows
 
-def _fetch_binance_ohlcv(symbol: str, timeframe: str, limit: int) -> list[list[float | int]]:
-    exchange = ccxt.binance({"enableRateLimit": True})
-    try:
-        exchange.load_markets()
-        rows = exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
-        if not rows:
-            raise RuntimeError("No OHLCV data returned from Binance")
-        return rows
-    finally:
-        close_method = getattr(exchange, "close", None)
-        if callable(close_method):
-            close_method()
 
+@lru_cache(maxsize=1)
+def _redis_client() -> redis.Redis:
+    return redis.from_url(_settings().redis_url, decode_responses=True)
 
-def _fetch_last_price(symbol: str) -> float:
-    rows = _fetch_binance_tickers([symbol])
-    if not rows:
-        raise RuntimeError(f"No ticker found for {symbol}")
-    return float(rows[0]["price"])
+
+@lru_cache(maxsize=1)
+def _ticker_cache() -> TickerCache:
+    settings = _settings()
+    return TickerCache(
+        loader=_fetch_binance_tickers,
+        ttl_seconds=settings.ticker_cache_ttl_seconds,
+        redis_client=_redis_client() if settings.ticker_cache_redis_enabled else None,
+    )
+
+
+async def _fetch_last_price(symbol: str) -> float:
+    try:
+        return await _ticker_cache().get_price(symbol)
+    except RuntimeError as exc:
+        raise RuntimeError(f"No ticker found for {symbol}") from exc
 
 
 def _ollama_get(path: str) -> tuple[int, dict[str, Any]]:
@@ -154,69 +208,140 @@ def _ollama_get(path: str) -> tuple[int, dict[str, Any]]:
         return response.status, parsed
 
 
+@lru_cache(maxsize=1)
+def _publish_events_script() -> AsyncScript:
+    return _redis_client().register_script(PUBLISH_EVENTS_LUA)
+
+
 async def _publish_runtime_event(event_name: str, payload: dict[str, Any]) -> None:
-    client = redis.from_url(_settings().redis_url, decode_responses=True)
+    await _publish_events_script()(
+        keys=[EVENTS_STREAM_KEY],
+        args=publish_args(
+            [event_envelope(event_name, payload)],
+            _settings().events_stream_maxlen,
+            default=_json_default,
+        ),
+    )
+
+
+@lru_cache(maxsize=1)
+def _sse_hub() -> SseHub:
+    settings = _settings()
+    return SseHub(
+        client_factory=_redis_client,
+        serialize=_serialize_json,
+        max_pending=settings.sse_client_queue_size,
+        max_replay=settings.sse_replay_max_events,
+    )
+
+
+async def _live_marks(trade_ids: list[int]) -> dict[int, LiveMark]:
+    """Live marks of open trades; without Redis the checkpointed values in Postgres stand."""
     try:
-        event = {"event": event_name, "data": payload}
-        await client.publish("events", json.dumps(event, default=_json_default))
-    finally:
-        await client.aclose()
+        return await load_live_marks(_redis_client(), trade_ids)
+    except redis.RedisError:
+        return {}
 
 
-async def _redis_sse_stream(
-    request: Request,
-    bot_id: int | None,
-    job_id: int | None,
-) -> AsyncGenerator[dict[str, str], None]:
-    client = redis.from_url(_settings().redis_url, decode_responses=True)
-    pubsub = client.pubsub()
+async def _with_live_marks(rows: Any) -> list[dict[str, Any]]:
+    trades = [dict(row) for row in rows]
+    overlay_live_marks(trades, await _live_marks([row["id"] for row in trades if row["status"] == "open"]))
+    return trades
 
-    await pubsub.subscribe("events")
-    yield {
-        "event": "system.notice",
-        "data": _serialize_json(
-            {
-                "message": "SSE connected",
-                "channel": "events",
-                "ts": datetime.utcnow().isoformat() + "Z",
-            }
-        ),
-    }
 
+async def _with_live_portfolios(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Snapshot rows, with their bot's equity at the latest live marks where those are newer."""
     try:
-        while True:
-            if await request.is_disconnected():
-                break
+        portfolios = await load_live_portfolios(
+            _redis_client(), [row["bot_id"] for row in rows if row["bot_id"] is not None]
+        )
+    except redis.RedisError:
+        return rows
+    overlay_live_portfolios(rows, portfolios)
+    return rows
 
-            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-            if not message:
-                await asyncio.sleep(0.1)
-                continue
 
-            raw_data = message.get("data")
-            if raw_data is None:
-                continue
+async def _with_live_portfolio(snapshot: PortfolioSnapshot) -> PortfolioSnapshotRead:
+    (row,) = await _with_live_portfolios([PortfolioSnapshotRead.model_validate(snapshot).model_dump()])
+    return PortfolioSnapshotRead.model_validate(row)
 
-            try:
-                payload = json.loads(raw_data)
-            except json.JSONDecodeError:
-                continue
 
-            event_name = str(payload.get("event", "system.notice"))
-            event_data = payload.get("data", {})
-            if not isinstance(event_data, dict):
-                event_data = {"value": event_data}
+async def _with_job_states(rows: Any) -> list[dict[str, Any]]:
+    """Job rows with the transient progress the worker keeps in Redis between checkpoints."""
+    jobs = [dict(row) for row in rows]
+    try:
+        states = await load_job_states(_redis_client(), [row["id"] for row in jobs])
+    except redis.RedisError:
+        return jobs
+    overlay_job_states(jobs, states)
+    return jobs
+
+
+@lru_cache(maxsize=1)
+def _dashboard_cache() -> DashboardCache:
+    return DashboardCache(ttl_seconds=_settings().dashboard_cache_seconds)
+
+
+async def _build_dashboard_body() -> bytes:
+    dashboard = await build_dashboard(
+        get_async_session_factory(), _with_live_marks, _with_job_states, _with_live_portfolios
+    )
+    return dumps_json(dashboard.model_dump())
+
+
+async def _sse_stream(
+    bot_id: int | None,
+    job_id: int | None,
+    market: bool,
+    last_event_id: str | None,
+) -> AsyncGenerator[dict[str, str], None]:
+    hub = _sse_hub()
+    # Subscribe before replaying so nothing published in between is missed;
+    # live events already covered by the replay are skipped below.
+    client = await hub.subscribe(bot_id=bot_id, job_id=job_id, market=market)
+    try:
+        yield {
+            "event": "system.notice",
+            "data": _serialize_json(
+                {
+                    "message": "SSE connected",
+                    "topics": list(client.patterns),
+                    "ts": datetime.utcnow().isoformat() + "Z",
+                }
+            ),
+        }
+
+        replayed_through = None
+        if last_event_id:
+            events, complete = await hub.replay(last_event_id, client.patterns)
+            if not complete:
+                yield {
+                    "event": "system.notice",
+                    "data": _serialize_json(
+                        {
+                            "message": "Event replay incomplete; reload state",
+                            "resync": True,
+                            "ts": datetime.utcnow().isoformat() + "Z",
+                        }
+                    ),
+                }
+            for event_key, event_name, payload in events:
+                yield {"id": event_key, "event": event_name, "data": payload}
+            if events:
+                replayed_through = parse_event_id(events[-1][0])
 
-            if bot_id is not None and event_data.get("bot_id") != bot_id:
+        # EventSourceResponse cancels this generator when the client disconnects.
+        while True:
+            event_key, event_name, payload = await client.get()
+            if not event_key:
+                # Hub notices carry no id, so the client's resume point is kept.
+                yield {"event": event_name, "data": payload}
                 continue
-            if job_id is not None and event_data.get("job_id") != job_id:
+            if replayed_through is not None and parse_event_id(event_key) <= replayed_through:
                 continue
-
-            yield {"event": event_name, "data": _serialize_json(event_data)}
+            yield {"id": event_key, "event": event_name, "data": payload}
     finally:
-        await pubsub.unsubscribe("events")
-        await pubsub.close()
-        await client.aclose()
+        hub.unsubscribe(client)
 
 
 async def _resolve_strategy_for_bot_create(db: AsyncSession, requested_strategy: str | None) -> Strategy:
@@ -286,14 +411,17 @@ async def _close_trade_by_market(
     symbol: str,
     paper_mode: bool,
 ) -> tuple[Trade, Order]:
+    # Lock the row so concurrent closes cannot both book the trade in the ledger.
+    await db.refresh(trade, with_for_update=True)
     if trade.status != "open":
         raise HTTPException(status_code=409, detail="Trade is not open")
 
-    mark_price = await asyncio.to_thread(_fetch_last_price, symbol)
+    mark_price = await _fetch_last_price(symbol)
     proceeds = float(trade.amount * mark_price)
     sell_fee = float(proceeds * fee_rate)
 
-    fees_total = float((trade.fees_paid_quote or 0.0) + sell_fee)
+    entry_fees = float(trade.fees_paid_quote or 0.0)
+    fees_total = float(entry_fees + sell_fee)
     realized = float(proceeds - (trade.cost_basis_quote or 0.0) - fees_total)
 
     trade.price = mark_price
@@ -303,6 +431,8 @@ async def _close_trade_by_market(
     trade.pnl = realized
     trade.status = "closed"
     trade.closed_at = _utc_now()
+    if trade.bot_id is not None:
+        await db.execute(ledger_trade_closed(trade, entry_fees_quote=entry_fees, exit_fee_quote=sell_fee))
 
     order = Order(
         bot_id=trade.bot_id,
@@ -320,7 +450,11 @@ async def _close_trade_by_market(
     )
     db.add(order)
     await db.flush()
+    return trade, order
 
+
+async def _publish_trade_closed(trade: Trade, order: Order) -> None:
+    """Announce a close once it is committed, so listeners that re-read (the dashboard cache) see it."""
     await _publish_runtime_event(
         "trade.closed",
         {
@@ -328,21 +462,26 @@ async def _close_trade_by_market(
             "trade_id": trade.id,
             "order_id": order.id,
             "symbol": trade.symbol,
-            "price": mark_price,
-            "realized_pnl_quote": realized,
-            "fees_paid_quote": fees_total,
+            "price": trade.price,
+            "realized_pnl_quote": trade.realized_pnl_quote,
+            "fees_paid_quote": trade.fees_paid_quote,
             "ts": _utc_now().isoformat(),
         },
     )
 
-    return trade, order
-
 
 @app.on_event("startup")
 async def startup() -> None:
     Path(_settings().artifacts_dir).mkdir(parents=True, exist_ok=True)
 
 
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    get_exchange_pool().close()
+    await _sse_hub().close()
+    await _redis_client().aclose()
+
+
 @router.get("/health")
 async def health(db: AsyncSession = Depends(get_db)) -> dict[str, Any]:
     checks: dict[str, dict[str, Any]] = {}
@@ -371,23 +510,35 @@ async def health(db: AsyncSession = Depends(get_db)) -> dict[str, Any]:
     return {
         "status": "ok" if overall_ok else "degraded",
         "checks": checks,
+        "exchange_pool": get_exchange_pool().stats(),
+        "ticker_cache": _ticker_cache().stats(),
+        "sse_hub": _sse_hub().stats(),
+        "dashboard_cache": _dashboard_cache().stats(),
     }
 
 
 @router.get("/sse")
 async def sse(
-    request: Request,
     bot_id: int | None = Query(default=None),
     job_id: int | None = Query(default=None),
+    market: bool = Query(default=False),
+    last_event_id_query: str | None = Query(default=None, alias="last_event_id"),
+    last_event_id: str | None = Header(default=None),
 ) -> EventSourceResponse:
-    return EventSourceResponse(_redis_sse_stream(request=request, bot_id=bot_id, job_id=job_id), ping=15)
+    # Browsers resend the header on reconnect; the query form is for clients
+    # that cannot set headers on a fresh EventSource.
+    resume_from = last_event_id or last_event_id_query
+    return EventSourceResponse(
+        _sse_stream(bot_id=bot_id, job_id=job_id, market=market, last_event_id=resume_from),
+        ping=15,
+    )
 
 
 @router.get("/market/tickers", response_model=list[MarketTicker])
 async def market_tickers(symbols: str = Query(..., description="Comma-separated symbols")) -> list[MarketTicker]:
     parsed_symbols = _parse_symbols(symbols)
     try:
-        data = await asyncio.to_thread(_fetch_binance_tickers, parsed_symbols)
+        data = await _ticker_cache().get_many(parsed_symbols)
     except Exception as exc:
         raise HTTPException(status_code=502, detail=f"Failed to fetch Binance tickers: {exc}") from exc
 
@@ -398,18 +549,34 @@ async def market_tickers(symbols: str = Query(..., description="Comma-separated
 async def market_ohlcv(
     symbol: str = Query(..., description="Trading pair such as BTC/USDT"),
     timeframe: str = Query(default="1h"),
-    limit: int = Query(default=500, ge=1, le=1000),
+    limit: int = Query(default=500, ge=1, le=MAX_OHLCV_ROWS),
+    since: int | None = Query(default=None, ge=0, description="Start candle open time (ms)"),
+    until: int | None = Query(default=None, ge=0, description="End candle open time (ms), inclusive"),
 ) -> MarketOhlcvResponse:
     normalized_symbol = symbol.strip().upper()
     if "/" not in normalized_symbol:
         raise HTTPException(status_code=422, detail="symbol must look like BASE/QUOTE, e.g. BTC/USDT")
+    if since is not None and until is not None and until < since:
+        raise HTTPException(status_code=422, detail="until must be >= since")
+
+    try:
+        timeframe_ms(timeframe)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
 
     try:
-        rows = await asyncio.to_thread(_fetch_binance_ohlcv, normalized_symbol, timeframe, limit)
+        rows = await asyncio.to_thread(_load_ohlcv, normalized_symbol, timeframe, limit, since, until)
     except Exception as exc:
         raise HTTPException(status_code=502, detail=f"Failed to fetch Binance OHLCV: {exc}") from exc
 
-    return MarketOhlcvResponse(symbol=normalized_symbol, timeframe=timeframe, limit=limit, ohlcv=rows)
+    return MarketOhlcvResponse(
+        symbol=normalized_symbol,
+        timeframe=timeframe,
+        limit=limit,
+        since=since,
+        until=until,
+        ohlcv=rows,
+    )
 
 
 @router.get("/ai/models", response_model=list[OllamaModel])
@@ -469,9 +636,18 @@ async def create_bot(payload: BotCreate, db: AsyncSession = Depends(get_db)) ->
 
 
 @router.get("/bots", response_model=list[BotRead])
-async def list_bots(db: AsyncSession = Depends(get_db)) -> list[BotRead]:
-    result = await db.execute(select(Bot).order_by(desc(Bot.created_at)))
-    return [BotRead.model_validate(bot) for bot in result.scalars().all()]
+async def list_bots(
+    response: Response,
+    status: str | None = Query(default=None),
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+) -> list[BotRead]:
+    query = select(*read_columns(Bot, BotRead))
+    if status:
+        query = query.where(Bot.status == status)
+    rows = await fetch_page(db, query, Bot, cursor, limit, response)
+    return [BotRead.model_validate(dict(row)) for row in rows]
 
 
 @router.get("/bots/{bot_id}", response_model=BotRead)
@@ -482,6 +658,10 @@ async def get_bot(bot_id: int, db: AsyncSession = Depends(get_db)) -> BotRead:
     return BotRead.model_validate(bot)
 
 
+async def _send_bot_control(action: str, bot_id: int, job_id: int | None = None) -> None:
+    await _redis_client().publish(BOT_CONTROL_CHANNEL, encode_control(action, bot_id, job_id))
+
+
 @router.post("/bots/{bot_id}/start", response_model=BotStartResponse)
 async def start_bot(bot_id: int, db: AsyncSession = Depends(get_db)) -> BotStartResponse:
     bot = await db.get(Bot, bot_id)
@@ -491,25 +671,37 @@ async def start_bot(bot_id: int, db: AsyncSession = Depends(get_db)) -> BotStart
     bot.status = "running"
     bot.stop_requested = False
 
-    job = Job(bot_id=bot_id, task="bot_run_loop", status="queued", progress=0, message="Queued")
-    db.add(job)
+    # A bot already driven by the runtime keeps its loop job: the runtime only
+    # wakes an existing slot, so a new row would stay queued forever.
+    job = (
+        await db.execute(
+            select(Job)
+            .where(Job.bot_id == bot_id, Job.task == "bot_run_loop", Job.status.in_(ACTIVE_JOB_STATUSES))
+            .order_by(desc(Job.created_at))
+            .limit(1)
+        )
+    ).scalar_one_or_none()
+    created = job is None
+    if job is None:
+        job = Job(bot_id=bot_id, task="bot_run_loop", status="queued", progress=0, message="Queued")
+        db.add(job)
     await db.commit()
     await db.refresh(job)
 
+    # The bot runtime picks the bot up from this message, or from its next
+    # reconcile of running bots if the message is missed.
     try:
-        async_result = celery_app.send_task("bot_run_loop", args=[bot_id])
+        await _send_bot_control("start", bot_id, job.id)
     except Exception as exc:
-        job.status = "failed"
-        job.message = f"Failed to enqueue task: {exc}"
+        if created:
+            job.status = "failed"
+            job.message = f"Failed to notify bot runtime: {exc}"
         bot.status = "stopped"
         bot.stop_requested = True
         await db.commit()
-        raise HTTPException(status_code=503, detail=f"Failed to enqueue worker task: {exc}") from exc
+        raise HTTPException(status_code=503, detail=f"Failed to notify bot runtime: {exc}") from exc
 
-    job.celery_task_id = async_result.id
-    await db.commit()
-
-    return BotStartResponse(bot_id=bot_id, job_id=job.id, task_id=async_result.id, status="queued")
+    return BotStartResponse(bot_id=bot_id, job_id=job.id, task_id=None, status=job.status)
 
 
 @router.post("/bots/{bot_id}/stop", response_model=BotStopResponse)
@@ -521,17 +713,15 @@ async def stop_bot(bot_id: int, db: AsyncSession = Depends(get_db)) -> BotStopRe
     bot.status = "stopped"
     bot.stop_requested = True
 
-    stop_job = Job(bot_id=bot_id, task="bot_stop", status="queued", progress=0, message="Stop requested")
+    stop_job = Job(bot_id=bot_id, task="bot_stop", status="completed", progress=100, message="Stop signal set")
     db.add(stop_job)
     await db.commit()
 
+    # Best effort: the stop is already durable, the runtime only reacts sooner.
     try:
-        celery_app.send_task("bot_stop", args=[bot_id])
-    except Exception as exc:
-        stop_job.status = "failed"
-        stop_job.message = f"Failed to enqueue stop task: {exc}"
-        await db.commit()
-        raise HTTPException(status_code=503, detail=f"Failed to enqueue stop task: {exc}") from exc
+        await _send_bot_control("stop", bot_id)
+    except Exception:  # pragma: no cover - runtime dependent
+        pass
 
     return BotStopResponse(bot_id=bot_id, stop_requested=True, status="stopped")
 
@@ -545,9 +735,41 @@ async def update_bot_knobs(bot_id: int, payload: BotKnobsUpdate, db: AsyncSessio
     bot.knobs = payload.knobs.model_dump()
     await db.commit()
     await db.refresh(bot)
+
+    # Best effort like stop: a running bot otherwise picks the knobs up on its next reconcile.
+    try:
+        await _send_bot_control("config", bot_id)
+    except Exception:  # pragma: no cover - runtime dependent
+        pass
+
     return BotRead.model_validate(bot)
 
 
+@router.get("/dashboard", response_model=DashboardRead)
+async def get_dashboard() -> RawJSONResponse:
+    """Bots with their latest snapshot and ledger counts, recent trades and active jobs in one response.
+
+    Served from a short-lived cache that bot state and trade events drop early.
+    """
+    cache = _dashboard_cache()
+    await cache.attach(_sse_hub())
+    return RawJSONResponse(await cache.get(_build_dashboard_body))
+
+
+@router.get("/sync", response_model=SyncRead)
+async def sync_changes(
+    since: str | None = Query(default=None),
+    limit: int = Query(default=SYNC_DEFAULT_ROWS, ge=1, le=SYNC_MAX_ROWS),
+    include: list[str] | None = Query(default=None),
+    db: AsyncSession = Depends(get_db),
+) -> RawJSONResponse:
+    """Bots, trades, orders, jobs and latest snapshots created or changed since the ``since`` cursor."""
+    changes = await fetch_changes(db, decode_sync_cursor(since), limit, sync_datasets(include))
+    changes["trades"] = await _with_live_marks(changes["trades"])
+    changes["jobs"] = await _with_job_states(changes["jobs"])
+    return RawJSONResponse(changes)
+
+
 @router.get("/portfolio", response_model=PortfolioSnapshotRead)
 async def get_latest_portfolio(db: AsyncSession = Depends(get_db)) -> PortfolioSnapshotRead:
     result = await db.execute(select(PortfolioSnapshot).order_by(desc(PortfolioSnapshot.timestamp)).limit(1))
@@ -555,7 +777,7 @@ async def get_latest_portfolio(db: AsyncSession = Depends(get_db)) -> PortfolioS
     if not snapshot:
         raise HTTPException(status_code=404, detail="No portfolio snapshots found")
 
-    return PortfolioSnapshotRead.model_validate(snapshot)
+    return await _with_live_portfolio(snapshot)
 
 
 @router.get("/portfolio/{bot_id}", response_model=PortfolioSnapshotRead)
@@ -570,37 +792,241 @@ async def get_bot_portfolio(bot_id: int, db: AsyncSession = Depends(get_db)) ->
     if not snapshot:
         raise HTTPException(status_code=404, detail="No portfolio snapshots found for bot")
 
-    return PortfolioSnapshotRead.model_validate(snapshot)
+    return await _with_live_portfolio(snapshot)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+@router.get("/portfolio/{bot_id}/history", response_model=PortfolioHistoryRead)
+async def get_bot_portfolio_history(
+    bot_id: int,
+    since: datetime | None = Query(default=None),
+    until: datetime | None = Query(default=None),
+    from_: datetime | None = Query(default=None, alias="from"),
+    to: datetime | None = Query(default=None),
+    points: int | None = Query(default=None, ge=2, le=5000),
+    tier: Literal["auto", "raw", "1m", "1h", "1d"] = Query(default="auto"),
+    db: AsyncSession = Depends(get_db),
+) -> PortfolioHistoryRead:
+    now = datetime.now(timezone.utc)
+    since = since or from_
+    until = until or to
+    until = _as_utc(until) if until is not None else now
+    since = _as_utc(since) if since is not None else until - timedelta(days=1)
+    if until <= since:
+        raise HTTPException(status_code=422, detail="until must be > since")
+    bot = await db.get(Bot, bot_id)
+    if not bot:
+        raise HTTPException(status_code=404, detail="Bot not found")
+
+    resolved = tier
+    if tier == "auto":
+        # Read at least as many points as were asked for, so downsampling has detail to keep.
+        max_points = max(points or 0, _settings().portfolio_history_max_points)
+        resolved = pick_tier(
+            since,
+            until,
+            now,
+            _settings(),
+            max_points=max_points,
+            raw_step=raw_snapshot_step(_settings(), bot.timeframe),
+        )
+    rows = (await db.execute(history_query(bot_id, resolved, since, until))).mappings().all()
+    source_points = len(rows)
+    if points is not None and len(rows) > points:
+        timestamps = np.fromiter((row["timestamp"].timestamp() for row in rows), dtype=np.float64, count=len(rows))
+        closes = np.fromiter((row["close"] for row in rows), dtype=np.float64, count=len(rows))
+        rows = [rows[index] for index in lttb_indices(timestamps, closes, points)]
+    return PortfolioHistoryRead(
+        bot_id=bot_id,
+        tier=resolved,
+        since=since,
+        until=until,
+        source_points=source_points,
+        points=[PortfolioHistoryPoint(**row) for row in rows],
+    )
 
 
 @router.get("/jobs", response_model=list[JobRead])
-async def list_jobs(db: AsyncSession = Depends(get_db)) -> list[JobRead]:
-    result = await db.execute(select(Job).order_by(desc(Job.created_at)))
-    return [JobRead.model_validate(job) for job in result.scalars().all()]
+async def list_jobs(
+    response: Response,
+    bot_id: int | None = Query(default=None),
+    status: str | None = Query(default=None),
+    task: str | None = Query(default=None),
+    since: datetime | None = Query(default=None),
+    until: datetime | None = Query(default=None),
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+) -> RawJSONResponse:
+    query = filter_time_range(select(*read_columns(Job, JobRead)), Job.created_at, since, until)
+    if bot_id is not None:
+        query = query.where(Job.bot_id == bot_id)
+    if status:
+        query = query.where(Job.status == status)
+    if task:
+        query = query.where(Job.task == task)
+    rows = await fetch_page(db, query, Job, cursor, limit, response)
+    return RawJSONResponse(dumps_json(await _with_job_states(rows)), headers=response.headers)
 
 
 @router.get("/jobs/{job_id}", response_model=JobRead)
 async def get_job(job_id: int, db: AsyncSession = Depends(get_db)) -> JobRead:
-    job = await db.get(Job, job_id)
-    if not job:
+    row = (await db.execute(select(*read_columns(Job, JobRead)).where(Job.id == job_id))).mappings().first()
+    if not row:
         raise HTTPException(status_code=404, detail="Job not found")
+    (job,) = await _with_job_states([row])
     return JobRead.model_validate(job)
 
 
+async def _resolve_backtest_params(payload: BacktestCreate, db: AsyncSession) -> dict[str, Any]:
+    """Fill a backtest-style request from its bot's defaults."""
+    if payload.until is not None and payload.until < payload.since:
+        raise HTTPException(status_code=422, detail="until must be >= since")
+
+    bot: Bot | None = None
+    if payload.bot_id is not None:
+        bot = await db.get(Bot, payload.bot_id)
+        if not bot:
+            raise HTTPException(status_code=404, detail="Bot not found")
+
+    symbols = payload.symbols or (list(bot.symbols) if bot else None)
+    timeframe = payload.timeframe or (bot.timeframe if bot else None)
+    if not symbols or not timeframe:
+        raise HTTPException(status_code=422, detail="symbols and timeframe are required without bot_id")
+
+    strategy_name = payload.strategy or (bot.strategy if bot else "baseline")
+    try:
+        get_strategy(strategy_name)
+        timeframe_ms(timeframe)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+    if payload.knobs is not None:
+        knobs = payload.knobs
+    elif bot is not None:
+        knobs = Knobs.model_validate({key: value for key, value in bot.knobs.items() if key in Knobs.model_fields})
+    else:
+        knobs = Knobs()
+
+    return {
+        "bot_id": payload.bot_id,
+        "symbols": symbols,
+        "timeframe": timeframe,
+        "strategy": strategy_name,
+        "knobs": knobs.model_dump(),
+        "fee_rate": _resolve_fee_rate(bot),
+        "since": payload.since,
+        "until": payload.until,
+    }
+
+
+async def _enqueue_job(db: AsyncSession, bot_id: int | None, task: str, params: dict[str, Any]) -> BacktestStartResponse:
+    job = Job(bot_id=bot_id, task=task, status="queued", progress=0, message="Queued")
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+
+    try:
+        async_result = celery_app.send_task(task, args=[job.id, params])
+    except Exception as exc:
+        job.status = "failed"
+        job.message = f"Failed to enqueue task: {exc}"
+        await db.commit()
+        raise HTTPException(status_code=503, detail=f"Failed to enqueue worker task: {exc}") from exc
+
+    job.celery_task_id = async_result.id
+    await db.commit()
+
+    return BacktestStartResponse(job_id=job.id, task_id=async_result.id, status="queued")
+
+
+async def _read_job_artifact(db: AsyncSession, job_id: int, task: str, label: str, artifact_path: Path) -> str:
+    job = await db.get(Job, job_id)
+    if not job or job.task != task:
+        raise HTTPException(status_code=404, detail=f"{label} not found")
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"{label} is {job.status}")
+
+    try:
+        return await asyncio.to_thread(artifact_path.read_text)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=f"{label} result artifact is missing") from exc
+
+
+@router.post("/backtests", response_model=BacktestStartResponse, status_code=202)
+async def create_backtest(payload: BacktestCreate, db: AsyncSession = Depends(get_db)) -> BacktestStartResponse:
+    params = await _resolve_backtest_params(payload, db)
+    return await _enqueue_job(db, payload.bot_id, "backtest_run", params)
+
+
+@router.get("/backtests/{job_id}", response_model=BacktestResultRead)
+async def get_backtest(job_id: int, db: AsyncSession = Depends(get_db)) -> BacktestResultRead:
+    artifact_path = backtest_artifact_path(_settings().artifacts_dir, job_id)
+    raw = await _read_job_artifact(db, job_id, "backtest_run", "Backtest", artifact_path)
+    return BacktestResultRead.model_validate_json(raw)
+
+
+@router.post("/optimizations", response_model=BacktestStartResponse, status_code=202)
+async def create_optimization(payload: OptimizeCreate, db: AsyncSession = Depends(get_db)) -> BacktestStartResponse:
+    params = await _resolve_backtest_params(payload, db)
+    candidates = expand_candidates(
+        params["knobs"],
+        payload.search,
+        mode=payload.mode,
+        samples=payload.samples,
+        max_candidates=payload.max_candidates,
+        seed=payload.seed,
+    )
+    if not candidates:
+        raise HTTPException(status_code=422, detail="Search space produced no valid knob sets")
+
+    params.update(
+        search={
+            name: spec.model_dump() if isinstance(spec, KnobRange) else list(spec)
+            for name, spec in payload.search.items()
+        },
+        mode=payload.mode,
+        samples=payload.samples,
+        max_candidates=payload.max_candidates,
+        seed=payload.seed,
+        objective=payload.objective,
+        top_n=payload.top_n,
+    )
+    return await _enqueue_job(db, payload.bot_id, "optimize_run", params)
+
+
+@router.get("/optimizations/{job_id}", response_model=OptimizeResultRead)
+async def get_optimization(job_id: int, db: AsyncSession = Depends(get_db)) -> OptimizeResultRead:
+    artifact_path = optimization_artifact_path(_settings().artifacts_dir, job_id)
+    raw = await _read_job_artifact(db, job_id, "optimize_run", "Optimization", artifact_path)
+    return OptimizeResultRead.model_validate_json(raw)
+
+
 @router.get("/trades", response_model=list[TradeRead])
 async def list_trades(
+    response: Response,
     status: Literal["open", "closed"] | None = Query(default=None),
     bot_id: int | None = Query(default=None),
+    symbol: str | None = Query(default=None),
+    since: datetime | None = Query(default=None),
+    until: datetime | None = Query(default=None),
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: AsyncSession = Depends(get_db),
-) -> list[TradeRead]:
-    query = select(Trade).order_by(desc(Trade.created_at))
+) -> RawJSONResponse:
+    query = filter_time_range(select(*read_columns(Trade, TradeRead)), Trade.created_at, since, until)
     if status:
         query = query.where(Trade.status == status)
     if bot_id is not None:
         query = query.where(Trade.bot_id == bot_id)
+    if symbol:
+        query = query.where(Trade.symbol == symbol)
 
-    result = await db.execute(query)
-    return [TradeRead.model_validate(trade) for trade in result.scalars().all()]
+    rows = await fetch_page(db, query, Trade, cursor, limit, response)
+    return RawJSONResponse(dumps_json(await _with_live_marks(rows)), headers=response.headers)
 
 
 @router.post("/trades/{trade_id}/close", response_model=TradeCloseResponse)
@@ -625,13 +1051,34 @@ async def close_trade(trade_id: int, db: AsyncSession = Depends(get_db)) -> Trad
     await db.commit()
     await db.refresh(trade)
     await db.refresh(order)
+    await _publish_trade_closed(trade, order)
     return TradeCloseResponse(trade=TradeRead.model_validate(trade), order=OrderRead.model_validate(order))
 
 
 @router.get("/orders", response_model=list[OrderRead])
-async def list_orders(db: AsyncSession = Depends(get_db)) -> list[OrderRead]:
-    result = await db.execute(select(Order).order_by(desc(Order.created_at)))
-    return [OrderRead.model_validate(order) for order in result.scalars().all()]
+async def list_orders(
+    response: Response,
+    bot_id: int | None = Query(default=None),
+    trade_id: int | None = Query(default=None),
+    symbol: str | None = Query(default=None),
+    status: str | None = Query(default=None),
+    since: datetime | None = Query(default=None),
+    until: datetime | None = Query(default=None),
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+) -> RawJSONResponse:
+    query = filter_time_range(select(*read_columns(Order, OrderRead)), Order.created_at, since, until)
+    if bot_id is not None:
+        query = query.where(Order.bot_id == bot_id)
+    if trade_id is not None:
+        query = query.where(Order.trade_id == trade_id)
+    if symbol:
+        query = query.where(Order.symbol == symbol)
+    if status:
+        query = query.where(Order.status == status)
+    rows = await fetch_page(db, query, Order, cursor, limit, response)
+    return RawJSONResponse(dump_rows(rows), headers=response.headers)
 
 
 @router.post("/orders", response_model=OrderExecutionResponse, status_code=201)
@@ -651,7 +1098,7 @@ async def create_order(payload: OrderCreate, db: AsyncSession = Depends(get_db))
     fee_rate = _resolve_fee_rate(bot)
 
     if payload.side == "buy":
-        price = await asyncio.to_thread(_fetch_last_price, payload.symbol)
+        price = await _fetch_last_price(payload.symbol)
         quote_amount = float(payload.quote_amount if payload.quote_amount is not None else payload.base_qty * price)
         base_qty = float(payload.base_qty if payload.base_qty is not None else quote_amount / price)
         fee_quote = float(fee_rate * quote_amount)
@@ -671,6 +1118,8 @@ async def create_order(payload: OrderCreate, db: AsyncSession = Depends(get_db))
         )
         db.add(trade)
         await db.flush()
+        if trade.bot_id is not None:
+            await db.execute(ledger_trade_opened(trade))
 
         order = Order(
             bot_id=payload.bot_id,
@@ -729,9 +1178,47 @@ async def create_order(payload: OrderCreate, db: AsyncSession = Depends(get_db))
 
     await db.commit()
     await db.refresh(order)
+    await _publish_trade_closed(trade, order)
 
     return OrderExecutionResponse(order=OrderRead.model_validate(order), trade_id=trade.id)
 
 
+# Exportable tables and the column their since/until filters apply to.
+_EXPORTS: dict[str, tuple[Any, str]] = {
+    "trades": (Trade.__table__, "created_at"),
+    "orders": (Order.__table__, "created_at"),
+    "portfolio_snapshots": (PortfolioSnapshot.__table__, "timestamp"),
+}
+
+
+@router.get("/export/{dataset}")
+async def export_dataset(
+    dataset: Literal["trades", "orders", "portfolio_snapshots"],
+    fmt: ExportFormat = Query(default="ndjson", alias="format"),
+    gzip: bool = Query(default=False),
+    bot_id: int | None = Query(default=None),
+    symbol: str | None = Query(default=None),
+    status: str | None = Query(default=None),
+    since: datetime | None = Query(default=None),
+    until: datetime | None = Query(default=None),
+) -> StreamingResponse:
+    table, time_column = _EXPORTS[dataset]
+    query = filter_time_range(select(table), table.c[time_column], since, until)
+    for name, value in (("bot_id", bot_id), ("symbol", symbol), ("status", status)):
+        if value is None:
+            continue
+        if name not in table.c:
+            raise HTTPException(status_code=422, detail=f"{name} filter is not supported for {dataset}")
+        query = query.where(table.c[name] == value)
+    query = query.order_by(table.c.id)
+
+    filename = f"{dataset}.{fmt}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        stream_export(query, fmt, gzip, _settings().export_batch_rows, default=_json_default),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 app.include_router(router)
 app.include_router(router, prefix="/api")
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import base64
+import binascii
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy import RowMapping, Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# List endpoints return the newest rows first, ``limit`` at a time. When more
+# rows exist the response carries an opaque cursor in this header; pass it back
+# as ``?cursor=`` for the next page.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, _, row_id = raw.rpartition("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise HTTPException(status_code=422, detail="Invalid cursor") from exc
+
+
+def filter_time_range(query: Select[Any], column: Any, since: datetime | None, until: datetime | None) -> Select[Any]:
+    if since is not None and until is not None and until < since:
+        raise HTTPException(status_code=422, detail="until must be >= since")
+    if since is not None:
+        query = query.where(column >= since)
+    if until is not None:
+        query = query.where(column < until)
+    return query
+
+
+def read_columns(model: Any, schema: type[BaseModel]) -> list[Any]:
+    """The ``model`` table columns backing ``schema``'s fields, for a Core projection."""
+    table = model.__table__
+    return [table.c[name] for name in schema.model_fields if name in table.c]
+
+
+async def fetch_page(
+    db: AsyncSession,
+    query: Select[Any],
+    model: Any,
+    cursor: str | None,
+    limit: int,
+    response: Response,
+) -> Sequence[RowMapping]:
+    """One keyset page of rows, newest first by ``model``'s ``(created_at, id)``.
+
+    ``query`` selects columns (see ``read_columns``), which must include
+    ``created_at`` and ``id``; rows come back as mappings without ORM
+    identities. The row comparison seeks straight to the cursor position
+    through the ``created_at`` indexes, so a page costs the same however
+    deep it is.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+    query = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+    rows = (await db.execute(query)).mappings().all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    return rows
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable, Mapping
+from datetime import datetime
+from typing import Any
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        # Match pydantic's rendering of UTC timestamps.
+        return value.isoformat().replace("+00:00", "Z")
+    return str(value)
+
+
+def dumps_json(value: Any) -> bytes:
+    """Serialize straight to bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_json_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=_json_default, separators=(",", ":")).encode("utf-8")
+
+
+def dump_rows(rows: Iterable[Mapping[str, Any]]) -> bytes:
+    return dumps_json([dict(row) for row in rows])
+
+
+class RawJSONResponse(Response):
+    """JSON response for content that is already serialized (or plain JSON-able data).
+
+    Returning it from a route skips FastAPI's ``response_model`` validation, so
+    only use it for rows whose shape already matches the declared model.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return content if isinstance(content, bytes) else dumps_json(content)
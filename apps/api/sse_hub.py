@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from fnmatch import fnmatchcase
+from typing import Any, Protocol
+
+import redis.asyncio as redis
+from redis.asyncio.client import PubSub
+
+from packages.core.events import (
+    EVENTS_STREAM_KEY,
+    MARKET_TOPIC,
+    decode_events,
+    decode_topic_message,
+    event_id,
+    event_topic,
+    parse_event_id,
+    topic_pattern,
+)
+
+logger = logging.getLogger(__name__)
+
+# Events where only the newest value matters to a lagging client, keyed by the
+# field identifying what they describe. Everything else is delivered as-is.
+CONFLATE_BY: dict[str, str] = {
+    "portfolio.snapshot": "bot_id",
+    "trade.updated": "trade_id",
+    "job.progress": "job_id",
+}
+
+# (event id, event name, serialized data)
+SseEvent = tuple[str, str, str]
+
+_READ_COUNT = 500
+_SUBSCRIBE_TIMEOUT_SECONDS = 5.0
+
+
+def client_patterns(bot_id: int | None, job_id: int | None, market: bool) -> tuple[str, ...]:
+    """Topic channel patterns an SSE client with these filters listens on."""
+    patterns = (topic_pattern(bot_id, job_id),)
+    return patterns + (MARKET_TOPIC,) if market else patterns
+
+
+class HubListener(Protocol):
+    """Anything the hub routes events to: SSE clients, or in-process consumers such as caches."""
+
+    patterns: tuple[str, ...]
+
+    def offer(self, event: SseEvent, data: dict[str, Any]) -> None: ...
+
+
+class SseClient:
+    """One SSE connection's bounded queue.
+
+    Conflatable events replace the pending event with the same key; when the
+    queue is full the oldest pending event is dropped, so a slow client never
+    holds up the hub or other clients. Later event ids move past a dropped
+    event, so a resume cannot recover it: after a drop the client is sent
+    ``overflow_notice`` ahead of the next event, telling it to reload state.
+    """
+
+    def __init__(self, patterns: tuple[str, ...], max_pending: int, overflow_notice: SseEvent) -> None:
+        self.patterns = patterns
+        self.max_pending = max_pending
+        self.overflow_notice = overflow_notice
+        self._overflowed = False
+        self._pending: OrderedDict[Hashable, SseEvent] = OrderedDict()
+        self._ready = asyncio.Event()
+        self._seq = itertools.count()
+        self.delivered = 0
+        self.conflated = 0
+        self.dropped = 0
+
+    def offer(self, event: SseEvent, data: dict[str, Any]) -> None:
+        name = event[1]
+        field = CONFLATE_BY.get(name)
+        key: Hashable = (name, data.get(field)) if field and data.get(field) is not None else next(self._seq)
+        if key in self._pending:
+            del self._pending[key]
+            self.conflated += 1
+        elif len(self._pending) >= self.max_pending:
+            self._pending.popitem(last=False)
+            self.dropped += 1
+            self._overflowed = True
+        self._pending[key] = event
+        self._ready.set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def get(self) -> SseEvent:
+        while not self._pending:
+            self._ready.clear()
+            await self._ready.wait()
+        if self._overflowed:
+            self._overflowed = False
+            return self.overflow_notice
+        self.delivered += 1
+        return self._pending.popitem(last=False)[1]
+
+
+class SseHub:
+    """Fans topic channels out to SSE clients from one pub/sub connection per process.
+
+    The hub pattern-subscribes only to the topics its connected clients ask
+    for, so Redis filters server-side and a process receives nothing for bots
+    nobody is watching. Each topic message is decoded once and each event
+    serialized once per pattern, then offered to that pattern's clients.
+    Replay reads the event stream, since pub/sub keeps no history.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], redis.Redis],
+        serialize: Callable[[dict[str, Any]], str],
+        max_pending: int,
+        max_replay: int,
+        stream_key: str = EVENTS_STREAM_KEY,
+    ) -> None:
+        self._client_factory = client_factory
+        self._serialize = serialize
+        self.max_pending = max_pending
+        self.max_replay = max_replay
+        self.stream_key = stream_key
+        # Clients indexed by channel pattern; a client appears under each of its patterns.
+        self._clients: dict[str, set[HubListener]] = {}
+        self._pubsub: PubSub | None = None
+        self._subscribed: set[str] = set()
+        self._confirmed: dict[str, asyncio.Event] = {}
+        self._sync_lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+        self._events = 0
+        self._routed = 0
+        self._reconnects = 0
+        self._replays = 0
+        self._replayed = 0
+        self._overflow_notice: SseEvent = (
+            "",
+            "system.notice",
+            serialize({"message": "Events dropped for a slow client; reload state", "resync": True}),
+        )
+
+    async def subscribe(self, bot_id: int | None, job_id: int | None, market: bool = False) -> SseClient:
+        client = SseClient(client_patterns(bot_id, job_id, market), self.max_pending, self._overflow_notice)
+        await self.attach(client)
+        return client
+
+    async def attach(self, client: HubListener) -> None:
+        """Register a listener and wait until Redis confirms its patterns, so a replay that follows leaves no gap."""
+        for pattern in client.patterns:
+            self._clients.setdefault(pattern, set()).add(client)
+            self._confirmed.setdefault(pattern, asyncio.Event())
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="sse-hub")
+        await self._sync_patterns()
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(self._confirmed[pattern].wait() for pattern in client.patterns)),
+                timeout=_SUBSCRIBE_TIMEOUT_SECONDS,
+            )
+        except asyncio.TimeoutError:
+            logger.warning("SSE hub subscription to %s not confirmed yet", ", ".join(client.patterns))
+
+    def unsubscribe(self, client: HubListener) -> None:
+        released = False
+        for pattern in client.patterns:
+            clients = self._clients.get(pattern)
+            if clients is None:
+                continue
+            clients.discard(client)
+            if not clients:
+                del self._clients[pattern]
+                self._confirmed.pop(pattern, None)
+                released = True
+        if released and self._pubsub is not None:
+            asyncio.create_task(self._sync_patterns(), name="sse-hub-unsubscribe")
+
+    async def _sync_patterns(self) -> None:
+        """Bring the Redis pattern subscriptions in line with the connected clients."""
+        async with self._sync_lock:
+            pubsub = self._pubsub
+            if pubsub is None:
+                return
+            wanted = set(self._clients)
+            added = sorted(wanted - self._subscribed)
+            removed = sorted(self._subscribed - wanted)
+            try:
+                if added:
+                    await pubsub.psubscribe(*added)
+                if removed:
+                    await pubsub.punsubscribe(*removed)
+            except Exception as exc:  # pragma: no cover - runtime dependent
+                # The reader notices the broken connection and resubscribes everything.
+                logger.warning("SSE hub subscription update failed: %s", exc)
+                return
+            self._subscribed = wanted
+
+    def _route(self, pattern: str, raw: str | bytes | None) -> None:
+        clients = self._clients.get(pattern)
+        if not clients:
+            return
+        entry_id, events = decode_topic_message(raw)
+        for index, name, data in events:
+            self._events += 1
+            event = (event_id(entry_id, index), name, self._serialize(data))
+            for client in clients:
+                client.offer(event, data)
+                self._routed += 1
+
+    def _notify_resync(self) -> None:
+        """Pub/sub keeps no backlog: tell clients what they may have missed across a reconnect."""
+        data = {"message": "Event stream reconnected; reload state", "resync": True}
+        event: SseEvent = ("", "system.notice", self._serialize(data))
+        notified: set[HubListener] = set()
+        for clients in self._clients.values():
+            for client in clients - notified:
+                client.offer(event, data)
+                notified.add(client)
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        connected_before = False
+        while True:
+            pubsub = self._client_factory().pubsub()
+            try:
+                await pubsub.connect()
+                async with self._sync_lock:
+                    self._pubsub = pubsub
+                    self._subscribed = set()
+                    for confirmed in self._confirmed.values():
+                        confirmed.clear()
+                await self._sync_patterns()
+                if connected_before:
+                    self._notify_resync()
+                connected_before = True
+                backoff = 1.0
+                while True:
+                    message = await pubsub.get_message(timeout=None)
+                    if message is None:
+                        continue
+                    if message["type"] == "pmessage":
+                        self._route(message["pattern"], message["data"])
+                    elif message["type"] == "psubscribe":
+                        confirmed = self._confirmed.get(message["channel"])
+                        if confirmed is not None:
+                            confirmed.set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # pragma: no cover - runtime dependent
+                self._reconnects += 1
+                logger.warning("SSE hub pub/sub failed, reconnecting in %.0fs: %s", backoff, exc)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                self._pubsub = None
+                await pubsub.aclose()
+
+    async def replay(self, last_event_id: str, patterns: tuple[str, ...]) -> tuple[list[SseEvent], bool]:
+        """Events after ``last_event_id`` on the given topic patterns, oldest first.
+
+        The flag is False when the replay cannot be complete: the id is
+        malformed, older than the stream's trimmed head, or more than
+        ``max_replay`` entries behind.
+        """
+        after = parse_event_id(last_event_id)
+        if after is None:
+            return [], False
+        self._replays += 1
+
+        client = self._client_factory()
+        head = await client.xrange(self.stream_key, count=1)
+        complete = not head or parse_event_id(head[0][0]) <= (after[0], after[1], 0)
+
+        events: list[SseEvent] = []
+        start = f"{after[0]}-{after[1]}"
+        scanned = 0
+        while scanned < self.max_replay:
+            entries = await client.xrange(self.stream_key, min=start, count=min(_READ_COUNT, self.max_replay - scanned))
+            if not entries:
+                break
+            for entry_id, fields in entries:
+                scanned += 1
+                for index, (name, data) in enumerate(decode_events(fields.get("data"))):
+                    key = event_id(entry_id, index)
+                    if parse_event_id(key) <= after:
+                        continue
+                    topic = event_topic(name, data)
+                    if not any(fnmatchcase(topic, pattern) for pattern in patterns):
+                        continue
+                    events.append((key, name, self._serialize(data)))
+            start = f"({entries[-1][0]}"
+        else:
+            complete = False
+
+        self._replayed += len(events)
+        return events, complete
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict[str, Any]:
+        listeners = {client for group in self._clients.values() for client in group}
+        clients = [client for client in listeners if isinstance(client, SseClient)]
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "clients": len(clients),
+            "listeners": len(listeners) - len(clients),
+            "patterns": len(self._subscribed),
+            "events": self._events,
+            "routed": self._routed,
+            "pending": sum(client.pending for client in clients),
+            "conflated": sum(client.conflated for client in clients),
+            "dropped": sum(client.dropped for client in clients),
+            "replays": self._replays,
+            "replayed": self._replayed,
+            "reconnects": self._reconnects,
+        }
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import Select, select, text, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.api.pagination import read_columns
+from packages.core.models import Bot, Job, Order, PortfolioSnapshot, Trade
+from packages.core.schemas import BotRead, JobRead, OrderRead, PortfolioSnapshotRead, TradeRead
+
+# Rows per dataset in one ``GET /sync`` response.
+SYNC_DEFAULT_ROWS = 1000
+SYNC_MAX_ROWS = 5000
+
+SYNC_DATASETS: dict[str, tuple[Any, type[BaseModel]]] = {
+    "bots": (Bot, BotRead),
+    "trades": (Trade, TradeRead),
+    "orders": (Order, OrderRead),
+    "jobs": (Job, JobRead),
+}
+
+# Every transaction with an id below the snapshot's xmin has finished, so no
+# row can still appear with a ``change_seq`` under it.
+_WATERMARK = text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+
+def decode_sync_cursor(cursor: str | None) -> int:
+    if not cursor:
+        return 0
+    try:
+        value = int(cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail="Invalid sync cursor") from exc
+    if value < 0:
+        raise HTTPException(status_code=422, detail="Invalid sync cursor")
+    return value
+
+
+def sync_datasets(include: list[str] | None) -> set[str]:
+    names = {*SYNC_DATASETS, "snapshots"}
+    if not include:
+        return names
+    unknown = set(include) - names
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown sync datasets: {', '.join(sorted(unknown))}")
+    return set(include)
+
+
+def _latest_snapshots_query(since: int) -> Select[Any]:
+    latest = (
+        select(*read_columns(PortfolioSnapshot, PortfolioSnapshotRead), PortfolioSnapshot.change_seq)
+        .where(PortfolioSnapshot.bot_id == Bot.id)
+        .order_by(PortfolioSnapshot.timestamp.desc())
+        .limit(1)
+        .lateral("latest")
+    )
+    columns = [column for column in latest.c if column.name != "change_seq"]
+    return select(*columns).select_from(Bot).join(latest, true()).where(latest.c.change_seq >= since)
+
+
+async def _changed_rows(
+    db: AsyncSession,
+    model: Any,
+    schema: type[BaseModel],
+    since: int,
+    limit: int,
+) -> tuple[list[dict[str, Any]], int | None]:
+    """Rows of ``model`` changed at or after ``since``, oldest change first.
+
+    Returns the rows and, when ``limit`` cut the result short, the sequence
+    the next sync has to resume from. Rows are only cut between transactions,
+    so a resume never skips part of one.
+    """
+    query = (
+        select(*read_columns(model, schema), model.change_seq)
+        .where(model.change_seq >= since)
+        .order_by(model.change_seq, model.id)
+        .limit(limit + 1)
+    )
+    rows = [dict(row) for row in (await db.execute(query)).mappings()]
+    resume: int | None = None
+    if len(rows) > limit:
+        resume = rows[limit]["change_seq"]
+        rows = [row for row in rows[:limit] if row["change_seq"] < resume]
+        if not rows:
+            # One transaction wrote more than ``limit`` rows: send all of them.
+            whole = select(*read_columns(model, schema), model.change_seq).where(model.change_seq == resume)
+            rows = [dict(row) for row in (await db.execute(whole.order_by(model.id))).mappings()]
+            resume += 1
+    for row in rows:
+        del row["change_seq"]
+    return rows, resume
+
+
+async def fetch_changes(db: AsyncSession, since: int, limit: int, datasets: set[str]) -> dict[str, Any]:
+    """Everything created or changed since the ``since`` cursor, plus the cursor to pass next time.
+
+    The new cursor is the oldest transaction that could still commit, so rows
+    written by transactions in flight during this read are picked up by the
+    next sync; rows near the cursor may therefore arrive twice, and clients
+    upsert by ``id``.
+    """
+    cursor = (await db.execute(_WATERMARK)).scalar_one()
+    has_more = False
+    changes: dict[str, Any] = {}
+    for name, (model, schema) in SYNC_DATASETS.items():
+        if name not in datasets:
+            changes[name] = []
+            continue
+        rows, resume = await _changed_rows(db, model, schema, since, limit)
+        changes[name] = rows
+        if resume is not None:
+            cursor = min(cursor, resume)
+            has_more = True
+    changes["snapshots"] = (
+        (await db.execute(_latest_snapshots_query(since))).mappings().all() if "snapshots" in datasets else []
+    )
+    return {"cursor": str(cursor), "has_more": has_more, **changes}
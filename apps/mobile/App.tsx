@@ -1,6 +1,7 @@
-import { useCallback, useEffect, useMemo, useState } from "react";
+import { useCallback, useEffect, useMemo, useRef, useState } from "react";
 import {
   Alert,
+  AppState,
   Pressable,
   SafeAreaView,
   ScrollView,
@@ -21,6 +22,12 @@ type Trade = {
   status: string;
 };
 
+type SyncResponse = {
+  cursor: string;
+  has_more: boolean;
+  trades: Trade[];
+};
+
 const API_BASE = (process.env.EXPO_PUBLIC_API_BASE_URL ?? "http://127.0.0.1:8000").replace(/\/$/, "");
 
 async function requestJson(path: string, init?: RequestInit) {
@@ -41,8 +48,7 @@ async function requestJson(path: string, init?: RequestInit) {
 }
 
 export default function App() {
-  const [openTrades, setOpenTrades] = useState<Trade[]>([]);
-  const [closedTrades, setClosedTrades] = useState<Trade[]>([]);
+  const [trades, setTrades] = useState<Map<number, Trade>>(new Map());
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [botId, setBotId] = useState("");
@@ -51,16 +57,28 @@ export default function App() {
   const [closingTradeId, setClosingTradeId] = useState("");
   const [submitting, setSubmitting] = useState(false);
 
+  // Delta sync: only trades changed since the last cursor are downloaded.
+  const cursor = useRef<string | null>(null);
+
   const refreshTrades = useCallback(async () => {
     setLoading(true);
     setError(null);
     try {
-      const [openRows, closedRows] = await Promise.all([
-        requestJson("/api/trades?status=open"),
-        requestJson("/api/trades?status=closed"),
-      ]);
-      setOpenTrades(Array.isArray(openRows) ? openRows : []);
-      setClosedTrades(Array.isArray(closedRows) ? closedRows : []);
+      const changed: Trade[] = [];
+      let page: SyncResponse;
+      do {
+        const since = cursor.current ? `&since=${encodeURIComponent(cursor.current)}` : "";
+        page = (await requestJson(`/api/sync?include=trades${since}`)) as SyncResponse;
+        changed.push(...page.trades);
+        cursor.current = page.cursor;
+      } while (page.has_more);
+      if (changed.length) {
+        setTrades((previous) => {
+          const next = new Map(previous);
+          changed.forEach((trade) => next.set(trade.id, trade));
+          return next;
+        });
+      }
     } catch (err) {
       setError(err instanceof Error ? err.message : "Failed to load trades");
     } finally {
@@ -70,8 +88,23 @@ export default function App() {
 
   useEffect(() => {
     void refreshTrades();
+    const subscription = AppState.addEventListener("change", (state) => {
+      if (state === "active") {
+        void refreshTrades();
+      }
+    });
+    return () => subscription.remove();
   }, [refreshTrades]);
 
+  const openTrades = useMemo(
+    () => [...trades.values()].filter((trade) => trade.status === "open").sort((a, b) => b.id - a.id),
+    [trades],
+  );
+  const closedTrades = useMemo(
+    () => [...trades.values()].filter((trade) => trade.status === "closed").sort((a, b) => b.id - a.id),
+    [trades],
+  );
+
   const openTradeIds = useMemo(() => openTrades.map((trade) => trade.id), [openTrades]);
 
   const placeBuyOrder = () => {
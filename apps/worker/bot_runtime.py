@@ -0,0 +1,860 @@
+"""Bot runtime: drives every running bot of a shard from one asyncio scheduler.
+
+Run with ``python -m apps.worker.bot_runtime``. Each bot gets a lightweight
+driver coroutine that wakes on an absolute deadline (so ticks do not drift by
+their own duration) and runs the blocking tick in a small thread pool. The API
+starts and stops bots through ``bots:control`` messages; a periodic reconcile
+against the ``bots`` table repairs anything a lost message or restart missed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import random
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+import redis
+import redis.asyncio as aioredis
+from sqlalchemy import or_, select, update
+
+from apps.worker.celery_app import (
+    _event_buffer,
+    _find_or_create_job,
+    _load_last_prices,
+    _publish_event,
+    _resolve_fee_rate,
+    _settings,
+    _store_job_state,
+    _utc_now,
+    redis_client,
+)
+from packages.core.bot_control import BOT_CONTROL_CHANNEL, decode_control, owns_bot
+from packages.core.candles import next_candle_close
+from packages.core.database import SessionLocal, count_statements
+from packages.core.job_state import ACTIVE_JOB_STATUSES
+from packages.core.marks import (
+    LivePortfolio,
+    MarkedTrade,
+    OpenPosition,
+    decode_live_mark,
+    live_mark_key,
+    live_marks_bot_key,
+    mark_open_trades,
+    read_open_positions,
+    store_live_marks,
+    store_live_portfolio,
+)
+from packages.core.models import Bot, BotLedger, Job, PortfolioSnapshot, Trade
+
+BOT_LOOP_TASK = "bot_run_loop"
+# Candle-close ticks fire this long after the close, so the ticker has moved past it.
+_CANDLE_CLOSE_GRACE_SECONDS = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class _BotConfig:
+    """What a tick needs from the ``bots`` row, cached between control messages."""
+
+    symbols: tuple[str, ...]
+    fee_rate: float
+    timeframe: str
+
+
+@dataclass
+class _BotSlot:
+    bot_id: int
+    job_id: int | None = None
+    iteration: int = 0
+    wake: asyncio.Event = field(default_factory=asyncio.Event)
+    task: asyncio.Task[None] | None = None
+    # None makes the next tick reload the row; bumped on every invalidation so
+    # a tick already in flight cannot store a config read before it.
+    config: _BotConfig | None = None
+    config_version: int = 0
+    # A start seen while the slot existed; honored if the slot turns out to be winding down.
+    start_pending: bool = False
+    pending_job_id: int | None = None
+
+    def invalidate(self) -> None:
+        self.config = None
+        self.config_version += 1
+
+
+def _begin_bot(bot_id: int, job_id: int | None) -> int | None:
+    """Claim the bot's loop job; returns None when the bot should not run."""
+    with SessionLocal() as session:
+        bot = session.get(Bot, bot_id)
+        if not bot:
+            _publish_event(
+                "system.notice",
+                {
+                    "bot_id": bot_id,
+                    "message": "bot runtime received unknown bot_id",
+                    "ts": _utc_now().isoformat(),
+                },
+            )
+            return None
+        if bot.status != "running" or bot.stop_requested:
+            return None
+
+        job = session.get(Job, job_id) if job_id else None
+        if job is None or job.task != BOT_LOOP_TASK or job.status not in ("queued", "running"):
+            job = _find_or_create_job(session, bot_id, BOT_LOOP_TASK, None)
+        job.status = "running"
+        job.progress = 0
+        job.message = "Runtime loop started"
+        job_id = job.id
+
+        session.commit()
+    _store_job_state(job_id, "running", 0, "Runtime loop started")
+
+    _publish_event(
+        "bot.state",
+        {"bot_id": bot_id, "status": "running", "job_id": job_id, "ts": _utc_now().isoformat()},
+    )
+    return job_id
+
+
+def _live_marks_ttl() -> int:
+    settings = _settings()
+    if settings.bot_schedule == "candle":
+        # Candle closes checkpoint Postgres; Redis only has to outlive the mark cadence.
+        return max(60, math.ceil(settings.bot_mark_interval_seconds * 2))
+    return max(60, math.ceil(settings.bot_loop_interval_seconds * settings.mark_checkpoint_ticks * 2))
+
+
+def _store_live_marks(bot_id: int, marked: list[MarkedTrade], portfolio: LivePortfolio) -> bool:
+    try:
+        with redis_client.pipeline(transaction=False) as pipe:
+            store_live_marks(pipe, bot_id, marked, portfolio.marked_at, _live_marks_ttl())
+            store_live_portfolio(pipe, portfolio, _live_marks_ttl())
+            pipe.execute()
+    except redis.RedisError as exc:
+        logger.warning("Storing live marks of bot %s failed: %s", bot_id, exc)
+        return False
+    return True
+
+
+def _checkpoint_live_marks(session: Any, bot_id: int) -> None:
+    """Write the bot's live marks to its open trades, so a stopped bot leaves Postgres current."""
+    try:
+        trade_ids = [int(trade_id) for trade_id in redis_client.smembers(live_marks_bot_key(bot_id))]
+        with redis_client.pipeline(transaction=False) as pipe:
+            for trade_id in trade_ids:
+                pipe.hgetall(live_mark_key(trade_id))
+            raw_marks = pipe.execute()
+    except redis.RedisError as exc:
+        logger.warning("Loading live marks of bot %s failed: %s", bot_id, exc)
+        return
+    marks = [decode_live_mark(trade_id, raw) for trade_id, raw in zip(trade_ids, raw_marks)]
+    mark_open_trades(session, {mark.symbol: mark.price for mark in marks if mark}, bot_ids=[bot_id])
+
+
+def _finish_bot(session: Any, bot: Bot, job_id: int | None) -> None:
+    """Complete the loop of a stopped bot, unless a start has set it running since its row was read."""
+    bot_id = bot.id
+    _checkpoint_live_marks(session, bot_id)
+    # Conditional on the committed row: a start racing this stop keeps its loop job.
+    stopped = session.execute(
+        update(Bot)
+        .where(Bot.id == bot_id, or_(Bot.status != "running", Bot.stop_requested.is_(True)))
+        .values(status="stopped", stop_requested=False)
+    ).rowcount
+    if not stopped:
+        session.commit()
+        return
+    if job_id:
+        session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status.in_(ACTIVE_JOB_STATUSES))
+            .values(status="completed", progress=100, message="Bot loop stopped")
+        )
+    session.commit()
+
+    _publish_event(
+        "bot.state",
+        {"bot_id": bot_id, "status": "stopped", "job_id": job_id, "ts": _utc_now().isoformat()},
+    )
+    if job_id:
+        _publish_event(
+            "job.progress",
+            {
+                "bot_id": bot_id,
+                "job_id": job_id,
+                "status": "completed",
+                "progress": 100,
+                "ts": _utc_now().isoformat(),
+            },
+        )
+
+
+def _note_job(session: Any, job_id: int | None, progress: int, message: str, checkpoint: bool = False) -> None:
+    """Record a running loop job's progress in Redis; the row is written on ``checkpoint`` or without Redis."""
+    if not job_id:
+        return
+    if not _store_job_state(job_id, "running", progress, message) or checkpoint:
+        session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status.in_(ACTIVE_JOB_STATUSES))
+            .values(status="running", progress=progress, message=message)
+        )
+
+
+def _load_bot_config(session: Any, bot_id: int, job_id: int | None) -> _BotConfig | None:
+    """Re-read the bot row; finalizes the loop and returns None when the bot is gone or stopped."""
+    bot = session.get(Bot, bot_id)
+
+    if not bot:
+        job = session.get(Job, job_id) if job_id else None
+        if job:
+            job.status = "failed"
+            job.message = "Bot deleted while running"
+            session.commit()
+        _publish_event(
+            "system.notice",
+            {
+                "bot_id": bot_id,
+                "job_id": job_id,
+                "message": "Bot deleted while loop was active",
+                "ts": _utc_now().isoformat(),
+            },
+        )
+        return None
+
+    if bot.status != "running" or bot.stop_requested:
+        _finish_bot(session, bot, job_id)
+        return None
+
+    symbols = tuple(symbol for symbol in (bot.symbols or []) if isinstance(symbol, str) and symbol.strip())
+    return _BotConfig(symbols=symbols, fee_rate=_resolve_fee_rate(bot), timeframe=bot.timeframe)
+
+
+def _read_book(session: Any, bot_id: int) -> tuple[BotLedger | None, list[OpenPosition]]:
+    """The bot's ledger and open trades, read together and before any ticker fetch."""
+    ledger = session.get(BotLedger, bot_id)
+    positions = read_open_positions(session, [bot_id])
+    # End the read transaction; the ticker fetch may go to the exchange.
+    session.commit()
+    return ledger, positions
+
+
+def _ledger_cash(ledger: BotLedger | None) -> float:
+    realized_closed = float(ledger.realized_pnl_quote) if ledger else 0.0
+    open_locked_cost = float(ledger.open_locked_cost_quote) if ledger else 0.0
+    return float(_settings().paper_starting_cash + realized_closed - open_locked_cost)
+
+
+def _book_symbols(config: _BotConfig, positions: list[OpenPosition]) -> list[str]:
+    # Trades opened through POST /orders may be on symbols the bot does not list.
+    return sorted({*config.symbols, *(position.symbol for position in positions)})
+
+
+def _carried_value(positions: list[OpenPosition]) -> float:
+    """Value of open trades that got no price this tick: their live mark, else the last checkpoint."""
+    if not positions:
+        return 0.0
+    try:
+        with redis_client.pipeline(transaction=False) as pipe:
+            for position in positions:
+                pipe.hgetall(live_mark_key(position.trade_id))
+            raw_marks = pipe.execute()
+    except redis.RedisError:
+        raw_marks = [None] * len(positions)
+    value = 0.0
+    for position, raw in zip(positions, raw_marks):
+        live = decode_live_mark(position.trade_id, raw)
+        value += position.amount * live.price if live else position.checkpointed_value
+    return value
+
+
+def _mark_trades(
+    session: Any,
+    bot_id: int,
+    positions: list[OpenPosition],
+    last_prices: dict[str, float],
+    checkpoint: bool,
+    cash: float,
+) -> tuple[list[dict[str, Any]], LivePortfolio]:
+    """Mark the open trades (into Postgres on ``checkpoint``); returns their events and the live portfolio.
+
+    The marks and the bot's equity at them go to Redis in one round trip, so
+    reads between snapshots can show current values.
+    """
+    marked = sorted(
+        (position.mark(last_prices[position.symbol]) for position in positions if position.symbol in last_prices),
+        key=lambda row: row.trade_id,
+    )
+    if checkpoint:
+        mark_open_trades(session, last_prices, bot_ids=[bot_id])
+    marked_at = _utc_now()
+    # Cash has every open trade's cost taken out, so every open trade is valued.
+    unpriced = [position for position in positions if position.symbol not in last_prices]
+    positions_value = float(sum(row.mark_value for row in marked) + _carried_value(unpriced))
+    portfolio = LivePortfolio(
+        bot_id=bot_id,
+        equity=cash + positions_value,
+        cash=cash,
+        positions_value=positions_value,
+        marked_at=marked_at,
+    )
+    if not _store_live_marks(bot_id, marked, portfolio) and not checkpoint:
+        # Without Redis the read path only sees Postgres, so keep it current.
+        mark_open_trades(session, last_prices, bot_ids=[bot_id])
+    trade_updates = [
+        {
+            "bot_id": bot_id,
+            "trade_id": row.trade_id,
+            "symbol": row.symbol,
+            "price": row.price,
+            "unrealized_pnl_quote": row.unrealized_pnl_quote,
+            "ts": marked_at.isoformat(),
+        }
+        for row in marked
+    ]
+    return trade_updates, portfolio
+
+
+def _tick_bot(
+    bot_id: int,
+    job_id: int | None,
+    iteration: int,
+    config: _BotConfig | None,
+    candle_close: bool = False,
+) -> tuple[bool, _BotConfig | None]:
+    """Run one mark-to-market iteration as a single unit of work.
+
+    ``config`` is the cached bot row; when None it is reloaded first. A steady
+    tick then runs three statements: the ledger and open-trade reads in one
+    transaction before the ticker fetch, and the snapshot insert (plus the job
+    row update on job checkpoint ticks) in one after it. Marks reach Postgres through the runtime's shard-wide
+    checkpoint; candle-close ticks are rare enough to write their own. Returns
+    whether the bot keeps running and the config to cache for the next tick.
+    """
+    with SessionLocal() as session:
+        if config is None:
+            config = _load_bot_config(session, bot_id, job_id)
+            if config is None:
+                return False, None
+        progress = min(99, iteration)
+
+        if not config.symbols:
+            _note_job(session, job_id, progress, "Bot has no symbols configured")
+            session.commit()
+            _publish_event(
+                "system.notice",
+                {
+                    "bot_id": bot_id,
+                    "job_id": job_id,
+                    "message": "Bot has no symbols configured",
+                    "ts": _utc_now().isoformat(),
+                },
+            )
+            return True, config
+
+        ledger, positions = _read_book(session, bot_id)
+        try:
+            last_prices = _load_last_prices(_book_symbols(config, positions))
+        except Exception as exc:
+            _note_job(session, job_id, progress, f"Ticker fetch error: {exc}")
+            session.commit()
+            _publish_event(
+                "system.notice",
+                {
+                    "bot_id": bot_id,
+                    "job_id": job_id,
+                    "message": f"Ticker fetch error: {exc}",
+                    "ts": _utc_now().isoformat(),
+                },
+            )
+            return True, config
+
+        # Marks live in Redis; open trades are written back by the shard-wide
+        # checkpoint (and when the bot stops).
+        cash = _ledger_cash(ledger)
+        trade_updates, portfolio = _mark_trades(
+            session, bot_id, positions, last_prices, checkpoint=candle_close, cash=cash
+        )
+        equity = portfolio.equity
+        positions_value = portfolio.positions_value
+        snapshot_ts = portfolio.marked_at
+        session.add(
+            PortfolioSnapshot(
+                bot_id=bot_id,
+                equity=equity,
+                cash=cash,
+                positions_value=positions_value,
+                timestamp=snapshot_ts,
+            )
+        )
+
+        _note_job(
+            session,
+            job_id,
+            progress,
+            f"Loop iteration {iteration}",
+            checkpoint=candle_close or iteration % _settings().job_checkpoint_ticks == 0,
+        )
+        session.commit()
+
+    # One bus message per tick instead of one PUBLISH per open trade.
+    with _event_buffer() as events:
+        for trade_update in trade_updates:
+            events.add("trade.updated", trade_update)
+
+        events.add(
+            "portfolio.snapshot",
+            {
+                "bot_id": bot_id,
+                "equity": equity,
+                "cash": cash,
+                "positions_value": positions_value,
+                "ts": snapshot_ts.isoformat(),
+                "prices": last_prices,
+                "fee_rate": config.fee_rate,
+            },
+        )
+
+        if job_id and (iteration == 1 or iteration % 3 == 0):
+            events.add(
+                "job.progress",
+                {
+                    "bot_id": bot_id,
+                    "job_id": job_id,
+                    "status": "running",
+                    "progress": progress,
+                    "ts": _utc_now().isoformat(),
+                },
+            )
+    return True, config
+
+
+def _mark_bot(bot_id: int, job_id: int | None, config: _BotConfig | None) -> tuple[bool, _BotConfig | None]:
+    """Intra-candle tick: refresh live marks and the live portfolio, and emit ``trade.updated`` only.
+
+    The ledger and open-trade reads, no snapshot and no job write; reloads ``config``
+    first when it was dropped, which is how a woken bot applies a stop
+    between candle closes.
+    """
+    with SessionLocal() as session:
+        if config is None:
+            config = _load_bot_config(session, bot_id, job_id)
+            if config is None:
+                return False, None
+            session.commit()
+        if not config.symbols:
+            return True, config
+        ledger, positions = _read_book(session, bot_id)
+        try:
+            last_prices = _load_last_prices(_book_symbols(config, positions))
+        except Exception as exc:
+            # The next candle-close tick reports ticker errors.
+            logger.debug("Mark tick of bot %s skipped: %s", bot_id, exc)
+            return True, config
+        trade_updates, _ = _mark_trades(
+            session, bot_id, positions, last_prices, checkpoint=False, cash=_ledger_cash(ledger)
+        )
+        session.commit()
+
+    with _event_buffer() as events:
+        for trade_update in trade_updates:
+            events.add("trade.updated", trade_update)
+    return True, config
+
+
+def _fail_bot(bot_id: int, job_id: int | None, exc: Exception) -> None:
+    with SessionLocal() as session:
+        bot = session.get(Bot, bot_id)
+        if bot:
+            _checkpoint_live_marks(session, bot_id)
+            bot.status = "stopped"
+            bot.stop_requested = False
+
+        job = session.get(Job, job_id) if job_id else None
+        if job:
+            job.status = "failed"
+            job.message = str(exc)
+
+        session.commit()
+
+    _publish_event(
+        "bot.state",
+        {"bot_id": bot_id, "status": "stopped", "job_id": job_id, "ts": _utc_now().isoformat()},
+    )
+    _publish_event(
+        "system.notice",
+        {
+            "bot_id": bot_id,
+            "job_id": job_id,
+            "message": f"bot loop failed: {exc}",
+            "ts": _utc_now().isoformat(),
+        },
+    )
+
+
+def _checkpoint_marks(bot_ids: list[int], symbols: list[str]) -> int:
+    """Write marks for the open trades of ``bot_ids`` in one UPDATE over one shared price fetch."""
+    with SessionLocal() as session:
+        held = session.execute(
+            select(Trade.symbol).where(Trade.bot_id.in_(bot_ids), Trade.status == "open").distinct()
+        ).scalars()
+        symbols = sorted({*symbols, *held})
+        session.commit()
+        last_prices = _load_last_prices(symbols)
+        marked = mark_open_trades(session, last_prices, bot_ids=bot_ids)
+        session.commit()
+    return len(marked)
+
+
+def _load_running_bots(shard_index: int, shard_count: int) -> set[int]:
+    """Running bots of this shard; also closes loop jobs left open for stopped bots."""
+    with SessionLocal() as session:
+        running = {
+            bot_id
+            for bot_id in session.execute(
+                select(Bot.id).where(Bot.status == "running", Bot.stop_requested.is_(False))
+            ).scalars()
+            if owns_bot(bot_id, shard_index, shard_count)
+        }
+        orphaned = (
+            session.execute(
+                select(Job).where(Job.task == BOT_LOOP_TASK, Job.status.in_(["queued", "running"]))
+            )
+            .scalars()
+            .all()
+        )
+        for job in orphaned:
+            if job.bot_id is None or job.bot_id in running or not owns_bot(job.bot_id, shard_index, shard_count):
+                continue
+            bot = session.get(Bot, job.bot_id)
+            if bot is not None and bot.status == "running" and not bot.stop_requested:
+                continue
+            if bot is not None:
+                bot.stop_requested = False
+            job.status = "completed"
+            job.progress = 100
+            job.message = "Bot loop stopped"
+        session.commit()
+    return running
+
+
+def _counted(fn: Any, *args: Any) -> tuple[Any, int]:
+    """``fn(*args)`` plus the number of SQL statements it ran, counted on the tick's thread."""
+    with count_statements() as counter:
+        result = fn(*args)
+    return result, counter.statements
+
+
+class BotRuntime:
+    def __init__(
+        self,
+        interval_seconds: float,
+        threads: int,
+        reconcile_seconds: float,
+        shard_index: int = 0,
+        shard_count: int = 1,
+        schedule: str = "interval",
+        mark_interval_seconds: float = 0.0,
+    ) -> None:
+        self.interval_seconds = max(float(interval_seconds), 1.0)
+        self.schedule = schedule
+        # 0 disables mark-only ticks between candle closes.
+        self.mark_interval_seconds = max(float(mark_interval_seconds), 1.0) if mark_interval_seconds else 0.0
+        self.reconcile_seconds = float(reconcile_seconds)
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="bot-tick")
+        self._slots: dict[int, _BotSlot] = {}
+
+        self._ticks = 0
+        self._mark_ticks = 0
+        self._statements = 0
+        self._max_tick_statements = 0
+        self._mark_checkpoints = 0
+        self._overruns = 0
+        self._max_lag = 0.0
+
+    def owns(self, bot_id: int) -> bool:
+        return owns_bot(bot_id, self.shard_index, self.shard_count)
+
+    def register(self, bot_id: int, job_id: int | None = None) -> None:
+        if not self.owns(bot_id):
+            return
+        slot = self._slots.get(bot_id)
+        if slot is not None:
+            # Already driven; a start for a newer job only refreshes its state. If
+            # the wake finds the slot already stopping, _drive registers the bot again.
+            slot.start_pending = True
+            slot.pending_job_id = job_id
+            self.wake(bot_id)
+            return
+        slot = _BotSlot(bot_id=bot_id, job_id=job_id)
+        slot.task = asyncio.create_task(self._drive(slot), name=f"bot-{bot_id}")
+        self._slots[bot_id] = slot
+
+    def wake(self, bot_id: int) -> None:
+        """Reload the bot row and tick now; a stopped bot finalizes its job on that tick and unregisters."""
+        slot = self._slots.get(bot_id)
+        if slot is not None:
+            slot.invalidate()
+            slot.wake.set()
+
+    def refresh(self, bot_id: int) -> None:
+        """Reload the bot row on the next regular tick."""
+        slot = self._slots.get(bot_id)
+        if slot is not None:
+            slot.invalidate()
+
+    async def _run_blocking(self, fn: Any, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _drive(self, slot: _BotSlot) -> None:
+        try:
+            slot.job_id = await self._run_blocking(_begin_bot, slot.bot_id, slot.job_id)
+            if slot.job_id is None:
+                return
+            if self.schedule == "candle":
+                await self._drive_candles(slot)
+            else:
+                await self._drive_interval(slot)
+        finally:
+            if self._slots.get(slot.bot_id) is slot:
+                del self._slots[slot.bot_id]
+        # A start that arrived while the last tick was stopping the bot; _begin_bot re-reads the row.
+        if slot.start_pending:
+            self.register(slot.bot_id, slot.pending_job_id)
+
+    async def _drive_interval(self, slot: _BotSlot) -> None:
+        loop = asyncio.get_running_loop()
+        interval = self.interval_seconds
+        # Spread bots over the interval so their ticks do not all land at once.
+        deadline = loop.time() + random.uniform(0.0, interval)
+        while True:
+            await self._sleep_until(slot, deadline)
+            slot.iteration += 1
+            self._ticks += 1
+            if await self._run_tick(slot, _tick_bot, slot.bot_id, slot.job_id, slot.iteration, slot.config) is None:
+                return
+            deadline = self._next_on_grid(deadline, interval)
+
+    async def _drive_candles(self, slot: _BotSlot) -> None:
+        """Full ticks on the bot's candle closes, mark-only ticks in between.
+
+        The first full tick runs right away so a started bot has a snapshot.
+        A wake between closes runs a mark tick, which reloads the config and
+        so applies a stop immediately.
+        """
+        loop = asyncio.get_running_loop()
+        mark_interval = self.mark_interval_seconds
+        next_mark = loop.time() + random.uniform(0.0, mark_interval) if mark_interval else math.inf
+        close_at = loop.time()
+        while True:
+            await self._sleep_until(slot, min(close_at, next_mark))
+            now = loop.time()
+            if now >= close_at:
+                slot.iteration += 1
+                self._ticks += 1
+                config = await self._run_tick(
+                    slot, _tick_bot, slot.bot_id, slot.job_id, slot.iteration, slot.config, True
+                )
+            else:
+                self._mark_ticks += 1
+                config = await self._run_tick(slot, _mark_bot, slot.bot_id, slot.job_id, slot.config)
+            if config is None:
+                return
+            if now >= close_at:
+                close_at = loop.time() + self._until_candle_close(config.timeframe)
+            if now >= next_mark:
+                next_mark = self._next_on_grid(next_mark, mark_interval)
+
+    async def _sleep_until(self, slot: _BotSlot, deadline: float) -> None:
+        loop = asyncio.get_running_loop()
+        delay = deadline - loop.time()
+        if delay > 0:
+            try:
+                await asyncio.wait_for(slot.wake.wait(), timeout=delay)
+            except TimeoutError:
+                pass
+        self._max_lag = max(self._max_lag, loop.time() - deadline)
+        slot.wake.clear()
+
+    def _next_on_grid(self, deadline: float, interval: float) -> float:
+        """Next deadline on the fixed grid; skips slots a slow tick overran instead of firing them back to back."""
+        deadline += interval
+        now = asyncio.get_running_loop().time()
+        if deadline < now:
+            missed = math.ceil((now - deadline) / interval)
+            self._overruns += missed
+            deadline += missed * interval
+        return deadline
+
+    def _until_candle_close(self, timeframe: str) -> float:
+        now = time.time()
+        try:
+            close = next_candle_close(timeframe, now)
+        except ValueError:
+            logger.warning("Unsupported bot timeframe %r; ticking every %ss", timeframe, self.interval_seconds)
+            return self.interval_seconds
+        return close - now + _CANDLE_CLOSE_GRACE_SECONDS
+
+    async def _run_tick(self, slot: _BotSlot, fn: Any, *args: Any) -> _BotConfig | None:
+        """Run a blocking tick; returns the config it used, or None once the bot has stopped or failed."""
+        version = slot.config_version
+        try:
+            (keep_running, config), statements = await self._run_blocking(_counted, fn, *args)
+        except Exception as exc:
+            await self._run_blocking(_fail_bot, slot.bot_id, slot.job_id, exc)
+            return None
+        self._statements += statements
+        self._max_tick_statements = max(self._max_tick_statements, statements)
+        if not keep_running:
+            return None
+        if slot.config_version == version:
+            slot.config = config
+            # This tick re-read the row after any start seen so far and kept running.
+            slot.start_pending = False
+        return config
+
+    async def reconcile(self) -> None:
+        running = await self._run_blocking(_load_running_bots, self.shard_index, self.shard_count)
+        for bot_id in list(self._slots):
+            if bot_id in running:
+                # Catches config messages that were lost; one row read per reconcile, not per tick.
+                self.refresh(bot_id)
+            else:
+                self.wake(bot_id)
+        for bot_id in running - self._slots.keys():
+            self.register(bot_id)
+
+    async def _reconcile_forever(self) -> None:
+        while True:
+            try:
+                await self.reconcile()
+            except Exception:  # pragma: no cover - runtime dependent
+                logger.exception("Bot reconcile failed")
+            logger.info("Bot runtime stats: %s", self.stats())
+            await asyncio.sleep(self.reconcile_seconds)
+
+    async def checkpoint_marks(self) -> None:
+        """Write every configured bot's marks to Postgres in one statement; the interval schedule's only mark write."""
+        configs = {slot.bot_id: slot.config for slot in self._slots.values() if slot.config is not None}
+        symbols = sorted({symbol for config in configs.values() for symbol in config.symbols})
+        if not configs:
+            return
+        await self._run_blocking(_checkpoint_marks, sorted(configs), symbols)
+        self._mark_checkpoints += 1
+
+    async def _checkpoint_marks_forever(self) -> None:
+        period = self.interval_seconds * _settings().mark_checkpoint_ticks
+        while True:
+            await asyncio.sleep(period)
+            try:
+                await self.checkpoint_marks()
+            except Exception:  # pragma: no cover - runtime dependent
+                logger.exception("Mark checkpoint failed")
+
+    async def _listen_forever(self, redis_url: str) -> None:
+        backoff = 1.0
+        while True:
+            client = aioredis.from_url(redis_url, decode_responses=True)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.subscribe(BOT_CONTROL_CHANNEL)
+                backoff = 1.0
+                # Messages sent while we were disconnected are lost; catch up from the DB.
+                await self.reconcile()
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    control = decode_control(message.get("data"))
+                    if control is None:
+                        continue
+                    if control["action"] == "start":
+                        self.register(control["bot_id"], control["job_id"])
+                    elif control["action"] == "config":
+                        self.refresh(control["bot_id"])
+                    else:
+                        self.wake(control["bot_id"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # pragma: no cover - runtime dependent
+                logger.warning("Bot control channel error, reconnecting in %.0fs: %s", backoff, exc)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
+
+    async def run(self, redis_url: str) -> None:
+        background = [
+            asyncio.create_task(self._listen_forever(redis_url), name="bot-control"),
+            asyncio.create_task(self._reconcile_forever(), name="bot-reconcile"),
+        ]
+        if self.schedule == "interval":
+            # Candle-close ticks write their own marks.
+            background.append(asyncio.create_task(self._checkpoint_marks_forever(), name="bot-marks"))
+        try:
+            await asyncio.gather(*background)
+        finally:
+            for task in background:
+                task.cancel()
+            await self.shutdown()
+
+    async def shutdown(self) -> None:
+        """Stop driving bots without touching their DB state, so a restart resumes them."""
+        tasks = [slot.task for slot in self._slots.values() if slot.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "shard": f"{self.shard_index}/{self.shard_count}",
+            "bots": len(self._slots),
+            "ticks": self._ticks,
+            "mark_ticks": self._mark_ticks,
+            "mark_checkpoints": self._mark_checkpoints,
+            "statements_per_tick": (
+                round(self._statements / (self._ticks + self._mark_ticks), 2) if self._ticks + self._mark_ticks else 0.0
+            ),
+            "max_tick_statements": self._max_tick_statements,
+            "overruns": self._overruns,
+            "max_lag_seconds": round(self._max_lag, 3),
+        }
+
+
+async def _main() -> None:
+    settings = _settings()
+    runtime = BotRuntime(
+        interval_seconds=settings.bot_loop_interval_seconds,
+        threads=settings.bot_runtime_threads,
+        reconcile_seconds=settings.bot_runtime_reconcile_seconds,
+        shard_index=settings.bot_runtime_shard_index,
+        shard_count=settings.bot_runtime_shard_count,
+        schedule=settings.bot_schedule,
+        mark_interval_seconds=settings.bot_mark_interval_seconds,
+    )
+    main_task = asyncio.current_task()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, main_task.cancel)
+
+    logger.info("Bot runtime started (shard %s, %s schedule)", runtime.stats()["shard"], runtime.schedule)
+    try:
+        await runtime.run(settings.redis_url)
+    except asyncio.CancelledError:
+        pass
+    logger.info("Bot runtime stopped")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(_main())
@@ -6,14 +6,27 @@ from datetime import datetime, timezone
 from functools import lru_cache
 from typing import Any
 
-import ccxt
 import redis
 from celery import Celery
-from sqlalchemy import and_, asc, desc, select
+from sqlalchemy import and_, desc, select
 
+from packages.core.backtest import backtest_artifact_path, run_backtest
+from packages.core.candles import get_candle_store
 from packages.core.database import SessionLocal
-from packages.core.models import Bot, Job, PortfolioSnapshot, Trade
+from packages.core.events import EventBuffer, event_envelope, publish_events
+from packages.core.exchange import get_exchange_pool
+from packages.core.job_state import JobState, store_job_state
+from packages.core.models import Bot, Job
+from packages.core.optimize import expand_candidates, optimization_artifact_path, run_optimization
+from packages.core.rollups import apply_retention, rollup_portfolio
 from packages.core.settings import Settings, get_settings
+from packages.core.ticker_cache import (
+    TICKERS_KEY,
+    TICKERS_STREAM_KEY,
+    decode_ticker,
+    encode_ticker,
+    normalize_ticker,
+)
 
 
 @lru_cache(maxsize=1)
@@ -29,6 +42,19 @@ celery_app.conf.update(
     timezone="UTC",
     enable_utc=True,
     task_track_started=True,
+    beat_schedule={
+        "market-data-feed": {
+            "task": "market_data_feed",
+            "schedule": max(float(_settings().market_feed_interval_seconds), 0.5),
+            # A late feed is useless once the next one is due.
+            "options": {"expires": max(float(_settings().market_feed_interval_seconds), 0.5)},
+        },
+        "portfolio-rollup": {
+            "task": "portfolio_rollup",
+            "schedule": float(_settings().portfolio_rollup_interval_seconds),
+            "options": {"expires": float(_settings().portfolio_rollup_interval_seconds)},
+        },
+    },
 )
 
 # Allows `celery -A apps.worker.celery_app worker ...` from repo root.
@@ -42,22 +68,57 @@ def _utc_now() -> datetime:
 
 
 def _publish_event(event_name: str, payload: dict[str, Any]) -> None:
-    event = {"event": event_name, "data": payload}
-    redis_client.publish("events", json.dumps(event, default=str))
+    publish_events(redis_client, [event_envelope(event_name, payload)], _settings().events_stream_maxlen)
+
+
+def _event_buffer() -> EventBuffer:
+    """Buffer events and publish them as one stream entry when the ``with`` block exits."""
+    return EventBuffer(redis_client, _settings().events_stream_maxlen)
 
 
 def _fetch_tickers(symbols: list[str]) -> dict[str, Any]:
-    exchange = ccxt.binance({"enableRateLimit": True})
-    try:
-        exchange.load_markets()
+    def _fetch(exchange: Any) -> dict[str, Any]:
         try:
             return exchange.fetch_tickers(symbols)
         except Exception:
             return {symbol: exchange.fetch_ticker(symbol) for symbol in symbols}
-    finally:
-        close_method = getattr(exchange, "close", None)
-        if callable(close_method):
-            close_method()
+
+    return get_exchange_pool().call(_fetch)
+
+
+def _store_tickers(tickers: dict[str, Any], symbols: list[str]) -> dict[str, dict[str, Any]]:
+    fetched_at = time.time()
+    rows = {symbol: row for symbol in symbols if (row := normalize_ticker(symbol, tickers.get(symbol)))}
+    if rows:
+        redis_client.hset(
+            TICKERS_KEY,
+            mapping={symbol: encode_ticker(row, fetched_at) for symbol, row in rows.items()},
+        )
+    return rows
+
+
+def _load_last_prices(symbols: list[str]) -> dict[str, float]:
+    """Read prices published by ``market_data_feed``; fetch only what is missing or stale."""
+    max_age = float(_settings().market_feed_max_age_seconds)
+    now = time.time()
+    last_prices: dict[str, float] = {}
+
+    try:
+        raw_rows = redis_client.hmget(TICKERS_KEY, symbols)
+    except redis.RedisError:
+        raw_rows = [None] * len(symbols)
+
+    for symbol, raw in zip(symbols, raw_rows):
+        decoded = decode_ticker(raw)
+        if decoded is not None and now - decoded[0] <= max_age:
+            last_prices[symbol] = float(decoded[1]["price"])
+
+    missing = [symbol for symbol in symbols if symbol not in last_prices]
+    if missing:
+        rows = _store_tickers(_fetch_tickers(missing), missing)
+        last_prices.update({symbol: float(row["price"]) for symbol, row in rows.items()})
+
+    return last_prices
 
 
 def _find_or_create_job(session: Any, bot_id: int, task_name: str, celery_task_id: str | None) -> Job:
@@ -110,332 +171,281 @@ def _resolve_fee_rate(bot: Bot) -> float:
     return value
 
 
-@celery_app.task(name="bot_run_loop", bind=True)
-def bot_run_loop(self: Any, bot_id: int) -> dict[str, Any]:
-    interval_seconds = max(float(_settings().bot_loop_interval_seconds), 1.0)
-    iteration = 0
-    job_id: int | None = None
-
-    try:
-        with SessionLocal() as session:
-            bot = session.get(Bot, bot_id)
-            if not bot:
-                _publish_event(
-                    "system.notice",
-                    {
-                        "bot_id": bot_id,
-                        "message": "bot_run_loop received unknown bot_id",
-                        "ts": _utc_now().isoformat(),
-                    },
-                )
-                return {"status": "bot_not_found", "bot_id": bot_id}
-
-            bot.status = "running"
-            bot.stop_requested = False
-
-            job = _find_or_create_job(session, bot_id, "bot_run_loop", self.request.id)
-            job.status = "running"
-            job.progress = 0
-            job.message = "Worker loop started"
-            job_id = job.id
-
-            session.commit()
+@celery_app.task(name="market_data_feed")
+def market_data_feed() -> dict[str, Any]:
+    """Fetch the union of all running bots' symbols in one call and publish it."""
+    with SessionLocal() as session:
+        symbol_lists = session.execute(select(Bot.symbols).where(Bot.status == "running")).scalars().all()
 
-        _publish_event(
-            "bot.state",
-            {"bot_id": bot_id, "status": "running", "job_id": job_id, "ts": _utc_now().isoformat()},
+    symbols = sorted(
+        {
+            symbol.strip()
+            for symbol_list in symbol_lists
+            for symbol in (symbol_list or [])
+            if isinstance(symbol, str) and symbol.strip()
+        }
+    )
+    if not symbols:
+        return {"status": "idle", "symbols": 0}
+
+    rows = _store_tickers(_fetch_tickers(symbols), symbols)
+    if rows:
+        prices = {symbol: row["price"] for symbol, row in rows.items()}
+        ts = _utc_now().isoformat()
+        redis_client.xadd(
+            TICKERS_STREAM_KEY,
+            {"prices": json.dumps(prices), "ts": ts},
+            maxlen=int(_settings().market_feed_stream_maxlen),
+            approximate=True,
         )
+        # Only SSE clients that opted into the market topic receive this.
+        _publish_event("market.tickers", {"prices": prices, "ts": ts})
 
-        while True:
-            with SessionLocal() as session:
-                bot = session.get(Bot, bot_id)
-                job = session.get(Job, job_id) if job_id else None
-
-                if not bot:
-                    if job:
-                        job.status = "failed"
-                        job.message = "Bot deleted while running"
-                        session.commit()
-                    _publish_event(
-                        "system.notice",
-                        {
-                            "bot_id": bot_id,
-                            "job_id": job_id,
-                            "message": "Bot deleted while loop was active",
-                            "ts": _utc_now().isoformat(),
-                        },
-                    )
-                    return {"status": "bot_deleted", "bot_id": bot_id}
-
-                if bot.status != "running" or bot.stop_requested:
-                    bot.status = "stopped"
-                    bot.stop_requested = False
-                    if job:
-                        job.status = "completed"
-                        job.progress = 100
-                        job.message = "Bot loop stopped"
-                    session.commit()
-
-                    _publish_event(
-                        "bot.state",
-                        {
-                            "bot_id": bot_id,
-                            "status": "stopped",
-                            "job_id": job_id,
-                            "ts": _utc_now().isoformat(),
-                        },
-                    )
-                    if job_id:
-                        _publish_event(
-                            "job.progress",
-                            {
-                                "bot_id": bot_id,
-                                "job_id": job_id,
-                                "status": "completed",
-                                "progress": 100,
-                                "ts": _utc_now().isoformat(),
-                            },
-                        )
-                    return {"status": "stopped", "bot_id": bot_id, "job_id": job_id}
-
-                symbols = [symbol for symbol in (bot.symbols or []) if isinstance(symbol, str) and symbol.strip()]
-
-                if not symbols:
-                    if job:
-                        job.message = "Bot has no symbols configured"
-                        session.commit()
-                    _publish_event(
-                        "system.notice",
-                        {
-                            "bot_id": bot_id,
-                            "job_id": job_id,
-                            "message": "Bot has no symbols configured",
-                            "ts": _utc_now().isoformat(),
-                        },
-                    )
-                    time.sleep(interval_seconds)
-                    continue
-
-            try:
-                tickers = _fetch_tickers(symbols)
-            except Exception as exc:
-                with SessionLocal() as session:
-                    job = session.get(Job, job_id) if job_id else None
-                    if job:
-                        job.status = "running"
-                        job.message = f"Ticker fetch error: {exc}"
-                        session.commit()
-
-                _publish_event(
-                    "system.notice",
-                    {
-                        "bot_id": bot_id,
-                        "job_id": job_id,
-                        "message": f"Ticker fetch error: {exc}",
-                        "ts": _utc_now().isoformat(),
-                    },
-                )
-                time.sleep(interval_seconds)
-                continue
-
-            with SessionLocal() as session:
-                bot = session.get(Bot, bot_id)
-                fee_rate = _resolve_fee_rate(bot) if bot else float(_settings().paper_fee_rate)
-
-                open_trades = (
-                    session.execute(
-                        select(Trade)
-                        .where(Trade.bot_id == bot_id, Trade.status == "open")
-                        .order_by(asc(Trade.created_at))
-                    )
-                    .scalars()
-                    .all()
-                )
-                closed_trades = (
-                    session.execute(
-                        select(Trade)
-                        .where(Trade.bot_id == bot_id, Trade.status == "closed")
-                        .order_by(asc(Trade.created_at))
-                    )
-                    .scalars()
-                    .all()
-                )
+    return {"status": "published", "symbols": len(symbols), "prices": len(rows)}
 
-                positions_value = 0.0
-                open_locked_cost = 0.0
-                realized_closed = 0.0
-
-                last_prices: dict[str, float] = {}
-                trade_updates: list[dict[str, Any]] = []
-                for symbol in symbols:
-                    ticker = tickers.get(symbol) or {}
-                    last = ticker.get("last") or ticker.get("close")
-                    if last is not None:
-                        last_prices[symbol] = float(last)
-
-                for trade in open_trades:
-                    mark_price = last_prices.get(trade.symbol)
-                    if mark_price is None:
-                        continue
-
-                    mark_value = float(trade.amount * mark_price)
-                    unrealized = float(mark_value - (trade.cost_basis_quote or 0.0) - (trade.fees_paid_quote or 0.0))
-
-                    trade.unrealized_pnl_quote = unrealized
-                    trade.pnl = unrealized
-
-                    positions_value += mark_value
-                    open_locked_cost += float((trade.cost_basis_quote or 0.0) + (trade.fees_paid_quote or 0.0))
-
-                    trade_updates.append(
-                        {
-                            "bot_id": bot_id,
-                            "trade_id": trade.id,
-                            "symbol": trade.symbol,
-                            "price": mark_price,
-                            "unrealized_pnl_quote": unrealized,
-                            "ts": _utc_now().isoformat(),
-                        }
-                    )
-
-                for trade in closed_trades:
-                    realized_closed += float(trade.realized_pnl_quote or 0.0)
-
-                cash = float(_settings().paper_starting_cash + realized_closed - open_locked_cost)
-                equity = float(cash + positions_value)
-
-                snapshot = PortfolioSnapshot(
-                    bot_id=bot_id,
-                    equity=equity,
-                    cash=cash,
-                    positions_value=positions_value,
-                    timestamp=_utc_now(),
-                )
-                session.add(snapshot)
 
-                iteration += 1
-                progress = min(99, iteration)
+@celery_app.task(name="portfolio_rollup")
+def portfolio_rollup() -> dict[str, Any]:
+    """Compact snapshots into the 1m/1h/1d tiers, then trim each tier to its retention."""
+    with SessionLocal() as session:
+        upserted = rollup_portfolio(session)
+        session.commit()
+        deleted = apply_retention(session, _settings(), _utc_now())
+    return {"upserted": upserted, "deleted": deleted}
 
-                job = session.get(Job, job_id) if job_id else None
-                if job:
-                    job.status = "running"
-                    job.progress = progress
-                    job.message = f"Loop iteration {iteration}"
 
-                session.commit()
-                session.refresh(snapshot)
+def _store_job_state(job_id: int, status: str, progress: int, message: str | None) -> bool:
+    """Write a job's transient state to Redis; False when Redis is unavailable."""
+    state = JobState(job_id=job_id, status=status, progress=progress, message=message, updated_at=_utc_now())
+    try:
+        with redis_client.pipeline(transaction=False) as pipe:
+            store_job_state(pipe, state, _settings().job_state_ttl_seconds)
+            pipe.execute()
+    except redis.RedisError:
+        return False
+    return True
+
+
+def _set_job_state(
+    job_id: int,
+    status: str,
+    progress: int,
+    message: str | None,
+    celery_task_id: str | None = None,
+    durable: bool = True,
+) -> None:
+    """Record a job's state and publish ``job.progress``.
+
+    Transitions are ``durable`` and written to the ``jobs`` row as well; plain
+    progress goes to Redis only, unless Redis is down.
+    """
+    if durable:
+        bot_id = _checkpoint_job_state(job_id, status, progress, message, celery_task_id)
+        # Written through, so Redis never holds an older state than the row.
+        _store_job_state(job_id, status, progress, message)
+    elif _store_job_state(job_id, status, progress, message):
+        bot_id = _job_bot_id(job_id)
+    else:
+        bot_id = _checkpoint_job_state(job_id, status, progress, message, celery_task_id)
+    _publish_event(
+        "job.progress",
+        {
+            "bot_id": bot_id,
+            "job_id": job_id,
+            "status": status,
+            "progress": progress,
+            "message": message,
+            "ts": _utc_now().isoformat(),
+        },
+    )
 
-            for update in trade_updates:
-                _publish_event("trade.updated", update)
 
-            _publish_event(
-                "portfolio.snapshot",
-                {
-                    "bot_id": bot_id,
-                    "equity": equity,
-                    "cash": cash,
-                    "positions_value": positions_value,
-                    "ts": snapshot.timestamp.isoformat(),
-                    "prices": last_prices,
-                    "fee_rate": fee_rate,
-                },
-            )
+def _checkpoint_job_state(
+    job_id: int,
+    status: str,
+    progress: int,
+    message: str | None,
+    celery_task_id: str | None = None,
+) -> int | None:
+    """Write a job's state to its ``jobs`` row; returns the job's bot id."""
+    with SessionLocal() as session:
+        job = session.get(Job, job_id)
+        if not job:
+            return None
+        job.status = status
+        job.progress = progress
+        job.message = message
+        if celery_task_id:
+            job.celery_task_id = celery_task_id
+        bot_id = job.bot_id
+        session.commit()
+    return bot_id
 
-            if job_id and (iteration == 1 or iteration % 3 == 0):
-                _publish_event(
-                    "job.progress",
-                    {
-                        "bot_id": bot_id,
-                        "job_id": job_id,
-                        "status": "running",
-                        "progress": min(99, iteration),
-                        "ts": _utc_now().isoformat(),
-                    },
-                )
 
-            time.sleep(interval_seconds)
+@lru_cache(maxsize=1024)
+def _job_bot_id(job_id: int) -> int | None:
+    # A job never changes bots, so one read per job and process is enough.
+    with SessionLocal() as session:
+        return session.execute(select(Job.bot_id).where(Job.id == job_id)).scalar()
+
+
+class _ProgressReporter:
+    """Maps a phase's 0..1 fraction onto a job progress range, at most once a second."""
+
+    def __init__(self, job_id: int, low: int, high: int, message: str) -> None:
+        self.job_id = job_id
+        self.low = low
+        self.high = high
+        self.message = message
+        self._last_sent = 0.0
+        self._last_progress = -1
+
+    def __call__(self, fraction: float) -> None:
+        progress = self.low + int((self.high - self.low) * min(max(fraction, 0.0), 1.0))
+        now = time.monotonic()
+        if progress == self._last_progress or now - self._last_sent < 1.0:
+            return
+        self._last_sent = now
+        self._last_progress = progress
+        _set_job_state(self.job_id, "running", progress, self.message, durable=False)
+
+
+@celery_app.task(name="backtest_run", bind=True)
+def backtest_run(self: Any, job_id: int, params: dict[str, Any]) -> dict[str, Any]:
+    symbols: list[str] = list(params["symbols"])
+    timeframe = str(params["timeframe"])
+    since = int(params["since"])
+    until = int(params["until"]) if params.get("until") is not None else None
+
+    _set_job_state(job_id, "running", 0, "Loading candles", celery_task_id=self.request.id)
+    try:
+        store = get_candle_store()
+        loading = _ProgressReporter(job_id, 0, 20, "Loading candles")
+        candles = {}
+        for index, symbol in enumerate(symbols):
+            candles[symbol] = store.load(symbol, timeframe, since=since, until=until)
+            loading((index + 1) / len(symbols))
+
+        result = run_backtest(
+            candles,
+            strategy=str(params["strategy"]),
+            knobs=params["knobs"],
+            fee_rate=float(params["fee_rate"]),
+            starting_cash=float(_settings().paper_starting_cash),
+            progress=_ProgressReporter(job_id, 20, 99, "Simulating"),
+        )
 
+        artifact_path = backtest_artifact_path(_settings().artifacts_dir, job_id)
+        artifact_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = artifact_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"job_id": job_id, "params": params, **result.to_dict()}))
+        tmp_path.replace(artifact_path)
     except Exception as exc:
-        with SessionLocal() as session:
-            bot = session.get(Bot, bot_id)
-            if bot:
-                bot.status = "stopped"
-                bot.stop_requested = False
-
-            job = session.get(Job, job_id) if job_id else None
-            if job:
-                job.status = "failed"
-                job.message = str(exc)
-
-            session.commit()
-
-        _publish_event(
-            "bot.state",
-            {
-                "bot_id": bot_id,
-                "status": "stopped",
-                "job_id": job_id,
-                "ts": _utc_now().isoformat(),
-            },
-        )
-        _publish_event(
-            "system.notice",
-            {
-                "bot_id": bot_id,
-                "job_id": job_id,
-                "message": f"bot_run_loop failed: {exc}",
-                "ts": _utc_now().isoformat(),
-            },
-        )
+        _set_job_state(job_id, "failed", 0, f"Backtest failed: {exc}")
         raise
 
+    stats = result.stats
+    _set_job_state(
+        job_id,
+        "completed",
+        100,
+        f"{stats['trades']} trades, return {stats['total_return_pct']:.2f}%",
+    )
+    return {"status": "completed", "job_id": job_id, "trades": stats["trades"]}
 
-@celery_app.task(name="bot_stop", bind=True)
-def bot_stop(self: Any, bot_id: int) -> dict[str, Any]:
-    with SessionLocal() as session:
-        bot = session.get(Bot, bot_id)
-        if not bot:
+
+@celery_app.task(name="optimize_run", bind=True)
+def optimize_run(self: Any, job_id: int, params: dict[str, Any]) -> dict[str, Any]:
+    symbols: list[str] = list(params["symbols"])
+    timeframe = str(params["timeframe"])
+    since = int(params["since"])
+    until = int(params["until"]) if params.get("until") is not None else None
+    objective = str(params["objective"])
+    top_n = int(params["top_n"])
+
+    _set_job_state(job_id, "running", 0, "Loading candles", celery_task_id=self.request.id)
+    try:
+        # Sync once in the parent; pool workers only map the stored files.
+        store = get_candle_store()
+        loading = _ProgressReporter(job_id, 0, 10, "Loading candles")
+        for index, symbol in enumerate(symbols):
+            store.load(symbol, timeframe, since=since, until=until)
+            loading((index + 1) / len(symbols))
+
+        candidates = expand_candidates(
+            params["knobs"],
+            params["search"],
+            mode=str(params["mode"]),
+            samples=int(params["samples"]),
+            max_candidates=int(params["max_candidates"]),
+            seed=params.get("seed"),
+        )
+        if not candidates:
+            raise ValueError("Search space produced no valid knob sets")
+
+        evaluating = _ProgressReporter(job_id, 10, 99, f"Evaluating {len(candidates)} candidates")
+        leaders: list[dict[str, Any]] = []
+
+        def on_result(entry: dict[str, Any], done: int) -> None:
+            evaluating(done / len(candidates))
+            if entry["score"] is None:
+                return
+            if len(leaders) >= top_n and entry["score"] <= leaders[-1]["score"]:
+                return
+            leaders.append(entry)
+            leaders.sort(key=lambda item: item["score"], reverse=True)
+            del leaders[top_n:]
             _publish_event(
-                "system.notice",
+                "optimize.candidate",
                 {
-                    "bot_id": bot_id,
-                    "message": "bot_stop received unknown bot_id",
+                    "bot_id": params.get("bot_id"),
+                    "job_id": job_id,
+                    "objective": objective,
+                    "position": leaders.index(entry) + 1,
+                    "score": entry["score"],
+                    "knobs": entry["knobs"],
+                    "stats": entry["stats"],
+                    "evaluated": done,
+                    "total": len(candidates),
                     "ts": _utc_now().isoformat(),
                 },
             )
-            return {"status": "bot_not_found", "bot_id": bot_id}
-
-        bot.status = "stopped"
-        bot.stop_requested = True
 
-        stop_job = _find_or_create_job(session, bot_id, "bot_stop", self.request.id)
-        stop_job.status = "completed"
-        stop_job.progress = 100
-        stop_job.message = "Stop signal set"
-        stop_job.celery_task_id = self.request.id
-
-        session.commit()
-
-        stop_job_id = stop_job.id
+        results = run_optimization(
+            store.root,
+            symbols,
+            timeframe,
+            since,
+            until,
+            strategy=str(params["strategy"]),
+            fee_rate=float(params["fee_rate"]),
+            starting_cash=float(_settings().paper_starting_cash),
+            candidates=candidates,
+            objective=objective,
+            processes=_settings().optimizer_processes or None,
+            on_result=on_result,
+        )
 
-    _publish_event(
-        "bot.state",
-        {
-            "bot_id": bot_id,
-            "status": "stopped",
-            "job_id": stop_job_id,
-            "ts": _utc_now().isoformat(),
-        },
-    )
-    _publish_event(
-        "job.progress",
-        {
-            "bot_id": bot_id,
-            "job_id": stop_job_id,
-            "status": "completed",
-            "progress": 100,
-            "ts": _utc_now().isoformat(),
-        },
-    )
+        artifact_path = optimization_artifact_path(_settings().artifacts_dir, job_id)
+        artifact_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = artifact_path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {
+                    "job_id": job_id,
+                    "params": params,
+                    "objective": objective,
+                    "evaluated": len(results),
+                    "results": results,
+                }
+            )
+        )
+        tmp_path.replace(artifact_path)
+    except Exception as exc:
+        _set_job_state(job_id, "failed", 0, f"Optimization failed: {exc}")
+        raise
 
-    return {"status": "stop_requested", "bot_id": bot_id, "job_id": stop_job_id}
+    best = results[0]
+    summary = f"best {objective} {best['score']:.4f}" if best["score"] is not None else "no scorable candidates"
+    _set_job_state(job_id, "completed", 100, f"{len(results)} candidates, {summary}")
+    return {"status": "completed", "job_id": job_id, "candidates": len(results)}
@@ -1,11 +1,4 @@
-import {
-  useGlobalPortfolio,
-  useBots,
-  useMarketTickers,
-  useTrades,
-  useStartBot,
-  useStopBot,
-} from "@/hooks/use-trading-api";
+import { useDashboard, useMarketTickers, useStartBot, useStopBot } from "@/hooks/use-trading-api";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from "@/components/ui/table";
 import { Badge } from "@/components/ui/badge";
@@ -16,15 +9,12 @@ import { CreateBotDialog } from "@/components/CreateBotDialog";
 import { Link } from "wouter";
 
 export default function Dashboard() {
-  const {
-    data: portfolio,
-    isLoading: pLoading,
-    isError: pError,
-    error: pErrorObj,
-  } = useGlobalPortfolio();
-  const { data: bots, isLoading: bLoading, isError: bError, error: bErrorObj } = useBots();
+  // Portfolio, bots and recent trades come from one /dashboard request.
+  const { data: dashboard, isLoading: dLoading, isError: dError, error: dErrorObj } = useDashboard();
   const { data: market, isLoading: mLoading, isError: mError, error: mErrorObj } = useMarketTickers();
-  const { data: trades, isLoading: tLoading, isError: tError, error: tErrorObj } = useTrades();
+  const portfolio = dashboard?.portfolio;
+  const bots = dashboard?.bots;
+  const trades = dashboard?.recent_trades;
 
   const startBot = useStartBot();
   const stopBot = useStopBot();
@@ -52,7 +42,7 @@ export default function Dashboard() {
           </CardHeader>
           <CardContent>
             <div className="text-2xl font-bold font-numeric">
-              {pLoading ? "Loading..." : pError || !portfolio ? "-" : formatCurrency(portfolio.equity)}
+              {dLoading ? "Loading..." : dError || !portfolio ? "-" : formatCurrency(portfolio.equity)}
             </div>
             <p className="text-xs text-muted-foreground mt-1">Latest paper-trading snapshot</p>
           </CardContent>
@@ -65,7 +55,7 @@ export default function Dashboard() {
           </CardHeader>
           <CardContent>
             <div className="text-2xl font-bold font-numeric">
-              {pLoading ? "Loading..." : pError || !portfolio ? "-" : formatCurrency(portfolio.cash)}
+              {dLoading ? "Loading..." : dError || !portfolio ? "-" : formatCurrency(portfolio.cash)}
             </div>
           </CardContent>
         </Card>
@@ -77,7 +67,7 @@ export default function Dashboard() {
           </CardHeader>
           <CardContent>
             <div className="text-2xl font-bold font-numeric">
-              {pLoading ? "Loading..." : pError || !portfolio ? "-" : formatCurrency(portfolio.positions_value)}
+              {dLoading ? "Loading..." : dError || !portfolio ? "-" : formatCurrency(portfolio.positions_value)}
             </div>
           </CardContent>
         </Card>
@@ -89,7 +79,7 @@ export default function Dashboard() {
           </CardHeader>
           <CardContent>
             <div className="text-2xl font-bold font-numeric">
-              {bLoading ? "Loading..." : bError || !bots ? "-" : bots.filter((b) => b.status === "running").length}
+              {dLoading ? "Loading..." : dError || !bots ? "-" : bots.filter((b) => b.status === "running").length}
               <span className="text-sm text-muted-foreground font-sans ml-1">/ {bots?.length ?? 0}</span>
             </div>
           </CardContent>
@@ -117,16 +107,16 @@ export default function Dashboard() {
                   </TableRow>
                 </TableHeader>
                 <TableBody>
-                  {bLoading ? (
+                  {dLoading ? (
                     <TableRow>
                       <TableCell colSpan={4} className="text-center py-8 text-muted-foreground">
                         Loading bots...
                       </TableCell>
                     </TableRow>
-                  ) : bError ? (
+                  ) : dError ? (
                     <TableRow>
                       <TableCell colSpan={4} className="text-center py-8 text-danger">
-                        {(bErrorObj as Error)?.message || "Failed to load bots"}
+                        {(dErrorObj as Error)?.message || "Failed to load bots"}
                       </TableCell>
                     </TableRow>
                   ) : !bots || bots.length === 0 ? (
@@ -239,16 +229,16 @@ export default function Dashboard() {
                 </TableRow>
               </TableHeader>
               <TableBody>
-                {tLoading ? (
+                {dLoading ? (
                   <TableRow>
                     <TableCell colSpan={6} className="text-center py-8 text-muted-foreground">
                       Loading recent trades...
                     </TableCell>
                   </TableRow>
-                ) : tError ? (
+                ) : dError ? (
                   <TableRow>
                     <TableCell colSpan={6} className="text-center py-8 text-danger">
-                      {(tErrorObj as Error)?.message || "Failed to load trades"}
+                      {(dErrorObj as Error)?.message || "Failed to load trades"}
                     </TableCell>
                   </TableRow>
                 ) : !trades || trades.length === 0 ? (
@@ -285,8 +275,8 @@ export default function Dashboard() {
         </CardContent>
       </Card>
 
-      {pError && (
-        <div className="text-sm text-muted-foreground">Portfolio unavailable: {(pErrorObj as Error)?.message}</div>
+      {dError && (
+        <div className="text-sm text-muted-foreground">Dashboard unavailable: {(dErrorObj as Error)?.message}</div>
       )}
     </div>
   );
@@ -3,10 +3,11 @@ import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from "@/components/ui/table";
 import { Progress } from "@/components/ui/progress";
 import { Badge } from "@/components/ui/badge";
+import { Button } from "@/components/ui/button";
 import { formatDistanceToNow } from "date-fns";
 
 export default function Jobs() {
-  const { data: jobs, isLoading, isError, error } = useJobs();
+  const { data: jobs, isLoading, isError, error, hasNextPage, fetchNextPage, isFetchingNextPage } = useJobs();
 
   return (
     <div className="space-y-6">
@@ -85,6 +86,13 @@ export default function Jobs() {
               </TableBody>
             </Table>
           </div>
+          {hasNextPage ? (
+            <div className="flex justify-center pt-4">
+              <Button variant="outline" size="sm" disabled={isFetchingNextPage} onClick={() => fetchNextPage()}>
+                {isFetchingNextPage ? "Loading..." : "Load more"}
+              </Button>
+            </div>
+          ) : null}
         </CardContent>
       </Card>
     </div>
@@ -111,6 +111,24 @@ function TradeRows({
   );
 }
 
+function LoadMore({ trades }: { trades: ReturnType<typeof useTrades> }) {
+  if (!trades.hasNextPage) {
+    return null;
+  }
+  return (
+    <div className="flex justify-center pt-4">
+      <Button
+        variant="outline"
+        size="sm"
+        disabled={trades.isFetchingNextPage}
+        onClick={() => trades.fetchNextPage()}
+      >
+        {trades.isFetchingNextPage ? "Loading..." : "Load more"}
+      </Button>
+    </div>
+  );
+}
+
 export default function Trades() {
   const { toast } = useToast();
   const { data: bots } = useBots();
@@ -340,6 +358,7 @@ export default function Trades() {
                   </TableBody>
                 </Table>
               </div>
+              <LoadMore trades={openTrades} />
             </TabsContent>
 
             <TabsContent value="closed">
@@ -370,6 +389,7 @@ export default function Trades() {
                   </TableBody>
                 </Table>
               </div>
+              <LoadMore trades={closedTrades} />
             </TabsContent>
           </Tabs>
         </CardContent>
@@ -4,16 +4,30 @@ import { useQueryClient } from "@tanstack/react-query";
 const apiBase = (import.meta.env.VITE_API_BASE_URL ?? "").replace(/\/$/, "");
 const ssePath = `${apiBase}/api/sse`;
 
+// Survives remounts so a new EventSource resumes where the last one stopped;
+// the browser only resends Last-Event-ID on its own automatic reconnects.
+let lastEventId: string | null = null;
+
 export function useRealtimeUpdates() {
   const queryClient = useQueryClient();
 
   useEffect(() => {
-    const eventSource = new EventSource(ssePath);
+    const eventSource = new EventSource(
+      lastEventId ? `${ssePath}?last_event_id=${encodeURIComponent(lastEventId)}` : ssePath,
+    );
+
+    const trackEventId = (event: MessageEvent) => {
+      if (event.lastEventId) {
+        lastEventId = event.lastEventId;
+      }
+    };
 
     const handleBotState = (event: MessageEvent) => {
+      trackEventId(event);
       try {
         const data = JSON.parse(event.data);
         queryClient.invalidateQueries({ queryKey: ["/api/bots"] });
+        queryClient.invalidateQueries({ queryKey: ["/api/dashboard"] });
         if (data?.bot_id) {
           queryClient.invalidateQueries({ queryKey: ["/api/bots", data.bot_id] });
         }
@@ -23,9 +37,11 @@ export function useRealtimeUpdates() {
     };
 
     const handlePortfolio = (event: MessageEvent) => {
+      trackEventId(event);
       try {
         const data = JSON.parse(event.data);
         queryClient.invalidateQueries({ queryKey: ["/api/portfolio"] });
+        queryClient.invalidateQueries({ queryKey: ["/api/dashboard"] });
         if (data?.bot_id) {
           queryClient.invalidateQueries({ queryKey: ["/api/portfolio", data.bot_id] });
         }
@@ -34,16 +50,32 @@ export function useRealtimeUpdates() {
       }
     };
 
-    const handleJobProgress = () => {
+    const handleJobProgress = (event: MessageEvent) => {
+      trackEventId(event);
       queryClient.invalidateQueries({ queryKey: ["/api/jobs"] });
     };
 
-    const handleTradeEvent = () => {
+    const handleTradeEvent = (event: MessageEvent) => {
+      trackEventId(event);
       queryClient.invalidateQueries({ queryKey: ["/api/trades"] });
       queryClient.invalidateQueries({ queryKey: ["/api/orders"] });
       queryClient.invalidateQueries({ queryKey: ["/api/portfolio"] });
+      queryClient.invalidateQueries({ queryKey: ["/api/dashboard"] });
+    };
+
+    const handleNotice = (event: MessageEvent) => {
+      try {
+        const data = JSON.parse(event.data);
+        if (data?.resync) {
+          // Missed events could not be replayed; reload everything.
+          queryClient.invalidateQueries();
+        }
+      } catch (err) {
+        console.error("Failed to parse system.notice payload", err);
+      }
     };
 
+    eventSource.addEventListener("system.notice", handleNotice);
     eventSource.addEventListener("bot.state", handleBotState);
     eventSource.addEventListener("portfolio.snapshot", handlePortfolio);
     eventSource.addEventListener("job.progress", handleJobProgress);
@@ -56,6 +88,7 @@ export function useRealtimeUpdates() {
     };
 
     return () => {
+      eventSource.removeEventListener("system.notice", handleNotice);
       eventSource.removeEventListener("bot.state", handleBotState);
       eventSource.removeEventListener("portfolio.snapshot", handlePortfolio);
       eventSource.removeEventListener("job.progress", handleJobProgress);
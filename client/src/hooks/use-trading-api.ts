@@ -1,9 +1,13 @@
-import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
+import { useMemo } from "react";
+import { useInfiniteQuery, useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
 import { z } from "zod";
 
 const apiBase = (import.meta.env.VITE_API_BASE_URL ?? "").replace(/\/$/, "");
 const apiUrl = (path: string) => `${apiBase}${path}`;
 
+// List endpoints return the newest rows a page at a time; the next page's cursor is in this header.
+const NEXT_CURSOR_HEADER = "X-Next-Cursor";
+
 const knobsSchema = z.object({
   max_open_trades: z.number(),
   stake_amount: z.number(),
@@ -40,6 +44,8 @@ const tradeSchema = z.object({
   realized_pnl_quote: z.number().nullable(),
   status: z.string(),
   pnl: z.number().nullable(),
+  mark_price: z.number().nullable().optional(),
+  marked_at: z.string().nullable().optional(),
   closed_at: z.string().nullable().optional(),
   created_at: z.string(),
 });
@@ -90,6 +96,20 @@ const jobSchema = z.object({
   updated_at: z.string(),
 });
 
+const dashboardSchema = z.object({
+  generated_at: z.string(),
+  portfolio: portfolioSchema.nullable(),
+  bots: z.array(
+    botSchema.extend({
+      open_trades: z.number(),
+      realized_pnl_quote: z.number(),
+      latest_snapshot: portfolioSchema.nullable(),
+    }),
+  ),
+  recent_trades: z.array(tradeSchema),
+  active_jobs: z.array(jobSchema),
+});
+
 const startBotResponseSchema = z.object({
   bot_id: z.number(),
   job_id: z.number(),
@@ -148,6 +168,39 @@ async function fetcher<T>(url: string, schema?: z.ZodType<T>): Promise<T> {
   return schema ? schema.parse(json) : json;
 }
 
+type Page<T> = { rows: T[]; nextCursor: string | null };
+
+async function pageFetcher<T>(url: URL, schema: z.ZodType<T>, cursor: string | null): Promise<Page<T>> {
+  if (cursor) {
+    url.searchParams.set("cursor", cursor);
+  }
+  const res = await fetch(url.toString(), { credentials: "include" });
+  if (!res.ok) {
+    const errorText = await res.text().catch(() => "");
+    throw new Error(errorText || `HTTP ${res.status}`);
+  }
+
+  return { rows: z.array(schema).parse(await res.json()), nextCursor: res.headers.get(NEXT_CURSOR_HEADER) };
+}
+
+// Pages through a list endpoint; `data` is every loaded row, `fetchNextPage` loads the next page.
+function usePagedList<T>(queryKey: unknown[], path: string, schema: z.ZodType<T>, params: Record<string, string> = {}) {
+  const query = useInfiniteQuery({
+    queryKey,
+    initialPageParam: null as string | null,
+    queryFn: ({ pageParam }) => {
+      const url = new URL(apiUrl(path), window.location.origin);
+      for (const [name, value] of Object.entries(params)) {
+        url.searchParams.set(name, value);
+      }
+      return pageFetcher(url, schema, pageParam);
+    },
+    getNextPageParam: (lastPage) => lastPage.nextCursor ?? undefined,
+  });
+  const data = useMemo(() => query.data?.pages.flatMap((page) => page.rows), [query.data]);
+  return { ...query, data };
+}
+
 async function mutator<T>(
   url: string,
   method: "POST" | "PUT" | "PATCH" | "DELETE",
@@ -171,10 +224,7 @@ async function mutator<T>(
 }
 
 export function useBots() {
-  return useQuery({
-    queryKey: ["/api/bots"],
-    queryFn: () => fetcher(apiUrl("/api/bots"), z.array(botSchema)),
-  });
+  return usePagedList(["/api/bots"], "/api/bots", botSchema);
 }
 
 export function useBot(id: number) {
@@ -186,26 +236,18 @@ export function useBot(id: number) {
 }
 
 export function useTrades(status?: "open" | "closed", botId?: number) {
-  return useQuery({
-    queryKey: ["/api/trades", status ?? "all", botId ?? "all"],
-    queryFn: () => {
-      const url = new URL(apiUrl("/api/trades"), window.location.origin);
-      if (status) {
-        url.searchParams.set("status", status);
-      }
-      if (typeof botId === "number" && botId > 0) {
-        url.searchParams.set("bot_id", String(botId));
-      }
-      return fetcher(url.toString(), z.array(tradeSchema));
-    },
-  });
+  const params: Record<string, string> = {};
+  if (status) {
+    params.status = status;
+  }
+  if (typeof botId === "number" && botId > 0) {
+    params.bot_id = String(botId);
+  }
+  return usePagedList(["/api/trades", status ?? "all", botId ?? "all"], "/api/trades", tradeSchema, params);
 }
 
 export function useOrders() {
-  return useQuery({
-    queryKey: ["/api/orders"],
-    queryFn: () => fetcher(apiUrl("/api/orders"), z.array(orderSchema)),
-  });
+  return usePagedList(["/api/orders"], "/api/orders", orderSchema);
 }
 
 export function useGlobalPortfolio() {
@@ -215,6 +257,13 @@ export function useGlobalPortfolio() {
   });
 }
 
+export function useDashboard() {
+  return useQuery({
+    queryKey: ["/api/dashboard"],
+    queryFn: () => fetcher(apiUrl("/api/dashboard"), dashboardSchema),
+  });
+}
+
 export function useMarketTickers(symbols = "BTC/USDT,ETH/USDT") {
   return useQuery({
     queryKey: ["/api/market/tickers", symbols],
@@ -224,10 +273,7 @@ export function useMarketTickers(symbols = "BTC/USDT,ETH/USDT") {
 }
 
 export function useJobs() {
-  return useQuery({
-    queryKey: ["/api/jobs"],
-    queryFn: () => fetcher(apiUrl("/api/jobs"), z.array(jobSchema)),
-  });
+  return usePagedList(["/api/jobs"], "/api/jobs", jobSchema);
 }
 
 export function useCreateBot() {
@@ -245,6 +291,7 @@ export function useCreateBot() {
     },
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ["/api/bots"] });
+      queryClient.invalidateQueries({ queryKey: ["/api/dashboard"] });
     },
   });
 }
@@ -261,6 +308,7 @@ export function useCreateOrder() {
       queryClient.invalidateQueries({ queryKey: ["/api/trades"] });
       queryClient.invalidateQueries({ queryKey: ["/api/orders"] });
       queryClient.invalidateQueries({ queryKey: ["/api/portfolio"] });
+      queryClient.invalidateQueries({ queryKey: ["/api/dashboard"] });
     },
   });
 }
@@ -275,6 +323,7 @@ export function useCloseTrade() {
       queryClient.invalidateQueries({ queryKey: ["/api/trades"] });
       queryClient.invalidateQueries({ queryKey: ["/api/orders"] });
       queryClient.invalidateQueries({ queryKey: ["/api/portfolio"] });
+      queryClient.invalidateQueries({ queryKey: ["/api/dashboard"] });
     },
   });
 }
@@ -286,6 +335,7 @@ export function useStartBot() {
     mutationFn: (id: number) => mutator(apiUrl(`/api/bots/${id}/start`), "POST", undefined, startBotResponseSchema),
     onSuccess: (_, id) => {
       queryClient.invalidateQueries({ queryKey: ["/api/bots"] });
+      queryClient.invalidateQueries({ queryKey: ["/api/dashboard"] });
       queryClient.invalidateQueries({ queryKey: ["/api/bots", id] });
       queryClient.invalidateQueries({ queryKey: ["/api/jobs"] });
     },
@@ -299,6 +349,7 @@ export function useStopBot() {
     mutationFn: (id: number) => mutator(apiUrl(`/api/bots/${id}/stop`), "POST", undefined, stopBotResponseSchema),
     onSuccess: (_, id) => {
       queryClient.invalidateQueries({ queryKey: ["/api/bots"] });
+      queryClient.invalidateQueries({ queryKey: ["/api/dashboard"] });
       queryClient.invalidateQueries({ queryKey: ["/api/bots", id] });
       queryClient.invalidateQueries({ queryKey: ["/api/jobs"] });
     },
@@ -315,6 +366,7 @@ export function useUpdateBotKnobs() {
     },
     onSuccess: (_, { id }) => {
       queryClient.invalidateQueries({ queryKey: ["/api/bots"] });
+      queryClient.invalidateQueries({ queryKey: ["/api/dashboard"] });
       queryClient.invalidateQueries({ queryKey: ["/api/bots", id] });
     },
   });
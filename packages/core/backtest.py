@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import heapq
+from collections.abc import Callable, Mapping
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from packages.core.candles import CandleSeries
+from packages.core.schemas import Knobs
+from packages.core.strategies import get_strategy
+
+# Equity curves are downsampled to this many points in results; stats use the full curve.
+EQUITY_CURVE_POINTS = 2000
+_MINUTE_MS = 60_000
+
+
+@dataclass
+class BacktestTrade:
+    symbol: str
+    entry_ts: int
+    exit_ts: int
+    entry_price: float
+    exit_price: float
+    qty: float
+    cost_basis_quote: float
+    fees_paid_quote: float
+    realized_pnl_quote: float
+    exit_reason: str
+
+
+@dataclass
+class BacktestResult:
+    trades: list[BacktestTrade]
+    equity_ts: np.ndarray
+    equity: np.ndarray
+    stats: dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self, max_points: int = EQUITY_CURVE_POINTS) -> dict[str, Any]:
+        ts, equity = _downsample_last(self.equity_ts, self.equity, max_points)
+        return {
+            "stats": self.stats,
+            "trades": [asdict(trade) for trade in self.trades],
+            "equity_curve": [[int(t), float(e)] for t, e in zip(ts.tolist(), equity.tolist())],
+        }
+
+
+def backtest_artifact_path(artifacts_dir: Path | str, job_id: int) -> Path:
+    return Path(artifacts_dir) / "backtests" / f"{job_id}.json"
+
+
+def _downsample_last(ts: np.ndarray, values: np.ndarray, max_points: int) -> tuple[np.ndarray, np.ndarray]:
+    if ts.shape[0] <= max_points:
+        return ts, values
+    idx = np.linspace(0, ts.shape[0] - 1, max_points).round().astype(np.int64)
+    return ts[idx], values[idx]
+
+
+def _first_exit(low: np.ndarray, high: np.ndarray, start: int, stop_price: float, take_price: float) -> int | None:
+    """Index of the first bar at or after ``start`` touching either level.
+
+    Scans in geometrically growing windows so short trades cost a few small
+    vector ops and long trades stay O(n) overall.
+    """
+    n = low.shape[0]
+    window = 256
+    pos = start
+    while pos < n:
+        stop = min(n, pos + window)
+        hit = (low[pos:stop] <= stop_price) | (high[pos:stop] >= take_price)
+        k = int(np.argmax(hit))
+        if hit[k]:
+            return pos + k
+        pos = stop
+        window *= 4
+    return None
+
+
+@dataclass
+class _SymbolData:
+    symbol: str
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    signal_idx: np.ndarray
+    signal_ts: np.ndarray
+
+    def next_signal(self, min_ts: int) -> int | None:
+        k = int(np.searchsorted(self.signal_ts, min_ts, side="left"))
+        if k >= self.signal_idx.shape[0]:
+            return None
+        return int(self.signal_idx[k])
+
+
+def run_backtest(
+    candles: Mapping[str, CandleSeries],
+    strategy: str,
+    knobs: Knobs | Mapping[str, Any],
+    fee_rate: float,
+    starting_cash: float,
+    progress: Callable[[float], None] | None = None,
+) -> BacktestResult:
+    """Simulate a bot's strategy and knobs over stored candles.
+
+    Entries fill at the signal bar's close with ``stake_amount`` quote. Exits
+    fill at the stop-loss / take-profit level (or the bar open when price gaps
+    through it); when both levels sit inside one bar the stop is assumed to
+    hit first. Fees follow the paper engine: ``fee_rate`` of the quote amount
+    on entry and of the proceeds on exit. Positions still open at the end are
+    closed at the last close with reason ``end_of_data``.
+    """
+    knobs = knobs if isinstance(knobs, Knobs) else Knobs.model_validate(dict(knobs))
+    signal_fn = get_strategy(strategy)
+
+    data: dict[str, _SymbolData] = {}
+    for symbol, series in candles.items():
+        if len(series) == 0:
+            continue
+        timestamp = np.asarray(series.timestamp, dtype=np.int64)
+        signals = np.asarray(signal_fn(series), dtype=bool)
+        # The last bar has no future to trade into.
+        signals[-1] = False
+        signal_idx = np.flatnonzero(signals)
+        data[symbol] = _SymbolData(
+            symbol=symbol,
+            timestamp=timestamp,
+            open=np.asarray(series.open, dtype=np.float64),
+            high=np.asarray(series.high, dtype=np.float64),
+            low=np.asarray(series.low, dtype=np.float64),
+            close=np.asarray(series.close, dtype=np.float64),
+            signal_idx=signal_idx,
+            signal_ts=timestamp[signal_idx],
+        )
+
+    if not data:
+        raise ValueError("No candles available for backtest")
+
+    stake = float(knobs.stake_amount)
+    entry_fee = stake * fee_rate
+    stop_factor = 1.0 - knobs.stop_loss_pct / 100.0
+    take_factor = 1.0 + knobs.take_profit_pct / 100.0
+    cooldown_ms = max(int(knobs.cooldown_minutes) * _MINUTE_MS, 1)
+
+    start_ts = min(int(item.timestamp[0]) for item in data.values())
+    end_ts = max(int(item.timestamp[-1]) for item in data.values())
+    span = max(end_ts - start_ts, 1)
+
+    candidates: list[tuple[int, str, int]] = []
+    for item in data.values():
+        first = item.next_signal(start_ts)
+        if first is not None:
+            candidates.append((int(item.timestamp[first]), item.symbol, first))
+    heapq.heapify(candidates)
+
+    open_exits: list[tuple[int, float]] = []  # (exit_ts, cash returned on exit)
+    cash = float(starting_cash)
+    trades: list[BacktestTrade] = []
+    last_reported = -1.0
+
+    while candidates:
+        entry_ts, symbol, index = heapq.heappop(candidates)
+        item = data[symbol]
+
+        while open_exits and open_exits[0][0] <= entry_ts:
+            cash += heapq.heappop(open_exits)[1]
+
+        if len(open_exits) >= knobs.max_open_trades or cash < stake + entry_fee:
+            if not open_exits:
+                continue
+            # Nothing can change until a position closes.
+            retry = item.next_signal(open_exits[0][0])
+            if retry is not None:
+                heapq.heappush(candidates, (int(item.timestamp[retry]), symbol, retry))
+            continue
+
+        entry_price = float(item.close[index])
+        qty = stake / entry_price
+        stop_price = entry_price * stop_factor
+        take_price = entry_price * take_factor
+
+        exit_index = _first_exit(item.low, item.high, index + 1, stop_price, take_price)
+        if exit_index is None:
+            exit_index = item.timestamp.shape[0] - 1
+            exit_price = float(item.close[exit_index])
+            reason = "end_of_data"
+        elif item.low[exit_index] <= stop_price:
+            exit_price = min(stop_price, float(item.open[exit_index]))
+            reason = "stop_loss"
+        else:
+            exit_price = max(take_price, float(item.open[exit_index]))
+            reason = "take_profit"
+
+        proceeds = qty * exit_price
+        exit_fee = proceeds * fee_rate
+        fees_total = entry_fee + exit_fee
+        realized = proceeds - stake - fees_total
+        exit_ts = int(item.timestamp[exit_index])
+
+        cash -= stake + entry_fee
+        heapq.heappush(open_exits, (exit_ts, proceeds - exit_fee))
+        trades.append(
+            BacktestTrade(
+                symbol=symbol,
+                entry_ts=entry_ts,
+                exit_ts=exit_ts,
+                entry_price=entry_price,
+                exit_price=exit_price,
+                qty=qty,
+                cost_basis_quote=stake,
+                fees_paid_quote=fees_total,
+                realized_pnl_quote=realized,
+                exit_reason=reason,
+            )
+        )
+
+        following = item.next_signal(exit_ts + cooldown_ms)
+        if following is not None:
+            heapq.heappush(candidates, (int(item.timestamp[following]), symbol, following))
+
+        if progress is not None:
+            fraction = (entry_ts - start_ts) / span
+            if fraction - last_reported >= 0.01:
+                last_reported = fraction
+                progress(fraction)
+
+    trades.sort(key=lambda trade: (trade.entry_ts, trade.symbol))
+    equity_ts, equity = _equity_curve(data, trades, float(starting_cash), fee_rate)
+    stats = _summary_stats(trades, equity, float(starting_cash), start_ts, end_ts)
+    if progress is not None:
+        progress(1.0)
+    return BacktestResult(trades=trades, equity_ts=equity_ts, equity=equity, stats=stats)
+
+
+def _equity_curve(
+    data: Mapping[str, _SymbolData],
+    trades: list[BacktestTrade],
+    starting_cash: float,
+    fee_rate: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Mark-to-market equity on the union of all symbols' bar times, fully vectorized."""
+    grid = np.unique(np.concatenate([item.timestamp for item in data.values()]))
+    cash_delta = np.zeros(grid.shape[0] + 1, dtype=np.float64)
+    positions_value = np.zeros(grid.shape[0], dtype=np.float64)
+
+    by_symbol: dict[str, list[BacktestTrade]] = {}
+    for trade in trades:
+        by_symbol.setdefault(trade.symbol, []).append(trade)
+
+    for symbol, symbol_trades in by_symbol.items():
+        item = data[symbol]
+        entry_pos = np.searchsorted(grid, [trade.entry_ts for trade in symbol_trades])
+        exit_pos = np.searchsorted(grid, [trade.exit_ts for trade in symbol_trades])
+        qty = np.array([trade.qty for trade in symbol_trades], dtype=np.float64)
+        cost = np.array([trade.cost_basis_quote for trade in symbol_trades], dtype=np.float64)
+        realized = np.array([trade.realized_pnl_quote for trade in symbol_trades], dtype=np.float64)
+
+        # Cash leaves at entry (stake + entry fee) and returns at exit (proceeds - exit fee).
+        cash_out = cost * (1.0 + fee_rate)
+        np.add.at(cash_delta, entry_pos, -cash_out)
+        np.add.at(cash_delta, exit_pos, cash_out + realized)
+
+        held_delta = np.zeros(grid.shape[0] + 1, dtype=np.float64)
+        np.add.at(held_delta, entry_pos, qty)
+        np.add.at(held_delta, exit_pos, -qty)
+        held = np.cumsum(held_delta[:-1])
+
+        bar = np.searchsorted(item.timestamp, grid, side="right") - 1
+        marks = np.where(bar >= 0, item.close[np.clip(bar, 0, None)], 0.0)
+        positions_value += held * marks
+
+    cash = starting_cash + np.cumsum(cash_delta[:-1])
+    return grid, cash + positions_value
+
+
+def _summary_stats(
+    trades: list[BacktestTrade],
+    equity: np.ndarray,
+    starting_cash: float,
+    start_ts: int,
+    end_ts: int,
+) -> dict[str, Any]:
+    realized = np.array([trade.realized_pnl_quote for trade in trades], dtype=np.float64)
+    wins = realized[realized > 0]
+    losses = realized[realized <= 0]
+    peak = np.maximum.accumulate(equity) if equity.shape[0] else equity
+    drawdown = (peak - equity) / np.where(peak > 0, peak, 1.0) if equity.shape[0] else equity
+    gross_loss = float(-losses.sum())
+    final_equity = float(equity[-1]) if equity.shape[0] else starting_cash
+
+    return {
+        "start_ts": start_ts,
+        "end_ts": end_ts,
+        "bars": int(equity.shape[0]),
+        "starting_cash": starting_cash,
+        "final_equity": final_equity,
+        "total_return_pct": (final_equity / starting_cash - 1.0) * 100.0 if starting_cash else None,
+        "realized_pnl_quote": float(realized.sum()),
+        "fees_paid_quote": float(sum(trade.fees_paid_quote for trade in trades)),
+        "trades": len(trades),
+        "wins": int(wins.shape[0]),
+        "losses": int(losses.shape[0]),
+        "win_rate": (wins.shape[0] / len(trades)) if trades else None,
+        "avg_trade_pnl_quote": float(realized.mean()) if trades else None,
+        "profit_factor": (float(wins.sum()) / gross_loss) if gross_loss > 0 else None,
+        "max_drawdown_pct": float(drawdown.max() * 100.0) if drawdown.shape[0] else 0.0,
+        "exit_reasons": {
+            reason: sum(1 for trade in trades if trade.exit_reason == reason)
+            for reason in ("take_profit", "stop_loss", "end_of_data")
+        },
+    }
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+# API -> bot runtime messages. Every runtime process subscribes and acts only
+# on the bots of its shard; the database stays the source of truth, so a lost
+# message is repaired by the runtime's periodic reconcile. ``config`` tells a
+# running bot to reload its cached settings (knobs) before its next tick.
+BOT_CONTROL_CHANNEL = "bots:control"
+BOT_CONTROL_ACTIONS = ("start", "stop", "config")
+
+
+def encode_control(action: str, bot_id: int, job_id: int | None = None) -> str:
+    if action not in BOT_CONTROL_ACTIONS:
+        raise ValueError(f"Unknown bot control action: {action}")
+    return json.dumps({"action": action, "bot_id": bot_id, "job_id": job_id})
+
+
+def decode_control(raw: str | bytes | None) -> dict[str, Any] | None:
+    if raw is None:
+        return None
+    try:
+        payload = json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(payload, dict) or payload.get("action") not in BOT_CONTROL_ACTIONS:
+        return None
+    try:
+        bot_id = int(payload["bot_id"])
+        job_id = int(payload["job_id"]) if payload.get("job_id") is not None else None
+    except (KeyError, TypeError, ValueError):
+        return None
+    return {"action": payload["action"], "bot_id": bot_id, "job_id": job_id}
+
+
+def owns_bot(bot_id: int, shard_index: int, shard_count: int) -> bool:
+    return shard_count <= 1 or bot_id % shard_count == shard_index
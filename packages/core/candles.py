@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import fcntl
+import math
+import os
+import shutil
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import ccxt
+import numpy as np
+
+from packages.core.exchange import get_exchange_pool
+from packages.core.settings import get_settings
+
+COLUMNS: tuple[str, ...] = ("timestamp", "open", "high", "low", "close", "volume")
+_DTYPES: dict[str, Any] = {
+    "timestamp": np.dtype("<i8"),
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "volume": np.dtype("<f8"),
+}
+# Binance returns at most 1000 candles per request.
+EXCHANGE_PAGE_LIMIT = 1000
+# Pages a sync may spend closing the gap after the last stored candle before
+# it starts the series over at the requested window instead.
+TAIL_BACKFILL_PAGES = 5
+
+OhlcvFetcher = Callable[[str, str, int, int], list[list[float | int]]]
+# Exchange weeks open on Monday 00:00 UTC; the Unix epoch was a Thursday.
+_WEEK_OFFSET_SECONDS = 4 * 86400
+
+
+def timeframe_ms(timeframe: str) -> int:
+    try:
+        seconds = ccxt.Exchange.parse_timeframe(timeframe)
+    except Exception as exc:
+        raise ValueError(f"Unsupported timeframe: {timeframe}") from exc
+    if seconds <= 0:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    return int(seconds * 1000)
+
+
+def candle_open(timeframe: str, at: float) -> float:
+    """Unix time the ``timeframe`` candle holding ``at`` opened.
+
+    Candles are aligned the way the exchange aligns them: to the UTC epoch,
+    weeks on Monday and months on the first of the month.
+    """
+    step = timeframe_ms(timeframe) / 1000
+    if timeframe.endswith("M"):
+        months = int(timeframe[:-1] or 1)
+        moment = datetime.fromtimestamp(at, timezone.utc)
+        index = (moment.year * 12 + moment.month - 1) // months * months
+        return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc).timestamp()
+    offset = _WEEK_OFFSET_SECONDS if timeframe.endswith("w") else 0.0
+    return math.floor((at - offset) / step) * step + offset
+
+
+def shift_candle_open(timeframe: str, opened: float, candles: int) -> float:
+    """Open time ``candles`` candles after (or, negative, before) the candle opened at ``opened``."""
+    if timeframe.endswith("M"):
+        months = int(timeframe[:-1] or 1)
+        moment = datetime.fromtimestamp(opened, timezone.utc)
+        index = moment.year * 12 + moment.month - 1 + candles * months
+        return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc).timestamp()
+    return opened + candles * timeframe_ms(timeframe) / 1000
+
+
+def next_candle_close(timeframe: str, after: float) -> float:
+    """Unix time of the first ``timeframe`` candle close strictly after ``after``."""
+    return shift_candle_open(timeframe, candle_open(timeframe, after), 1)
+
+
+def _open_ms(timeframe: str, at_ms: int) -> int:
+    return int(candle_open(timeframe, at_ms / 1000)) * 1000
+
+
+def _shift_ms(timeframe: str, opened_ms: int, candles: int) -> int:
+    return int(shift_candle_open(timeframe, opened_ms / 1000, candles)) * 1000
+
+
+@dataclass(frozen=True)
+class CandleSeries:
+    """Column views over stored candles; slices of read-only memory maps."""
+
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.timestamp.shape[0])
+
+    def slice(self, start: int, stop: int) -> CandleSeries:
+        return CandleSeries(*(getattr(self, name)[start:stop] for name in COLUMNS))
+
+    def between(self, since: int | None = None, until: int | None = None) -> CandleSeries:
+        """Candles with open time in ``[since, until]``, as views."""
+        lo = 0 if since is None else int(np.searchsorted(self.timestamp, since, side="left"))
+        hi = len(self) if until is None else int(np.searchsorted(self.timestamp, until, side="right"))
+        return self.slice(lo, hi)
+
+    def to_rows(self) -> list[list[float | int]]:
+        return [
+            [timestamp, *values]
+            for timestamp, *values in zip(*(getattr(self, name).tolist() for name in COLUMNS))
+        ]
+
+
+def _empty_series() -> CandleSeries:
+    return CandleSeries(*(np.empty(0, dtype=_DTYPES[name]) for name in COLUMNS))
+
+
+class CandleStore:
+    """Append-only columnar OHLCV store backed by memory-mapped NumPy arrays.
+
+    Layout: ``<root>/<BASE_QUOTE>/<timeframe>/<column>.bin``, one raw
+    little-endian array per column. Only closed candles are persisted. The
+    ``timestamp`` column is written last, so its length is the committed row
+    count; longer columns left by a crash are truncated on the next append.
+    Prepending rewrites every column into a new version directory and
+    switches the ``current`` symlink to it in one rename, after which the
+    column files live there. Readers hold a shared lock only while mapping
+    the files.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        fetch_ohlcv: OhlcvFetcher,
+        page_limit: int = EXCHANGE_PAGE_LIMIT,
+        tail_pages: int = TAIL_BACKFILL_PAGES,
+    ) -> None:
+        self.root = Path(root)
+        self._fetch_ohlcv = fetch_ohlcv
+        self.page_limit = page_limit
+        self.tail_pages = tail_pages
+
+    def series_dir(self, symbol: str, timeframe: str) -> Path:
+        safe_symbol = symbol.upper().replace("/", "_").replace(":", "_")
+        return self.root / safe_symbol / timeframe
+
+    @contextmanager
+    def _locked(self, directory: Path, exclusive: bool) -> Iterator[None]:
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / ".lock", "a+b") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _data_dir(self, directory: Path) -> Path:
+        """Where the column files live: the ``current`` version once a prepend has run."""
+        current = directory / "current"
+        return current if current.is_symlink() else directory
+
+    def _committed_rows(self, directory: Path) -> int:
+        path = self._data_dir(directory) / "timestamp.bin"
+        if not path.exists():
+            return 0
+        return path.stat().st_size // _DTYPES["timestamp"].itemsize
+
+    def _map(self, directory: Path) -> CandleSeries:
+        rows = self._committed_rows(directory)
+        if rows == 0:
+            return _empty_series()
+        data = self._data_dir(directory)
+        return CandleSeries(
+            *(np.memmap(data / f"{name}.bin", dtype=_DTYPES[name], mode="r", shape=(rows,)) for name in COLUMNS)
+        )
+
+    def read(self, symbol: str, timeframe: str) -> CandleSeries:
+        directory = self.series_dir(symbol, timeframe)
+        if not directory.exists():
+            return _empty_series()
+        with self._locked(directory, exclusive=False):
+            return self._map(directory)
+
+    def _append(self, directory: Path, rows: list[list[float | int]]) -> None:
+        committed = self._committed_rows(directory)
+        data = self._data_dir(directory)
+        columns = list(zip(*rows))
+        for index, name in reversed(list(enumerate(COLUMNS))):
+            path = data / f"{name}.bin"
+            with open(path, "ab") as handle:
+                handle.truncate(committed * _DTYPES[name].itemsize)
+                handle.write(np.asarray(columns[index], dtype=_DTYPES[name]).tobytes())
+                handle.flush()
+                os.fsync(handle.fileno())
+
+    def _rewrite(self, directory: Path, head: list[list[float | int]], replace: bool = False) -> None:
+        """Prepend older candles, or with ``replace`` start the series over; the only operations that rewrite files.
+
+        Swapping column files one by one would leave columns of different
+        versions side by side after a crash, so the merged columns go to a new
+        version directory and a single ``current`` rename commits all of them.
+        """
+        existing = _empty_series() if replace else self._map(directory)
+        columns = list(zip(*head))
+        version = directory / f"v{time.time_ns()}"
+        version.mkdir()
+        for index, name in enumerate(COLUMNS):
+            merged = np.concatenate([np.asarray(columns[index], dtype=_DTYPES[name]), getattr(existing, name)])
+            with open(version / f"{name}.bin", "wb") as handle:
+                handle.write(merged.tobytes())
+                handle.flush()
+                os.fsync(handle.fileno())
+
+        link = directory / "current.tmp"
+        link.unlink(missing_ok=True)
+        link.symlink_to(version.name)
+        os.replace(link, directory / "current")
+        directory_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+
+        # Superseded data: pre-version column files and older (or crash-orphaned) versions.
+        # Readers that mapped them keep their pages until they unmap.
+        for name in COLUMNS:
+            (directory / f"{name}.bin").unlink(missing_ok=True)
+        for stale in directory.glob("v*"):
+            if stale.is_dir() and stale != version:
+                shutil.rmtree(stale, ignore_errors=True)
+
+    def _origin(self, directory: Path) -> int | None:
+        """Earliest open time already requested from the exchange for this series."""
+        try:
+            return int((directory / ".origin").read_text().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _set_origin(self, directory: Path, origin: int) -> None:
+        (directory / ".origin").write_text(str(origin))
+
+    def _fetch_range(self, symbol: str, timeframe: str, start: int, end: int) -> list[list[float | int]]:
+        """Page through ``[start, end]`` (candle open times) in exchange-sized chunks."""
+        rows: list[list[float | int]] = []
+        cursor = start
+        while cursor <= end:
+            page = self._fetch_ohlcv(symbol, timeframe, cursor, self.page_limit)
+            if not page:
+                break
+            for row in page:
+                timestamp = int(row[0])
+                if timestamp < cursor or timestamp > end:
+                    continue
+                rows.append([timestamp, *(float(value) for value in row[1:6])])
+            # Months differ in length; the next page starts after the last candle seen.
+            next_cursor = int(page[-1][0]) + 1
+            if next_cursor <= cursor or len(page) < self.page_limit:
+                break
+            cursor = next_cursor
+        return rows
+
+    def sync(self, symbol: str, timeframe: str, since: int | None = None, until: int | None = None) -> None:
+        """Persist closed candles so the store covers ``[since, until]``.
+
+        Only the missing head (before the first stored candle) and tail (after
+        the last stored candle) are fetched from the exchange. A tail gap of
+        more than ``tail_pages`` pages that the request does not reach into is
+        not backfilled: the series starts over at the requested window (the
+        newest page without ``since``), and earlier candles are fetched again
+        when asked for.
+        """
+        last_closed = _shift_ms(timeframe, _open_ms(timeframe, int(time.time() * 1000)), -1)
+        end = last_closed if until is None else min(_open_ms(timeframe, until), last_closed)
+        start = _open_ms(timeframe, since) if since is not None else None
+
+        directory = self.series_dir(symbol, timeframe)
+        with self._locked(directory, exclusive=True):
+            stored = self._map(directory)
+            origin = self._origin(directory)
+            if len(stored) == 0:
+                if start is None or start > end:
+                    return
+                rows = self._fetch_range(symbol, timeframe, start, end)
+                if rows:
+                    self._append(directory, rows)
+                self._set_origin(directory, start)
+                return
+
+            first = int(stored.timestamp[0])
+            last = int(stored.timestamp[-1])
+
+            # Skip the head fetch when an earlier request already found nothing
+            # before the first stored candle (e.g. the pair listed later).
+            if start is not None and start < min(first, origin if origin is not None else first):
+                head = self._fetch_range(symbol, timeframe, start, first - 1)
+                if head:
+                    self._rewrite(directory, head)
+                self._set_origin(directory, start)
+
+            if last >= end:
+                return
+            needed = start if start is not None else _shift_ms(timeframe, end, 1 - self.page_limit)
+            if needed > _shift_ms(timeframe, last, self.page_limit * self.tail_pages):
+                rows = self._fetch_range(symbol, timeframe, needed, end)
+                if rows:
+                    self._rewrite(directory, rows, replace=True)
+                    self._set_origin(directory, needed)
+                return
+            tail = self._fetch_range(symbol, timeframe, last + 1, end)
+            if tail:
+                self._append(directory, tail)
+
+    def load(
+        self,
+        symbol: str,
+        timeframe: str,
+        since: int | None = None,
+        until: int | None = None,
+        limit: int | None = None,
+    ) -> CandleSeries:
+        """Sync the requested window and return it as zero-copy column views.
+
+        Without ``since`` the newest ``limit`` closed candles up to ``until`` are
+        returned; with ``since`` the window starts there and ``limit`` caps it.
+        """
+        if since is None and limit is not None:
+            anchor = until if until is not None else int(time.time() * 1000)
+            since_for_sync = _shift_ms(timeframe, _open_ms(timeframe, anchor), -limit)
+        else:
+            since_for_sync = since
+        self.sync(symbol, timeframe, since=since_for_sync, until=until)
+
+        series = self.read(symbol, timeframe).between(since, until)
+        if limit is None or len(series) <= limit:
+            return series
+        if since is None:
+            return series.slice(len(series) - limit, len(series))
+        return series.slice(0, limit)
+
+    def fetch_partial(self, symbol: str, timeframe: str) -> list[float | int] | None:
+        """Return the still-forming candle, which is never persisted."""
+        current_open = _open_ms(timeframe, int(time.time() * 1000))
+        page = self._fetch_ohlcv(symbol, timeframe, current_open, 1)
+        for row in page or []:
+            if int(row[0]) == current_open:
+                return [int(row[0]), *(float(value) for value in row[1:6])]
+        return None
+
+
+def _fetch_ohlcv_page(symbol: str, timeframe: str, since: int, limit: int) -> list[list[float | int]]:
+    return get_exchange_pool().call(
+        lambda exchange: exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
+    )
+
+
+@lru_cache(maxsize=1)
+def get_candle_store() -> CandleStore:
+    return CandleStore(root=Path(get_settings().artifacts_dir) / "candles", fetch_ohlcv=_fetch_ohlcv_page)
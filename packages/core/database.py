@@ -1,9 +1,13 @@
 from __future__ import annotations
 
-from collections.abc import AsyncGenerator, Generator
+import threading
+from collections.abc import AsyncGenerator, Generator, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
 from functools import lru_cache
+from typing import Any
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
@@ -32,6 +36,38 @@ def get_async_session_factory() -> async_sessionmaker[AsyncSession]:
     return async_sessionmaker(bind=get_async_engine(), autoflush=False, expire_on_commit=False)
 
 
+@dataclass
+class StatementCounter:
+    statements: int = 0
+
+
+_counters = threading.local()
+
+
+def _count_statement(*_: Any) -> None:
+    counter: StatementCounter | None = getattr(_counters, "active", None)
+    if counter is not None:
+        counter.statements += 1
+
+
+@lru_cache(maxsize=1)
+def _install_statement_counter() -> None:
+    event.listen(get_sync_engine(), "before_cursor_execute", _count_statement)
+
+
+@contextmanager
+def count_statements() -> Iterator[StatementCounter]:
+    """Count the SQL statements the sync engine runs on this thread inside the block."""
+    _install_statement_counter()
+    counter = StatementCounter()
+    previous = getattr(_counters, "active", None)
+    _counters.active = counter
+    try:
+        yield counter
+    finally:
+        _counters.active = previous
+
+
 def SessionLocal() -> Session:
     """Backwards-compatible session constructor used by worker tasks."""
     return get_session_factory()()
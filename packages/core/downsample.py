@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points Largest-Triangle-Three-Buckets keeps, in order.
+
+    The first and last points are always kept; the rest are split into
+    ``threshold - 2`` buckets and each contributes the point forming the
+    largest triangle with the previously kept point and the next bucket's
+    average, which preserves peaks and troughs a plain stride would drop.
+    Areas are computed per bucket with NumPy, so the Python loop runs
+    ``threshold`` times regardless of input size.
+    """
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1]) if threshold == 2 else np.array([0])
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    anchor = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_x = x[end : edges[bucket + 2]].mean()
+            next_y = y[end : edges[bucket + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs(
+            (x[anchor] - next_x) * (y[start:end] - y[anchor]) - (x[anchor] - x[start:end]) * (next_y - y[anchor])
+        )
+        anchor = start + int(np.argmax(area))
+        selected[bucket + 1] = anchor
+    return selected
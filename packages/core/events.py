@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+from typing import Any
+
+import redis
+
+# Capped Redis Stream carrying every runtime event. Each entry holds one
+# encoded message under ``data``; SSE event ids are ``<entry id>:<index>``.
+EVENTS_STREAM_KEY = "events:stream"
+
+# Live delivery is partitioned by topic: bot/job events go to
+# ``events:bot:<bot_id|_>:job:<job_id|_>`` and market data to ``events:market``,
+# so subscribers pattern-match only what they watch.
+MARKET_TOPIC = "events:market"
+_NO_ID = "_"
+
+# XADD the batch to the stream, then PUBLISH each topic's share of it prefixed
+# with the entry id, atomically so stream order and publish order agree.
+# ARGV: maxlen, stream message, then (channel, message) pairs.
+PUBLISH_EVENTS_LUA = """
+local entry_id = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[1], '*', 'data', ARGV[2])
+for i = 3, #ARGV, 2 do
+    redis.call('PUBLISH', ARGV[i], entry_id .. ' ' .. ARGV[i + 1])
+end
+return entry_id
+"""
+
+
+def event_envelope(name: str, data: dict[str, Any]) -> dict[str, Any]:
+    return {"event": name, "data": data}
+
+
+def encode_events(events: list[dict[str, Any]], default: Callable[[Any], Any] = str) -> str:
+    """One message for a batch: a plain envelope for a single event, ``{"events": [...]}`` otherwise."""
+    if len(events) == 1:
+        return json.dumps(events[0], default=default)
+    return json.dumps({"events": events}, default=default)
+
+
+def stream_fields(events: list[dict[str, Any]], default: Callable[[Any], Any] = str) -> dict[str, str]:
+    return {"data": encode_events(events, default=default)}
+
+
+def _topic_id(value: Any) -> str:
+    return str(value) if isinstance(value, int) else _NO_ID
+
+
+def event_topic(name: str, data: dict[str, Any]) -> str:
+    if name.startswith("market."):
+        return MARKET_TOPIC
+    return f"events:bot:{_topic_id(data.get('bot_id'))}:job:{_topic_id(data.get('job_id'))}"
+
+
+def topic_pattern(bot_id: int | None, job_id: int | None) -> str:
+    """Channel pattern for a ``bot_id`` / ``job_id`` filter; None matches anything."""
+    bot_part = "*" if bot_id is None else str(bot_id)
+    job_part = "*" if job_id is None else str(job_id)
+    return f"events:bot:{bot_part}:job:{job_part}"
+
+
+def publish_args(
+    events: list[dict[str, Any]],
+    maxlen: int,
+    default: Callable[[Any], Any] = str,
+) -> list[Any]:
+    """``PUBLISH_EVENTS_LUA`` arguments: the whole batch for the stream, plus each topic's events with their indexes."""
+    topics: dict[str, list[list[Any]]] = {}
+    for index, envelope in enumerate(events):
+        topics.setdefault(event_topic(envelope["event"], envelope["data"]), []).append([index, envelope])
+    args: list[Any] = [maxlen, encode_events(events, default=default)]
+    for channel, indexed in topics.items():
+        args.extend((channel, json.dumps({"events": indexed}, default=default)))
+    return args
+
+
+def event_id(entry_id: str, index: int) -> str:
+    return f"{entry_id}:{index}"
+
+
+def parse_event_id(value: str | None) -> tuple[int, int, int] | None:
+    """``"<ms>-<seq>:<index>"`` as a sortable tuple; a bare entry id means its index 0."""
+    if not value:
+        return None
+    entry_id, _, index = value.strip().partition(":")
+    ms, _, seq = entry_id.partition("-")
+    try:
+        return int(ms), int(seq or 0), int(index or 0)
+    except ValueError:
+        return None
+
+
+def decode_events(raw: str | bytes | None) -> list[tuple[str, dict[str, Any]]]:
+    """Unpack a bus message into ``(event_name, data)`` pairs, in publish order."""
+    if raw is None:
+        return []
+    try:
+        payload = json.loads(raw)
+    except (TypeError, ValueError):
+        return []
+    if not isinstance(payload, dict):
+        return []
+
+    envelopes = payload["events"] if isinstance(payload.get("events"), list) else [payload]
+    return [decoded for envelope in envelopes if (decoded := _decode_envelope(envelope)) is not None]
+
+
+def _decode_envelope(envelope: Any) -> tuple[str, dict[str, Any]] | None:
+    if not isinstance(envelope, dict):
+        return None
+    data = envelope.get("data", {})
+    if not isinstance(data, dict):
+        data = {"value": data}
+    return str(envelope.get("event", "system.notice")), data
+
+
+def decode_topic_message(raw: str | bytes | None) -> tuple[str, list[tuple[int, str, dict[str, Any]]]]:
+    """Unpack a topic channel message into its entry id and ``(index, event_name, data)`` triples."""
+    if raw is None:
+        return "", []
+    if isinstance(raw, bytes):
+        raw = raw.decode("utf-8")
+    entry_id, _, body = raw.partition(" ")
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return entry_id, []
+    indexed = payload.get("events") if isinstance(payload, dict) else None
+    decoded: list[tuple[int, str, dict[str, Any]]] = []
+    for item in indexed if isinstance(indexed, list) else []:
+        if not (isinstance(item, list) and len(item) == 2 and isinstance(item[0], int)):
+            continue
+        envelope = _decode_envelope(item[1])
+        if envelope is not None:
+            decoded.append((item[0], *envelope))
+    return entry_id, decoded
+
+
+def publish_events(client: redis.Redis, events: list[dict[str, Any]], maxlen: int) -> str:
+    """Append one stream entry for the batch and publish it to its topics; returns the entry id."""
+    script = client.register_script(PUBLISH_EVENTS_LUA)
+    return script(keys=[EVENTS_STREAM_KEY], args=publish_args(events, maxlen))
+
+
+class EventBuffer:
+    """Collects events and publishes them as one batched stream entry (and one message per topic) on ``flush``.
+
+    Use as a context manager to flush on exit, e.g. once per bot tick.
+    """
+
+    def __init__(self, client: redis.Redis, maxlen: int) -> None:
+        self._client = client
+        self._maxlen = maxlen
+        self._events: list[dict[str, Any]] = []
+
+    def add(self, name: str, data: dict[str, Any]) -> None:
+        self._events.append(event_envelope(name, data))
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def flush(self) -> None:
+        if not self._events:
+            return
+        events, self._events = self._events, []
+        publish_events(self._client, events, self._maxlen)
+
+    def __enter__(self) -> EventBuffer:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.flush()
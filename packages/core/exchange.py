@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+import ccxt
+
+from packages.core.settings import get_settings
+
+T = TypeVar("T")
+
+
+@dataclass
+class _PooledClient:
+    exchange: Any
+    markets_generation: int
+
+
+class ExchangeClientPool:
+    """Process-wide pool of long-lived ccxt clients sharing one markets table.
+
+    Clients keep their HTTP session (and TLS connection) between calls, so a
+    ticker lookup costs one request instead of a markets download plus a new
+    handshake. The pool is thread-safe; async callers go through
+    ``asyncio.to_thread`` like the rest of the codebase.
+    """
+
+    def __init__(
+        self,
+        exchange_id: str = "binance",
+        max_size: int = 4,
+        markets_refresh_seconds: float = 3600.0,
+        acquire_timeout_seconds: float = 30.0,
+    ) -> None:
+        self.exchange_id = exchange_id
+        self.max_size = max(int(max_size), 1)
+        self.markets_refresh_seconds = float(markets_refresh_seconds)
+        self.acquire_timeout_seconds = float(acquire_timeout_seconds)
+
+        self._lock = threading.Lock()
+        self._markets_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._idle: list[_PooledClient] = []
+        self._created = 0
+
+        self._markets: dict[str, Any] | None = None
+        self._currencies: dict[str, Any] | None = None
+        self._markets_generation = 0
+        self._markets_loaded_at: float | None = None
+
+        self._refresh_stop = threading.Event()
+        self._refresh_thread: threading.Thread | None = None
+
+        self._hits = 0
+        self._misses = 0
+        self._calls = 0
+        self._errors = 0
+        self._total_latency_ms = 0.0
+        self._max_latency_ms = 0.0
+        self._market_refreshes = 0
+        self._market_refresh_errors = 0
+
+    def _build_exchange(self) -> Any:
+        exchange_cls = getattr(ccxt, self.exchange_id)
+        return exchange_cls({"enableRateLimit": True})
+
+    def _ensure_markets(self, exchange: Any) -> int:
+        with self._markets_lock:
+            if self._markets is None:
+                exchange.load_markets()
+                self._markets = exchange.markets
+                self._currencies = exchange.currencies
+                self._markets_generation += 1
+                self._markets_loaded_at = time.time()
+                self._start_refresh_thread()
+            else:
+                exchange.set_markets(self._markets, self._currencies)
+            return self._markets_generation
+
+    def _start_refresh_thread(self) -> None:
+        if self.markets_refresh_seconds <= 0 or self._refresh_thread is not None:
+            return
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_markets_loop,
+            name=f"{self.exchange_id}-markets-refresh",
+            daemon=True,
+        )
+        self._refresh_thread.start()
+
+    def _refresh_markets_loop(self) -> None:
+        while not self._refresh_stop.wait(self.markets_refresh_seconds):
+            try:
+                self.refresh_markets()
+            except Exception:  # pragma: no cover - network dependent
+                with self._lock:
+                    self._market_refresh_errors += 1
+
+    def refresh_markets(self) -> None:
+        """Reload markets on a dedicated client and publish them to the pool."""
+        exchange = self._build_exchange()
+        try:
+            exchange.load_markets(reload=True)
+        finally:
+            _close_exchange(exchange)
+
+        with self._markets_lock:
+            self._markets = exchange.markets
+            self._currencies = exchange.currencies
+            self._markets_generation += 1
+            self._markets_loaded_at = time.time()
+        with self._lock:
+            self._market_refreshes += 1
+
+    @contextmanager
+    def acquire(self) -> Iterator[Any]:
+        if not self._slots.acquire(timeout=self.acquire_timeout_seconds):
+            raise TimeoutError(f"Timed out waiting for a pooled {self.exchange_id} client")
+
+        pooled: _PooledClient | None = None
+        try:
+            with self._lock:
+                if self._idle:
+                    pooled = self._idle.pop()
+                    self._hits += 1
+                else:
+                    self._misses += 1
+
+            if pooled is None:
+                exchange = self._build_exchange()
+                try:
+                    generation = self._ensure_markets(exchange)
+                except Exception:
+                    _close_exchange(exchange)
+                    raise
+                pooled = _PooledClient(exchange=exchange, markets_generation=generation)
+                with self._lock:
+                    self._created += 1
+            elif pooled.markets_generation != self._markets_generation:
+                pooled.markets_generation = self._ensure_markets(pooled.exchange)
+
+            yield pooled.exchange
+        finally:
+            if pooled is not None:
+                with self._lock:
+                    self._idle.append(pooled)
+            self._slots.release()
+
+    def call(self, fn: Callable[[Any], T]) -> T:
+        started = time.perf_counter()
+        try:
+            with self.acquire() as exchange:
+                return fn(exchange)
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            with self._lock:
+                self._calls += 1
+                self._total_latency_ms += elapsed_ms
+                self._max_latency_ms = max(self._max_latency_ms, elapsed_ms)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "exchange": self.exchange_id,
+                "max_size": self.max_size,
+                "created": self._created,
+                "idle": len(self._idle),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": (self._hits / lookups) if lookups else None,
+                "calls": self._calls,
+                "errors": self._errors,
+                "avg_latency_ms": (self._total_latency_ms / self._calls) if self._calls else None,
+                "max_latency_ms": self._max_latency_ms if self._calls else None,
+                "markets_age_seconds": (
+                    time.time() - self._markets_loaded_at if self._markets_loaded_at is not None else None
+                ),
+                "market_refreshes": self._market_refreshes,
+                "market_refresh_errors": self._market_refresh_errors,
+            }
+
+    def close(self) -> None:
+        self._refresh_stop.set()
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            _close_exchange(pooled.exchange)
+
+
+def _close_exchange(exchange: Any) -> None:
+    close_method = getattr(exchange, "close", None)
+    if callable(close_method):
+        close_method()
+
+
+_pool: ExchangeClientPool | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+
+def get_exchange_pool() -> ExchangeClientPool:
+    """Return this process's pool, rebuilding it after a fork (Celery prefork)."""
+    global _pool, _pool_pid
+
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            settings = get_settings()
+            _pool = ExchangeClientPool(
+                exchange_id="binance",
+                max_size=settings.exchange_pool_size,
+                markets_refresh_seconds=settings.exchange_markets_refresh_seconds,
+            )
+            _pool_pid = pid
+        return _pool
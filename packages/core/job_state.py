@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+# Transient job progress lives in one Redis hash per job; the ``jobs`` row is
+# written on state transitions and at a coarse checkpoint cadence only.
+JOB_STATE_KEY_PREFIX = "jobs:state:"
+ACTIVE_JOB_STATUSES = ("queued", "running")
+
+
+@dataclass(frozen=True)
+class JobState:
+    job_id: int
+    status: str
+    progress: int
+    message: str | None
+    updated_at: datetime
+
+
+def job_state_key(job_id: int) -> str:
+    return f"{JOB_STATE_KEY_PREFIX}{job_id}"
+
+
+def store_job_state(pipe: Any, state: JobState, ttl_seconds: int) -> None:
+    """Queue ``state`` on a Redis pipeline; it expires so a dead worker's progress falls back to the row."""
+    key = job_state_key(state.job_id)
+    pipe.delete(key)
+    fields = {
+        "status": state.status,
+        "progress": str(state.progress),
+        "updated_at": state.updated_at.isoformat(),
+    }
+    if state.message is not None:
+        fields["message"] = state.message
+    pipe.hset(key, mapping=fields)
+    pipe.expire(key, ttl_seconds)
+
+
+def decode_job_state(job_id: int, raw: Mapping[str, str] | None) -> JobState | None:
+    if not raw:
+        return None
+    try:
+        return JobState(
+            job_id=job_id,
+            status=raw["status"],
+            progress=int(raw["progress"]),
+            message=raw.get("message"),
+            updated_at=datetime.fromisoformat(raw["updated_at"]),
+        )
+    except (KeyError, ValueError):
+        return None
+
+
+async def load_job_states(client: Any, job_ids: Iterable[int]) -> dict[int, JobState]:
+    """Transient states of ``job_ids`` through an asyncio Redis client; jobs without one are left out."""
+    job_ids = list(job_ids)
+    if not job_ids:
+        return {}
+    async with client.pipeline(transaction=False) as pipe:
+        for job_id in job_ids:
+            pipe.hgetall(job_state_key(job_id))
+        raw_states = await pipe.execute()
+    states = (decode_job_state(job_id, raw) for job_id, raw in zip(job_ids, raw_states))
+    return {state.job_id: state for state in states if state is not None}
+
+
+def overlay_job_states(rows: Iterable[dict[str, Any]], states: Mapping[int, JobState]) -> None:
+    """Apply transient states to active job rows, in place.
+
+    A row that already reached a terminal status is authoritative, so a late
+    progress write can never resurrect a finished job.
+    """
+    for row in rows:
+        state = states.get(row["id"]) if row.get("status") in ACTIVE_JOB_STATUSES else None
+        if state is None:
+            continue
+        row["status"] = state.status
+        row["progress"] = state.progress
+        row["message"] = state.message
+        row["updated_at"] = max(row["updated_at"], state.updated_at)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import Insert, insert
+
+from packages.core.models import BotLedger, Trade
+
+
+def _ledger_delta(
+    bot_id: int,
+    realized_pnl_quote: float = 0.0,
+    open_locked_cost_quote: float = 0.0,
+    fees_paid_quote: float = 0.0,
+    open_trades: int = 0,
+    closed_trades: int = 0,
+) -> Insert:
+    """Upsert that adds the deltas to the bot's ledger row in the caller's transaction."""
+    values = {
+        "realized_pnl_quote": realized_pnl_quote,
+        "open_locked_cost_quote": open_locked_cost_quote,
+        "fees_paid_quote": fees_paid_quote,
+        "open_trades": open_trades,
+        "closed_trades": closed_trades,
+    }
+    table = BotLedger.__table__
+    stmt = insert(table).values(bot_id=bot_id, **values)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.bot_id],
+        set_={**{name: table.c[name] + stmt.excluded[name] for name in values}, "updated_at": func.now()},
+    )
+
+
+def ledger_trade_opened(trade: Trade) -> Insert:
+    locked = float((trade.cost_basis_quote or 0.0) + (trade.fees_paid_quote or 0.0))
+    return _ledger_delta(
+        trade.bot_id,
+        open_locked_cost_quote=locked,
+        fees_paid_quote=float(trade.fees_paid_quote or 0.0),
+        open_trades=1,
+    )
+
+
+def ledger_trade_closed(trade: Trade, entry_fees_quote: float, exit_fee_quote: float) -> Insert:
+    return _ledger_delta(
+        trade.bot_id,
+        realized_pnl_quote=float(trade.realized_pnl_quote or 0.0),
+        open_locked_cost_quote=-float((trade.cost_basis_quote or 0.0) + entry_fees_quote),
+        fees_paid_quote=float(exit_fee_quote),
+        open_trades=-1,
+        closed_trades=1,
+    )
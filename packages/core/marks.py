@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import Float, String, column, select, update, values
+from sqlalchemy.orm import Session
+
+from packages.core.models import Trade
+
+# Live marks between Postgres checkpoints: one hash per open trade, plus the
+# set of a bot's marked trade ids so a stopping bot can flush them, and the
+# bot's equity at those marks for reads between snapshots.
+LIVE_MARK_KEY_PREFIX = "marks:trade:"
+LIVE_MARKS_BOT_KEY_PREFIX = "marks:bot:"
+LIVE_PORTFOLIO_KEY_PREFIX = "marks:portfolio:"
+
+
+@dataclass(frozen=True)
+class MarkedTrade:
+    trade_id: int
+    bot_id: int | None
+    symbol: str
+    price: float
+    amount: float
+    unrealized_pnl_quote: float
+
+    @property
+    def mark_value(self) -> float:
+        return self.amount * self.price
+
+
+@dataclass(frozen=True)
+class OpenPosition:
+    trade_id: int
+    bot_id: int | None
+    symbol: str
+    amount: float
+    cost_basis_quote: float
+    fees_paid_quote: float
+    unrealized_pnl_quote: float | None
+
+    def mark(self, price: float) -> MarkedTrade:
+        """The mark ``mark_open_trades`` would write at ``price``."""
+        return MarkedTrade(
+            trade_id=self.trade_id,
+            bot_id=self.bot_id,
+            symbol=self.symbol,
+            price=price,
+            amount=self.amount,
+            unrealized_pnl_quote=self.amount * price - self.cost_basis_quote - self.fees_paid_quote,
+        )
+
+    @property
+    def checkpointed_value(self) -> float:
+        """Position value without a current price: the last checkpointed mark, else what it cost."""
+        return self.cost_basis_quote + self.fees_paid_quote + (self.unrealized_pnl_quote or 0.0)
+
+
+@dataclass(frozen=True)
+class LiveMark:
+    trade_id: int
+    symbol: str
+    price: float
+    unrealized_pnl_quote: float
+    marked_at: datetime
+
+
+@dataclass(frozen=True)
+class LivePortfolio:
+    bot_id: int
+    equity: float
+    cash: float
+    positions_value: float
+    marked_at: datetime
+
+
+def live_mark_key(trade_id: int) -> str:
+    return f"{LIVE_MARK_KEY_PREFIX}{trade_id}"
+
+
+def live_marks_bot_key(bot_id: int) -> str:
+    return f"{LIVE_MARKS_BOT_KEY_PREFIX}{bot_id}"
+
+
+def live_portfolio_key(bot_id: int) -> str:
+    return f"{LIVE_PORTFOLIO_KEY_PREFIX}{bot_id}"
+
+
+def mark_open_trades(
+    session: Session,
+    prices: Mapping[str, float],
+    bot_ids: Sequence[int] | None = None,
+) -> list[MarkedTrade]:
+    """Mark every open trade on the priced symbols in one ``UPDATE ... FROM (VALUES ...)``.
+
+    ``bot_ids`` narrows the update to those bots; by default every bot holding
+    one of the symbols is marked. Runs in the caller's transaction and returns
+    the updated rows.
+    """
+    if not prices or (bot_ids is not None and not bot_ids):
+        return []
+
+    marks = values(column("symbol", String), column("price", Float), name="marks").data(
+        [(symbol, float(price)) for symbol, price in prices.items()]
+    )
+    unrealized = Trade.amount * marks.c.price - Trade.cost_basis_quote - Trade.fees_paid_quote
+    stmt = (
+        update(Trade)
+        .where(Trade.symbol == marks.c.symbol, Trade.status == "open")
+        .values(unrealized_pnl_quote=unrealized, pnl=unrealized)
+        .returning(
+            Trade.id,
+            Trade.bot_id,
+            Trade.symbol,
+            marks.c.price,
+            Trade.amount,
+            Trade.unrealized_pnl_quote,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if bot_ids is not None:
+        stmt = stmt.where(Trade.bot_id.in_(list(bot_ids)))
+
+    return [
+        MarkedTrade(
+            trade_id=row.id,
+            bot_id=row.bot_id,
+            symbol=row.symbol,
+            price=float(row.price),
+            amount=float(row.amount),
+            unrealized_pnl_quote=float(row.unrealized_pnl_quote),
+        )
+        for row in session.execute(stmt)
+    ]
+
+
+def read_open_positions(session: Session, bot_ids: Sequence[int]) -> list[OpenPosition]:
+    """Every open trade of ``bot_ids`` in one indexed read, priced or not."""
+    if not bot_ids:
+        return []
+    query = select(
+        Trade.id,
+        Trade.bot_id,
+        Trade.symbol,
+        Trade.amount,
+        Trade.cost_basis_quote,
+        Trade.fees_paid_quote,
+        Trade.unrealized_pnl_quote,
+    ).where(Trade.bot_id.in_(list(bot_ids)), Trade.status == "open")
+    return [
+        OpenPosition(
+            trade_id=row.id,
+            bot_id=row.bot_id,
+            symbol=row.symbol,
+            amount=float(row.amount),
+            cost_basis_quote=float(row.cost_basis_quote or 0.0),
+            fees_paid_quote=float(row.fees_paid_quote or 0.0),
+            unrealized_pnl_quote=None if row.unrealized_pnl_quote is None else float(row.unrealized_pnl_quote),
+        )
+        for row in session.execute(query)
+    ]
+
+
+def store_live_marks(
+    pipe: Any,
+    bot_id: int,
+    marked: Iterable[MarkedTrade],
+    marked_at: datetime,
+    ttl_seconds: int,
+) -> None:
+    """Queue the bot's live marks on a Redis pipeline, replacing its previous set of marked trades.
+
+    Keys expire after ``ttl_seconds`` so marks of a bot that died between
+    checkpoints fall back to the last values in Postgres.
+    """
+    bot_key = live_marks_bot_key(bot_id)
+    pipe.delete(bot_key)
+    trade_ids: list[int] = []
+    for mark in marked:
+        key = live_mark_key(mark.trade_id)
+        pipe.hset(
+            key,
+            mapping={
+                "symbol": mark.symbol,
+                "price": repr(mark.price),
+                "unrealized_pnl_quote": repr(mark.unrealized_pnl_quote),
+                "marked_at": marked_at.isoformat(),
+            },
+        )
+        pipe.expire(key, ttl_seconds)
+        trade_ids.append(mark.trade_id)
+    if trade_ids:
+        pipe.sadd(bot_key, *trade_ids)
+        pipe.expire(bot_key, ttl_seconds)
+
+
+def decode_live_mark(trade_id: int, raw: Mapping[str, str] | None) -> LiveMark | None:
+    if not raw:
+        return None
+    try:
+        return LiveMark(
+            trade_id=trade_id,
+            symbol=raw["symbol"],
+            price=float(raw["price"]),
+            unrealized_pnl_quote=float(raw["unrealized_pnl_quote"]),
+            marked_at=datetime.fromisoformat(raw["marked_at"]),
+        )
+    except (KeyError, ValueError):
+        return None
+
+
+async def load_live_marks(client: Any, trade_ids: Iterable[int]) -> dict[int, LiveMark]:
+    """Live marks of ``trade_ids`` through an asyncio Redis client; missing or expired marks are left out."""
+    trade_ids = list(trade_ids)
+    if not trade_ids:
+        return {}
+    async with client.pipeline(transaction=False) as pipe:
+        for trade_id in trade_ids:
+            pipe.hgetall(live_mark_key(trade_id))
+        raw_marks = await pipe.execute()
+    marks = (decode_live_mark(trade_id, raw) for trade_id, raw in zip(trade_ids, raw_marks))
+    return {mark.trade_id: mark for mark in marks if mark is not None}
+
+
+def overlay_live_marks(rows: Iterable[dict[str, Any]], marks: Mapping[int, LiveMark]) -> None:
+    """Replace the checkpointed PnL of open trade rows with their live marks, in place.
+
+    Every row gets ``mark_price`` / ``marked_at`` (None without a live mark);
+    closed rows keep their stored values, so a mark written after a close is ignored.
+    """
+    for row in rows:
+        mark = marks.get(row["id"]) if row.get("status") == "open" else None
+        row["mark_price"] = mark.price if mark else None
+        row["marked_at"] = mark.marked_at if mark else None
+        if mark:
+            row["unrealized_pnl_quote"] = mark.unrealized_pnl_quote
+            row["pnl"] = mark.unrealized_pnl_quote
+
+
+def store_live_portfolio(pipe: Any, portfolio: LivePortfolio, ttl_seconds: int) -> None:
+    key = live_portfolio_key(portfolio.bot_id)
+    pipe.hset(
+        key,
+        mapping={
+            "equity": repr(portfolio.equity),
+            "cash": repr(portfolio.cash),
+            "positions_value": repr(portfolio.positions_value),
+            "marked_at": portfolio.marked_at.isoformat(),
+        },
+    )
+    pipe.expire(key, ttl_seconds)
+
+
+def decode_live_portfolio(bot_id: int, raw: Mapping[str, str] | None) -> LivePortfolio | None:
+    if not raw:
+        return None
+    try:
+        return LivePortfolio(
+            bot_id=bot_id,
+            equity=float(raw["equity"]),
+            cash=float(raw["cash"]),
+            positions_value=float(raw["positions_value"]),
+            marked_at=datetime.fromisoformat(raw["marked_at"]),
+        )
+    except (KeyError, ValueError):
+        return None
+
+
+async def load_live_portfolios(client: Any, bot_ids: Iterable[int]) -> dict[int, LivePortfolio]:
+    """Live portfolios of ``bot_ids`` through an asyncio Redis client; bots without one are left out."""
+    bot_ids = list(bot_ids)
+    if not bot_ids:
+        return {}
+    async with client.pipeline(transaction=False) as pipe:
+        for bot_id in bot_ids:
+            pipe.hgetall(live_portfolio_key(bot_id))
+        raw_portfolios = await pipe.execute()
+    portfolios = (decode_live_portfolio(bot_id, raw) for bot_id, raw in zip(bot_ids, raw_portfolios))
+    return {portfolio.bot_id: portfolio for portfolio in portfolios if portfolio is not None}
+
+
+def overlay_live_portfolios(rows: Iterable[dict[str, Any]], portfolios: Mapping[int, LivePortfolio]) -> None:
+    """Replace snapshot rows with their bot's live values when those are newer, in place."""
+    for row in rows:
+        live = portfolios.get(row["bot_id"]) if row.get("bot_id") is not None else None
+        if live is None or live.marked_at <= row["timestamp"]:
+            continue
+        row["equity"] = live.equity
+        row["cash"] = live.cash
+        row["positions_value"] = live.positions_value
+        row["timestamp"] = live.marked_at
@@ -5,8 +5,10 @@ from typing import Any
 
 from sqlalchemy import (
     JSON,
+    BigInteger,
     Boolean,
     DateTime,
+    FetchedValue,
     Float,
     ForeignKey,
     Index,
@@ -22,6 +24,18 @@ class Base(DeclarativeBase):
     """Shared SQLAlchemy metadata for API, worker, and Alembic."""
 
 
+# ``change_seq`` columns are set by the ``set_change_seq`` trigger on every
+# insert and update to the writing transaction's id (see ``apps/api/sync.py``).
+def _change_seq_column(index: bool = True) -> Mapped[int]:
+    return mapped_column(
+        BigInteger,
+        nullable=False,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+        index=index,
+    )
+
+
 class Bot(Base):
     __tablename__ = "bots"
 
@@ -52,6 +66,7 @@ class Bot(Base):
         server_default=func.now(),
         onupdate=func.now(),
     )
+    change_seq: Mapped[int] = _change_seq_column()
 
 
 class Strategy(Base):
@@ -97,6 +112,27 @@ class Trade(Base):
         server_default=func.now(),
         index=True,
     )
+    change_seq: Mapped[int] = _change_seq_column()
+
+
+class BotLedger(Base):
+    """Running per-bot totals maintained alongside trade mutations."""
+
+    __tablename__ = "bot_ledgers"
+
+    bot_id: Mapped[int] = mapped_column(ForeignKey("bots.id", ondelete="CASCADE"), primary_key=True)
+    realized_pnl_quote: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, server_default="0")
+    # Cost basis plus entry fees of the bot's open trades.
+    open_locked_cost_quote: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, server_default="0")
+    fees_paid_quote: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, server_default="0")
+    open_trades: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    closed_trades: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
 
 
 class Order(Base):
@@ -104,6 +140,9 @@ class Order(Base):
     __table_args__ = (
         Index("ix_orders_trade_status", "trade_id", "status"),
         Index("ix_orders_symbol_status", "symbol", "status"),
+        Index("ix_orders_created_at", "created_at"),
+        Index("ix_orders_bot_created_at", "bot_id", "created_at"),
+        Index("ix_orders_symbol_created_at", "symbol", "created_at"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -125,6 +164,7 @@ class Order(Base):
         nullable=False,
         server_default=func.now(),
     )
+    change_seq: Mapped[int] = _change_seq_column()
 
 
 class PortfolioSnapshot(Base):
@@ -146,11 +186,35 @@ class PortfolioSnapshot(Base):
         server_default=func.now(),
         index=True,
     )
+    # Only read through each bot's newest snapshot, so not indexed.
+    change_seq: Mapped[int] = _change_seq_column(index=False)
+
+
+class PortfolioRollup(Base):
+    """OHLC of a bot's equity over one bucket of a rollup tier (``1m``, ``1h``, ``1d``)."""
+
+    __tablename__ = "portfolio_rollups"
+    __table_args__ = (Index("ix_portfolio_rollups_tier_bucket", "tier", "bucket"),)
+
+    bot_id: Mapped[int] = mapped_column(ForeignKey("bots.id", ondelete="CASCADE"), primary_key=True)
+    tier: Mapped[str] = mapped_column(String(8), primary_key=True)
+    bucket: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    equity_open: Mapped[float] = mapped_column(Float, nullable=False)
+    equity_high: Mapped[float] = mapped_column(Float, nullable=False)
+    equity_low: Mapped[float] = mapped_column(Float, nullable=False)
+    equity_close: Mapped[float] = mapped_column(Float, nullable=False)
+    # Values of the bucket's last snapshot.
+    cash: Mapped[float] = mapped_column(Float, nullable=False)
+    positions_value: Mapped[float] = mapped_column(Float, nullable=False)
+    samples: Mapped[int] = mapped_column(Integer, nullable=False)
 
 
 class Job(Base):
     __tablename__ = "jobs"
-    __table_args__ = (Index("ix_jobs_bot_status", "bot_id", "status"),)
+    __table_args__ = (
+        Index("ix_jobs_bot_status", "bot_id", "status"),
+        Index("ix_jobs_bot_created_at", "bot_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     bot_id: Mapped[int | None] = mapped_column(
@@ -175,3 +239,4 @@ class Job(Base):
         server_default=func.now(),
         onupdate=func.now(),
     )
+    change_seq: Mapped[int] = _change_seq_column()
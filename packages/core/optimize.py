@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import itertools
+import math
+import os
+import queue
+import random
+from collections.abc import Callable, Mapping, Sequence
+from pathlib import Path
+from typing import Any
+
+import billiard
+import numpy as np
+from pydantic import ValidationError
+
+from packages.core.backtest import run_backtest
+from packages.core.candles import CandleSeries, CandleStore
+from packages.core.schemas import Knobs, KnobRange
+
+# Objectives where a smaller value is better.
+_MINIMIZE = {"max_drawdown_pct"}
+_INTEGER_KNOBS = {name for name, info in Knobs.model_fields.items() if info.annotation in (int, "int")}
+
+
+def optimization_artifact_path(artifacts_dir: Path | str, job_id: int) -> Path:
+    return Path(artifacts_dir) / "optimizations" / f"{job_id}.json"
+
+
+def _range_spec(spec: Sequence[float] | KnobRange | Mapping[str, Any]) -> Sequence[float] | KnobRange:
+    return KnobRange.model_validate(spec) if isinstance(spec, Mapping) else spec
+
+
+def _grid_values(spec: Sequence[float] | KnobRange) -> list[float]:
+    if not isinstance(spec, KnobRange):
+        return [float(value) for value in spec]
+    if spec.step is None:
+        return [spec.min, spec.max] if spec.max != spec.min else [spec.min]
+    count = int(math.floor((spec.max - spec.min) / spec.step + 1e-9)) + 1
+    return [float(value) for value in np.round(spec.min + np.arange(count) * spec.step, 10)]
+
+
+def _sample_value(spec: Sequence[float] | KnobRange, rng: random.Random) -> float:
+    if not isinstance(spec, KnobRange):
+        return float(rng.choice(list(spec)))
+    if spec.step is not None:
+        return rng.choice(_grid_values(spec))
+    return rng.uniform(spec.min, spec.max)
+
+
+def _coerce(name: str, value: float) -> int | float:
+    return int(round(value)) if name in _INTEGER_KNOBS else float(value)
+
+
+def _valid_field_values(base_knobs: Mapping[str, Any], name: str, values: Sequence[float]) -> list[int | float]:
+    """Distinct values of one knob that pass its own ``Knobs`` constraints."""
+    kept: dict[int | float, None] = {}
+    for value in values:
+        coerced = _coerce(name, value)
+        try:
+            Knobs.model_validate({**base_knobs, name: coerced})
+        except ValidationError:
+            continue
+        kept[coerced] = None
+    return list(kept)
+
+
+def expand_candidates(
+    base_knobs: Mapping[str, Any],
+    search: Mapping[str, Sequence[float] | KnobRange | Mapping[str, Any]],
+    mode: str,
+    samples: int,
+    max_candidates: int,
+    seed: int | None = None,
+) -> list[dict[str, Any]]:
+    """Build the distinct, schema-valid knob sets to evaluate.
+
+    ``search`` may come straight from a job's JSON params, so range specs are
+    accepted as ``{"min", "max", "step"}`` mappings as well as ``KnobRange``.
+    """
+    search = {name: _range_spec(spec) for name, spec in search.items()}
+    fields = sorted(search)
+    if mode == "grid":
+        # Knobs constraints are per-field, so filtering each axis first keeps
+        # the product free of invalid or duplicate combinations.
+        axes = [_valid_field_values(base_knobs, name, _grid_values(search[name])) for name in fields]
+        combos: Any = itertools.product(*axes)
+        limit = max_candidates
+    else:
+        rng = random.Random(seed)
+        combos = ([_sample_value(search[name], rng) for name in fields] for _ in range(samples * 4))
+        limit = min(samples, max_candidates)
+
+    candidates: list[dict[str, Any]] = []
+    seen: set[tuple[Any, ...]] = set()
+    for combo in combos:
+        values = {name: _coerce(name, value) for name, value in zip(fields, combo)}
+        try:
+            knobs = Knobs.model_validate({**base_knobs, **values}).model_dump()
+        except ValidationError:
+            continue
+        key = tuple(knobs[name] for name in fields)
+        if key in seen:
+            continue
+        seen.add(key)
+        candidates.append(knobs)
+        if len(candidates) >= limit:
+            break
+    return candidates
+
+
+def score(stats: Mapping[str, Any], objective: str) -> float:
+    value = stats.get(objective)
+    if value is None:
+        return -math.inf
+    return -float(value) if objective in _MINIMIZE else float(value)
+
+
+# Per-process context installed by ``_init_worker``; candles are read-only memory
+# maps of the store files, so every worker shares the same page-cache pages.
+_context: dict[str, Any] = {}
+
+
+def _no_fetch(symbol: str, timeframe: str, since: int, limit: int) -> list[list[float | int]]:
+    raise RuntimeError("Optimizer workers read candles from disk only")
+
+
+def _load_candles(
+    store_root: str,
+    symbols: Sequence[str],
+    timeframe: str,
+    since: int,
+    until: int | None,
+) -> dict[str, CandleSeries]:
+    store = CandleStore(Path(store_root), fetch_ohlcv=_no_fetch)
+    return {symbol: store.read(symbol, timeframe).between(since, until) for symbol in symbols}
+
+
+def _init_worker(
+    store_root: str,
+    symbols: Sequence[str],
+    timeframe: str,
+    since: int,
+    until: int | None,
+    strategy: str,
+    fee_rate: float,
+    starting_cash: float,
+) -> None:
+    _context.clear()
+    _context.update(
+        candles=_load_candles(store_root, symbols, timeframe, since, until),
+        strategy=strategy,
+        fee_rate=fee_rate,
+        starting_cash=starting_cash,
+    )
+
+
+def _evaluate(item: tuple[int, dict[str, Any]]) -> tuple[int, dict[str, Any], dict[str, Any] | None, str | None]:
+    index, knobs = item
+    try:
+        result = run_backtest(
+            _context["candles"],
+            strategy=_context["strategy"],
+            knobs=knobs,
+            fee_rate=_context["fee_rate"],
+            starting_cash=_context["starting_cash"],
+        )
+    except Exception as exc:
+        return index, knobs, None, str(exc)
+    return index, knobs, result.stats, None
+
+
+def _evaluate_batch(items: list[tuple[int, dict[str, Any]]]) -> list[tuple[int, dict[str, Any], dict[str, Any] | None, str | None]]:
+    return [_evaluate(item) for item in items]
+
+
+def run_optimization(
+    store_root: Path | str,
+    symbols: Sequence[str],
+    timeframe: str,
+    since: int,
+    until: int | None,
+    strategy: str,
+    fee_rate: float,
+    starting_cash: float,
+    candidates: Sequence[dict[str, Any]],
+    objective: str,
+    processes: int | None = None,
+    on_result: Callable[[dict[str, Any], int], None] | None = None,
+) -> list[dict[str, Any]]:
+    """Backtest every candidate across a process pool and return them ranked.
+
+    Candles must already be synced to the store. ``on_result`` is called in
+    the parent with each finished result and the number evaluated so far.
+    """
+    processes = max(1, min(processes or os.cpu_count() or 1, len(candidates) or 1))
+    init_args = (str(store_root), list(symbols), timeframe, since, until, strategy, fee_rate, starting_cash)
+    work = list(enumerate(candidates))
+
+    results: list[dict[str, Any]] = []
+
+    def _collect(outcome: tuple[int, dict[str, Any], dict[str, Any] | None, str | None]) -> None:
+        index, knobs, stats, error = outcome
+        value = score(stats, objective) if stats else -math.inf
+        entry = {
+            "candidate": index,
+            "knobs": knobs,
+            "score": value if math.isfinite(value) else None,
+            "stats": stats,
+            "error": error,
+        }
+        results.append(entry)
+        if on_result is not None:
+            on_result(entry, len(results))
+
+    if processes == 1:
+        _init_worker(*init_args)
+        for item in work:
+            _collect(_evaluate(item))
+    else:
+        # billiard (Celery's multiprocessing fork) may start children from a
+        # daemonic prefork worker, which the stdlib pool refuses to do. Its
+        # imap_unordered stalls on shutdown, so batches report via callbacks.
+        chunksize = max(1, len(work) // (processes * 8))
+        batches = [work[start : start + chunksize] for start in range(0, len(work), chunksize)]
+        finished: queue.SimpleQueue[Any] = queue.SimpleQueue()
+        pool = billiard.Pool(processes=processes, initializer=_init_worker, initargs=init_args)
+        try:
+            for batch in batches:
+                pool.apply_async(_evaluate_batch, (batch,), callback=finished.put, error_callback=finished.put)
+            for _ in batches:
+                outcome = finished.get()
+                if isinstance(outcome, BaseException):
+                    raise outcome
+                for item in outcome:
+                    _collect(item)
+            pool.close()
+        except BaseException:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+
+    results.sort(key=lambda entry: entry["score"] if entry["score"] is not None else -math.inf, reverse=True)
+    for rank, entry in enumerate(results, start=1):
+        entry["rank"] = rank
+    return results
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import Select, delete, func, select, text
+from sqlalchemy.orm import Session
+
+from packages.core.candles import timeframe_ms
+from packages.core.models import Bot, PortfolioRollup, PortfolioSnapshot
+from packages.core.settings import Settings
+
+RAW_TIER = "raw"
+_DELETE_BATCH_ROWS = 10_000
+
+
+@dataclass(frozen=True)
+class RollupTier:
+    name: str
+    # ``date_trunc`` unit of one bucket.
+    unit: str
+    step: timedelta
+    # Tier the buckets are built from; raw snapshots for the finest tier.
+    source: str
+
+
+TIERS: tuple[RollupTier, ...] = (
+    RollupTier("1m", "minute", timedelta(minutes=1), RAW_TIER),
+    RollupTier("1h", "hour", timedelta(hours=1), "1m"),
+    RollupTier("1d", "day", timedelta(days=1), "1h"),
+)
+TIER_NAMES = (RAW_TIER, *(tier.name for tier in TIERS))
+
+_UPSERT = """
+INSERT INTO portfolio_rollups (
+    bot_id, tier, bucket, equity_open, equity_high, equity_low, equity_close, cash, positions_value, samples
+)
+{select}
+ON CONFLICT (bot_id, tier, bucket) DO UPDATE SET
+    equity_open = excluded.equity_open,
+    equity_high = excluded.equity_high,
+    equity_low = excluded.equity_low,
+    equity_close = excluded.equity_close,
+    cash = excluded.cash,
+    positions_value = excluded.positions_value,
+    samples = excluded.samples
+"""
+
+_FROM_SNAPSHOTS = """
+SELECT
+    bot_id,
+    CAST(:tier AS varchar),
+    date_trunc(:unit, timestamp, 'UTC') AS bucket,
+    (array_agg(equity ORDER BY timestamp))[1],
+    max(equity),
+    min(equity),
+    (array_agg(equity ORDER BY timestamp DESC))[1],
+    (array_agg(cash ORDER BY timestamp DESC))[1],
+    (array_agg(positions_value ORDER BY timestamp DESC))[1],
+    count(*)
+FROM portfolio_snapshots
+WHERE bot_id IS NOT NULL AND (CAST(:since AS timestamptz) IS NULL OR timestamp >= :since)
+GROUP BY bot_id, bucket
+"""
+
+_FROM_ROLLUPS = """
+SELECT
+    bot_id,
+    CAST(:tier AS varchar),
+    date_trunc(:unit, bucket, 'UTC') AS coarse,
+    (array_agg(equity_open ORDER BY bucket))[1],
+    max(equity_high),
+    min(equity_low),
+    (array_agg(equity_close ORDER BY bucket DESC))[1],
+    (array_agg(cash ORDER BY bucket DESC))[1],
+    (array_agg(positions_value ORDER BY bucket DESC))[1],
+    sum(samples)
+FROM portfolio_rollups
+WHERE tier = :source AND (CAST(:since AS timestamptz) IS NULL OR bucket >= :since)
+GROUP BY bot_id, coarse
+"""
+
+
+def _latest_bucket(session: Session, tier: str) -> datetime | None:
+    return session.execute(select(func.max(PortfolioRollup.bucket)).where(PortfolioRollup.tier == tier)).scalar()
+
+
+def rollup_portfolio(session: Session) -> dict[str, int]:
+    """Fold new snapshots into each tier, finest first; returns upserted buckets per tier.
+
+    Each tier is recomputed from its newest existing bucket onwards (the
+    still-open one included), so the job is idempotent and catches up after
+    downtime. Runs in the caller's transaction.
+    """
+    counts: dict[str, int] = {}
+    for tier in TIERS:
+        source_sql = _FROM_SNAPSHOTS if tier.source == RAW_TIER else _FROM_ROLLUPS
+        result = session.execute(
+            text(_UPSERT.format(select=source_sql)),
+            {"tier": tier.name, "unit": tier.unit, "source": tier.source, "since": _latest_bucket(session, tier.name)},
+        )
+        counts[tier.name] = result.rowcount
+    return counts
+
+
+def tier_retention(settings: Settings) -> dict[str, timedelta | None]:
+    """How long each tier is kept; None keeps it forever."""
+    retention = {
+        RAW_TIER: timedelta(hours=settings.portfolio_raw_retention_hours),
+        "1m": timedelta(days=settings.portfolio_1m_retention_days),
+        "1h": timedelta(days=settings.portfolio_1h_retention_days),
+        "1d": timedelta(days=settings.portfolio_1d_retention_days),
+    }
+    return {name: value or None for name, value in retention.items()}
+
+
+def apply_retention(session: Session, settings: Settings, now: datetime) -> dict[str, int]:
+    """Delete rows past each tier's retention, committing per batch; returns deleted rows per tier.
+
+    Nothing is deleted before it has been folded into the next tier, and each
+    bot's newest raw snapshot is kept so ``GET /portfolio/{bot_id}`` still
+    answers for long-stopped bots.
+    """
+    retention = tier_retention(settings)
+    deleted: dict[str, int] = {}
+    for name, coarser in zip(TIER_NAMES, (*(tier.name for tier in TIERS), None)):
+        keep_for = retention[name]
+        if keep_for is None:
+            continue
+        cutoff = now - keep_for
+        if coarser is not None:
+            rolled_up_until = _latest_bucket(session, coarser)
+            if rolled_up_until is None:
+                continue
+            cutoff = min(cutoff, rolled_up_until)
+        deleted[name] = _delete_raw(session, cutoff) if name == RAW_TIER else _delete_rollups(session, name, cutoff)
+    return deleted
+
+
+def _delete_raw(session: Session, cutoff: datetime) -> int:
+    newest = (
+        select(PortfolioSnapshot.id)
+        .where(PortfolioSnapshot.bot_id == Bot.id)
+        .order_by(PortfolioSnapshot.timestamp.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    newest_ids = session.execute(select(newest).select_from(Bot)).scalars()
+    keep = [snapshot_id for snapshot_id in newest_ids if snapshot_id is not None]
+    total = 0
+    while True:
+        batch = (
+            select(PortfolioSnapshot.id)
+            .where(PortfolioSnapshot.timestamp < cutoff, PortfolioSnapshot.id.not_in(keep))
+            .limit(_DELETE_BATCH_ROWS)
+            .scalar_subquery()
+        )
+        removed = session.execute(delete(PortfolioSnapshot).where(PortfolioSnapshot.id.in_(batch))).rowcount
+        session.commit()
+        total += removed
+        if removed < _DELETE_BATCH_ROWS:
+            return total
+
+
+def _delete_rollups(session: Session, tier: str, cutoff: datetime) -> int:
+    removed = session.execute(
+        delete(PortfolioRollup).where(PortfolioRollup.tier == tier, PortfolioRollup.bucket < cutoff)
+    ).rowcount
+    session.commit()
+    return removed
+
+
+def raw_snapshot_step(settings: Settings, timeframe: str) -> timedelta:
+    """Spacing of a bot's raw snapshots: one per tick, or one per candle close on the candle schedule."""
+    if settings.bot_schedule == "candle":
+        try:
+            return timedelta(milliseconds=timeframe_ms(timeframe))
+        except ValueError:
+            # The runtime ticks such bots on the interval.
+            pass
+    return timedelta(seconds=settings.bot_loop_interval_seconds)
+
+
+def pick_tier(
+    since: datetime,
+    until: datetime,
+    now: datetime,
+    settings: Settings,
+    max_points: int | None = None,
+    raw_step: timedelta | None = None,
+) -> str:
+    """The finest tier that still holds ``since`` and covers the range in at most ``max_points`` points.
+
+    ``max_points`` defaults to ``PORTFOLIO_HISTORY_MAX_POINTS`` and ``raw_step``
+    to ``BOT_LOOP_INTERVAL_SECONDS``.
+    """
+    max_points = max_points or settings.portfolio_history_max_points
+    retention = tier_retention(settings)
+    steps = {RAW_TIER: raw_step or timedelta(seconds=settings.bot_loop_interval_seconds)}
+    steps.update((tier.name, tier.step) for tier in TIERS)
+    for name in TIER_NAMES:
+        keep_for = retention[name]
+        if keep_for is not None and since < now - keep_for:
+            continue
+        if (until - since) / steps[name] <= max_points:
+            return name
+    return TIERS[-1].name
+
+
+def history_query(bot_id: int, tier: str, since: datetime, until: datetime) -> Select[Any]:
+    """Rows of ``(timestamp, open, high, low, close, cash, positions_value)`` for one bot, oldest first."""
+    if tier == RAW_TIER:
+        equity = PortfolioSnapshot.equity
+        return (
+            select(
+                PortfolioSnapshot.timestamp.label("timestamp"),
+                equity.label("open"),
+                equity.label("high"),
+                equity.label("low"),
+                equity.label("close"),
+                PortfolioSnapshot.cash,
+                PortfolioSnapshot.positions_value,
+            )
+            .where(
+                PortfolioSnapshot.bot_id == bot_id,
+                PortfolioSnapshot.timestamp >= since,
+                PortfolioSnapshot.timestamp < until,
+            )
+            .order_by(PortfolioSnapshot.timestamp)
+        )
+    return (
+        select(
+            PortfolioRollup.bucket.label("timestamp"),
+            PortfolioRollup.equity_open.label("open"),
+            PortfolioRollup.equity_high.label("high"),
+            PortfolioRollup.equity_low.label("low"),
+            PortfolioRollup.equity_close.label("close"),
+            PortfolioRollup.cash,
+            PortfolioRollup.positions_value,
+        )
+        .where(
+            PortfolioRollup.bot_id == bot_id,
+            PortfolioRollup.tier == tier,
+            PortfolioRollup.bucket >= since,
+            PortfolioRollup.bucket < until,
+        )
+        .order_by(PortfolioRollup.bucket)
+    )
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any, Literal
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
 
 class Knobs(BaseModel):
@@ -16,6 +16,18 @@ class Knobs(BaseModel):
     cooldown_minutes: int = Field(default=60, ge=0, le=24 * 60)
 
 
+def _normalize_symbol_list(value: list[str]) -> list[str]:
+    normalized = [symbol.strip().upper() for symbol in value if symbol.strip()]
+    if not normalized:
+        raise ValueError("At least one symbol is required")
+
+    invalid = [symbol for symbol in normalized if "/" not in symbol]
+    if invalid:
+        raise ValueError(f"Invalid symbols: {', '.join(invalid)}")
+
+    return normalized
+
+
 class BotBase(BaseModel):
     name: str = Field(min_length=1, max_length=120)
     symbols: list[str] = Field(min_length=1)
@@ -26,15 +38,7 @@ class BotBase(BaseModel):
     @field_validator("symbols")
     @classmethod
     def normalize_symbols(cls, value: list[str]) -> list[str]:
-        normalized = [symbol.strip().upper() for symbol in value if symbol.strip()]
-        if not normalized:
-            raise ValueError("At least one symbol is required")
-
-        invalid = [symbol for symbol in normalized if "/" not in symbol]
-        if invalid:
-            raise ValueError(f"Invalid symbols: {', '.join(invalid)}")
-
-        return normalized
+        return _normalize_symbol_list(value)
 
 
 class BotCreate(BotBase):
@@ -91,6 +95,26 @@ class PortfolioSnapshotRead(BaseModel):
     timestamp: datetime
 
 
+class PortfolioHistoryPoint(BaseModel):
+    timestamp: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    cash: float
+    positions_value: float
+
+
+class PortfolioHistoryRead(BaseModel):
+    bot_id: int
+    tier: Literal["raw", "1m", "1h", "1d"]
+    since: datetime
+    until: datetime
+    # Points in the range before downsampling to ``points``.
+    source_points: int
+    points: list[PortfolioHistoryPoint]
+
+
 class TradeRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -106,6 +130,9 @@ class TradeRead(BaseModel):
     realized_pnl_quote: float | None = None
     status: str
     pnl: float | None
+    # Live mark of an open trade, newer than the checkpointed PnL columns.
+    mark_price: float | None = None
+    marked_at: datetime | None = None
     closed_at: datetime | None = None
     created_at: datetime
 
@@ -144,6 +171,34 @@ class JobRead(BaseModel):
     updated_at: datetime
 
 
+class DashboardBot(BotRead):
+    open_trades: int = 0
+    realized_pnl_quote: float = 0.0
+    latest_snapshot: PortfolioSnapshotRead | None = None
+
+
+class DashboardRead(BaseModel):
+    generated_at: datetime
+    # Newest snapshot across all bots.
+    portfolio: PortfolioSnapshotRead | None
+    bots: list[DashboardBot]
+    recent_trades: list[TradeRead]
+    active_jobs: list[JobRead]
+
+
+class SyncRead(BaseModel):
+    # Pass back as ``?since=`` on the next sync.
+    cursor: str
+    # A dataset hit ``limit``; sync again right away with the new cursor.
+    has_more: bool
+    bots: list[BotRead]
+    trades: list[TradeRead]
+    orders: list[OrderRead]
+    jobs: list[JobRead]
+    # Each bot's newest snapshot, when it changed.
+    snapshots: list[PortfolioSnapshotRead]
+
+
 class MarketTicker(BaseModel):
     symbol: str
     price: float
@@ -155,6 +210,8 @@ class MarketOhlcvResponse(BaseModel):
     symbol: str
     timeframe: str
     limit: int
+    since: int | None = None
+    until: int | None = None
     ohlcv: list[list[float | int]]
 
 
@@ -204,3 +261,103 @@ class OrderExecutionResponse(BaseModel):
 class TradeCloseResponse(BaseModel):
     trade: TradeRead
     order: OrderRead
+
+
+class BacktestCreate(BaseModel):
+    """Backtest request; fields left unset are taken from ``bot_id``'s bot."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    bot_id: int | None = None
+    symbols: list[str] | None = None
+    timeframe: str | None = Field(default=None, min_length=1, max_length=20)
+    strategy: str | None = Field(default=None, max_length=120)
+    knobs: Knobs | None = None
+    since: int = Field(ge=0, description="Start candle open time (ms)")
+    until: int | None = Field(default=None, ge=0, description="End candle open time (ms), inclusive")
+
+    @field_validator("symbols")
+    @classmethod
+    def normalize_symbols(cls, value: list[str] | None) -> list[str] | None:
+        if value is None:
+            return None
+        return _normalize_symbol_list(value)
+
+
+class BacktestStartResponse(BaseModel):
+    job_id: int
+    task_id: str | None
+    status: str
+
+
+class BacktestTradeRead(BaseModel):
+    symbol: str
+    entry_ts: int
+    exit_ts: int
+    entry_price: float
+    exit_price: float
+    qty: float
+    cost_basis_quote: float
+    fees_paid_quote: float
+    realized_pnl_quote: float
+    exit_reason: str
+
+
+class BacktestResultRead(BaseModel):
+    job_id: int
+    params: dict[str, Any]
+    stats: dict[str, Any]
+    trades: list[BacktestTradeRead]
+    equity_curve: list[list[float]]
+
+
+class KnobRange(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    min: float
+    max: float
+    step: float | None = Field(default=None, gt=0)
+
+    @model_validator(mode="after")
+    def validate_bounds(self) -> KnobRange:
+        if self.max < self.min:
+            raise ValueError("max must be >= min")
+        if self.step is not None and (self.max - self.min) / self.step > 10_000:
+            raise ValueError("step yields more than 10000 grid values")
+        return self
+
+
+class OptimizeCreate(BacktestCreate):
+    """Parameter sweep over ``Knobs`` fields; ``knobs`` (or the bot's) is the base set."""
+
+    search: dict[str, list[float] | KnobRange] = Field(min_length=1)
+    mode: Literal["grid", "random"] = "grid"
+    samples: int = Field(default=100, ge=1, le=10_000)
+    max_candidates: int = Field(default=1_000, ge=1, le=10_000)
+    objective: Literal["total_return_pct", "profit_factor", "win_rate", "max_drawdown_pct", "realized_pnl_quote"] = (
+        "total_return_pct"
+    )
+    top_n: int = Field(default=10, ge=1, le=100)
+    seed: int | None = None
+
+    @field_validator("search")
+    @classmethod
+    def validate_search_fields(
+        cls,
+        value: dict[str, list[float] | KnobRange],
+    ) -> dict[str, list[float] | KnobRange]:
+        unknown = sorted(set(value) - set(Knobs.model_fields))
+        if unknown:
+            raise ValueError(f"Unknown knob fields: {', '.join(unknown)}")
+        empty = sorted(name for name, spec in value.items() if isinstance(spec, list) and not spec)
+        if empty:
+            raise ValueError(f"Empty value lists for: {', '.join(empty)}")
+        return value
+
+
+class OptimizeResultRead(BaseModel):
+    job_id: int
+    params: dict[str, Any]
+    objective: str
+    evaluated: int
+    results: list[dict[str, Any]]
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from functools import lru_cache
 from pathlib import Path
+from typing import Literal
 
 from pydantic import Field, ValidationError
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -22,8 +23,40 @@ class Settings(BaseSettings):
     ollama_base_url: str = Field(default="http://localhost:11434", alias="OLLAMA_BASE_URL")
     artifacts_dir: Path = Field(default=ROOT_DIR / "storage/artifacts", alias="ARTIFACTS_DIR")
     bot_loop_interval_seconds: float = Field(default=5.0, alias="BOT_LOOP_INTERVAL_SECONDS")
+    # "interval" ticks every bot every BOT_LOOP_INTERVAL_SECONDS; "candle" runs the full tick on
+    # each close of the bot's timeframe, with optional mark-only ticks in between.
+    bot_schedule: Literal["interval", "candle"] = Field(default="interval", alias="BOT_SCHEDULE")
+    bot_mark_interval_seconds: float = Field(default=0.0, ge=0, alias="BOT_MARK_INTERVAL_SECONDS")
+    mark_checkpoint_ticks: int = Field(default=12, ge=1, alias="MARK_CHECKPOINT_TICKS")
+    job_checkpoint_ticks: int = Field(default=60, ge=1, alias="JOB_CHECKPOINT_TICKS")
+    job_state_ttl_seconds: int = Field(default=3600, ge=60, alias="JOB_STATE_TTL_SECONDS")
     paper_starting_cash: float = Field(default=10000.0, alias="PAPER_STARTING_CASH")
     paper_fee_rate: float = Field(default=0.001, alias="PAPER_FEE_RATE")
+    exchange_pool_size: int = Field(default=4, ge=1, alias="EXCHANGE_POOL_SIZE")
+    exchange_markets_refresh_seconds: float = Field(default=3600.0, alias="EXCHANGE_MARKETS_REFRESH_SECONDS")
+    ticker_cache_ttl_seconds: float = Field(default=2.0, ge=0, alias="TICKER_CACHE_TTL_SECONDS")
+    ticker_cache_redis_enabled: bool = Field(default=True, alias="TICKER_CACHE_REDIS_ENABLED")
+    market_feed_interval_seconds: float = Field(default=2.0, alias="MARKET_FEED_INTERVAL_SECONDS")
+    market_feed_max_age_seconds: float = Field(default=10.0, alias="MARKET_FEED_MAX_AGE_SECONDS")
+    market_feed_stream_maxlen: int = Field(default=10000, ge=1, alias="MARKET_FEED_STREAM_MAXLEN")
+    events_stream_maxlen: int = Field(default=10000, ge=100, alias="EVENTS_STREAM_MAXLEN")
+    sse_replay_max_events: int = Field(default=5000, ge=1, alias="SSE_REPLAY_MAX_EVENTS")
+    sse_client_queue_size: int = Field(default=1000, ge=1, alias="SSE_CLIENT_QUEUE_SIZE")
+    export_batch_rows: int = Field(default=2000, ge=1, alias="EXPORT_BATCH_ROWS")
+    portfolio_rollup_interval_seconds: float = Field(default=60.0, gt=0, alias="PORTFOLIO_ROLLUP_INTERVAL_SECONDS")
+    # Retention per tier; 0 keeps the tier forever.
+    portfolio_raw_retention_hours: float = Field(default=48.0, ge=0, alias="PORTFOLIO_RAW_RETENTION_HOURS")
+    portfolio_1m_retention_days: float = Field(default=14.0, ge=0, alias="PORTFOLIO_1M_RETENTION_DAYS")
+    portfolio_1h_retention_days: float = Field(default=365.0, ge=0, alias="PORTFOLIO_1H_RETENTION_DAYS")
+    portfolio_1d_retention_days: float = Field(default=0.0, ge=0, alias="PORTFOLIO_1D_RETENTION_DAYS")
+    portfolio_history_max_points: int = Field(default=1500, ge=10, alias="PORTFOLIO_HISTORY_MAX_POINTS")
+    dashboard_cache_seconds: float = Field(default=2.0, ge=0, alias="DASHBOARD_CACHE_SECONDS")
+    bot_runtime_threads: int = Field(default=8, ge=1, alias="BOT_RUNTIME_THREADS")
+    bot_runtime_reconcile_seconds: float = Field(default=30.0, gt=0, alias="BOT_RUNTIME_RECONCILE_SECONDS")
+    bot_runtime_shard_index: int = Field(default=0, ge=0, alias="BOT_RUNTIME_SHARD_INDEX")
+    bot_runtime_shard_count: int = Field(default=1, ge=1, alias="BOT_RUNTIME_SHARD_COUNT")
+    # 0 means one optimizer process per CPU core.
+    optimizer_processes: int = Field(default=0, ge=0, alias="OPTIMIZER_PROCESSES")
 
     @property
     def sync_database_url(self) -> str:
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+
+import numpy as np
+
+from packages.core.candles import CandleSeries
+
+# A strategy maps a candle series to a boolean "enter long at this close" array.
+SignalFn = Callable[[CandleSeries], np.ndarray]
+
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average; the first ``window - 1`` entries are NaN."""
+    out = np.full(values.shape[0], np.nan, dtype=np.float64)
+    if window <= 0 or values.shape[0] < window:
+        return out
+    csum = np.cumsum(values, dtype=np.float64)
+    out[window - 1] = csum[window - 1] / window
+    out[window:] = (csum[window:] - csum[:-window]) / window
+    return out
+
+
+def crossover(fast: np.ndarray, slow: np.ndarray) -> np.ndarray:
+    above = fast > slow
+    signal = np.zeros(fast.shape[0], dtype=bool)
+    signal[1:] = above[1:] & ~above[:-1]
+    return signal
+
+
+def baseline_signals(candles: CandleSeries) -> np.ndarray:
+    """Enter when the 9-period SMA of closes crosses above the 21-period SMA."""
+    close = np.asarray(candles.close, dtype=np.float64)
+    return crossover(sma(close, 9), sma(close, 21))
+
+
+STRATEGIES: dict[str, SignalFn] = {
+    "baseline": baseline_signals,
+}
+
+
+def get_strategy(name: str) -> SignalFn:
+    try:
+        return STRATEGIES[name.strip()]
+    except KeyError as exc:
+        available = ", ".join(sorted(STRATEGIES))
+        raise ValueError(f"Unknown strategy '{name}'. Available: {available}") from exc
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections.abc import Callable
+from typing import Any
+
+import redis.asyncio as redis
+
+# Latest ticker per symbol shared by every process (hash field = symbol).
+TICKERS_KEY = "market:tickers"
+# Capped stream with one entry per market-data feed cycle.
+TICKERS_STREAM_KEY = "market:tickers:stream"
+
+
+def normalize_ticker(symbol: str, ticker: dict[str, Any] | None) -> dict[str, Any] | None:
+    if not ticker:
+        return None
+
+    last_price = ticker.get("last") or ticker.get("close")
+    if last_price is None:
+        return None
+
+    return {
+        "symbol": symbol,
+        "price": float(last_price),
+        "change_24h": float(ticker["percentage"]) if ticker.get("percentage") is not None else None,
+        "timestamp": ticker.get("timestamp"),
+    }
+
+
+def encode_ticker(row: dict[str, Any], fetched_at: float) -> str:
+    return json.dumps({**row, "fetched_at": fetched_at})
+
+
+def decode_ticker(raw: str | bytes | None) -> tuple[float, dict[str, Any]] | None:
+    if raw is None:
+        return None
+    try:
+        payload = json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(payload, dict) or payload.get("price") is None:
+        return None
+    try:
+        fetched_at = float(payload.pop("fetched_at"))
+    except (TypeError, ValueError, KeyError):
+        return None
+    return fetched_at, payload
+
+
+class TickerCache:
+    """In-process ticker cache with per-symbol single-flight loading.
+
+    Concurrent callers asking for the same stale symbol share one in-flight
+    fetch. When a Redis client is given, the ``market:tickers`` hash acts as a
+    second tier so every API worker process serves the same fresh price.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[list[str]], list[dict[str, Any]]],
+        ttl_seconds: float,
+        redis_client: redis.Redis | None = None,
+    ) -> None:
+        self._loader = loader
+        self.ttl_seconds = float(ttl_seconds)
+        self._redis = redis_client
+        self._entries: dict[str, tuple[float, dict[str, Any]]] = {}
+        self._inflight: dict[str, asyncio.Future[dict[str, Any] | None]] = {}
+        self._load_tasks: set[asyncio.Task[None]] = set()
+
+        self._hits = 0
+        self._redis_hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._fetches = 0
+
+    def _fresh(self, symbol: str, now: float, max_age: float) -> dict[str, Any] | None:
+        entry = self._entries.get(symbol)
+        if entry is None or now - entry[0] > max_age:
+            return None
+        return entry[1]
+
+    async def get_many(self, symbols: list[str], max_age: float | None = None) -> list[dict[str, Any]]:
+        max_age = self.ttl_seconds if max_age is None else max_age
+        now = time.time()
+
+        results: dict[str, dict[str, Any] | None] = {}
+        waiting: dict[str, asyncio.Future[dict[str, Any] | None]] = {}
+        to_load: list[str] = []
+
+        for symbol in dict.fromkeys(symbols):
+            cached = self._fresh(symbol, now, max_age)
+            if cached is not None:
+                self._hits += 1
+                results[symbol] = cached
+                continue
+
+            future = self._inflight.get(symbol)
+            if future is not None:
+                self._coalesced += 1
+            else:
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[symbol] = future
+                to_load.append(symbol)
+            waiting[symbol] = future
+
+        if to_load:
+            # Run the fetch as its own task so a disconnecting caller cannot
+            # cancel it out from under the other waiters.
+            task = asyncio.create_task(self._load(to_load, max_age))
+            self._load_tasks.add(task)
+            task.add_done_callback(self._load_tasks.discard)
+
+        for symbol, future in waiting.items():
+            results[symbol] = await future
+
+        payload = [results[symbol] for symbol in symbols if results.get(symbol) is not None]
+        if not payload:
+            raise RuntimeError("No ticker data returned from Binance")
+        return payload
+
+    async def get_price(self, symbol: str, max_age: float | None = None) -> float:
+        rows = await self.get_many([symbol], max_age=max_age)
+        return float(rows[0]["price"])
+
+    async def _load(self, symbols: list[str], max_age: float) -> None:
+        futures = {symbol: self._inflight[symbol] for symbol in symbols}
+        try:
+            loaded: dict[str, dict[str, Any]] = {}
+            remaining = list(symbols)
+
+            if self._redis is not None and remaining:
+                loaded.update(await self._read_redis(remaining, max_age))
+                remaining = [symbol for symbol in remaining if symbol not in loaded]
+
+            if remaining:
+                self._misses += len(remaining)
+                self._fetches += 1
+                rows = await asyncio.to_thread(self._loader, remaining)
+                fetched_at = time.time()
+                fetched = {row["symbol"]: row for row in rows}
+                for symbol, row in fetched.items():
+                    self._entries[symbol] = (fetched_at, row)
+                loaded.update(fetched)
+                if self._redis is not None and fetched:
+                    await self._write_redis(fetched, fetched_at)
+
+            for symbol, future in futures.items():
+                if not future.done():
+                    future.set_result(loaded.get(symbol))
+        except Exception as exc:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(exc)
+        finally:
+            for symbol, future in futures.items():
+                if not future.done():
+                    future.cancel()
+                if self._inflight.get(symbol) is future:
+                    del self._inflight[symbol]
+
+    async def _read_redis(self, symbols: list[str], max_age: float) -> dict[str, dict[str, Any]]:
+        try:
+            raw_rows = await self._redis.hmget(TICKERS_KEY, symbols)
+        except Exception:  # pragma: no cover - runtime dependent
+            return {}
+
+        now = time.time()
+        loaded: dict[str, dict[str, Any]] = {}
+        for symbol, raw in zip(symbols, raw_rows):
+            decoded = decode_ticker(raw)
+            if decoded is None or now - decoded[0] > max_age:
+                continue
+            fetched_at, row = decoded
+            self._entries[symbol] = (fetched_at, row)
+            loaded[symbol] = row
+        self._redis_hits += len(loaded)
+        return loaded
+
+    async def _write_redis(self, rows: dict[str, dict[str, Any]], fetched_at: float) -> None:
+        try:
+            await self._redis.hset(
+                TICKERS_KEY,
+                mapping={symbol: encode_ticker(row, fetched_at) for symbol, row in rows.items()},
+            )
+        except Exception:  # pragma: no cover - runtime dependent
+            pass
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "redis_tier": self._redis is not None,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self._hits,
+            "redis_hits": self._redis_hits,
+            "misses": self._misses,
+            "coalesced": self._coalesced,
+            "fetches": self._fetches,
+        }
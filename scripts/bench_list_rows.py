@@ -0,0 +1,101 @@
+"""Compare ORM + pydantic list serialization with Core column projections.
+
+Seeds ``--rows`` trades inside one transaction that is rolled back, then
+times reading and serializing them both ways:
+
+    python scripts/bench_list_rows.py --rows 100000 --rounds 3
+
+``orm`` is the old list path: ORM entities, ``TradeRead.model_validate`` per
+row, FastAPI's response_model re-validation, then ``json.dumps``. ``core``
+selects only ``TradeRead``'s columns and serializes the row mappings with
+``dump_rows`` (orjson when installed).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from apps.api.pagination import read_columns  # noqa: E402
+from apps.api.responses import dump_rows, orjson  # noqa: E402
+from packages.core.database import SessionLocal  # noqa: E402
+from packages.core.models import Bot, Trade  # noqa: E402
+from packages.core.schemas import TradeRead  # noqa: E402
+
+
+def _orm_path(session, limit: int) -> int:
+    trades = session.execute(select(Trade).order_by(Trade.created_at.desc(), Trade.id.desc()).limit(limit)).scalars()
+    items = [TradeRead.model_validate(trade) for trade in trades]
+    adapter = TypeAdapter(list[TradeRead])
+    body = json.dumps(adapter.dump_python(adapter.validate_python(items), mode="json")).encode("utf-8")
+    return len(body)
+
+
+def _core_path(session, limit: int) -> int:
+    query = select(*read_columns(Trade, TradeRead)).order_by(Trade.created_at.desc(), Trade.id.desc()).limit(limit)
+    return len(dump_rows(session.execute(query).mappings()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        bot = Bot(name="bench-list", symbols=["BENCH/USDT"], timeframe="1m", strategy="baseline", knobs={})
+        session.add(bot)
+        session.flush()
+        for start in range(0, args.rows, 10_000):
+            session.execute(
+                insert(Trade),
+                [
+                    {
+                        "bot_id": bot.id,
+                        "symbol": "BENCH/USDT",
+                        "side": "buy",
+                        "amount": 1.0,
+                        "price": 100.0 + index % 50,
+                        "cost_basis_quote": 100.0,
+                        "fees_paid_quote": 0.1,
+                        "status": "closed" if index % 3 else "open",
+                        "pnl": 0.5,
+                    }
+                    for index in range(start, min(start + 10_000, args.rows))
+                ],
+            )
+        session.flush()
+        session.expunge_all()
+
+        results: dict[str, tuple[list[float], int]] = {}
+        for name, run in (("orm", _orm_path), ("core", _core_path)):
+            timings: list[float] = []
+            size = 0
+            for _ in range(args.rounds):
+                started = time.perf_counter()
+                size = run(session, args.rows)
+                timings.append(time.perf_counter() - started)
+                session.expunge_all()
+            results[name] = (timings, size)
+
+        session.rollback()
+
+    print(f"{args.rows} trades, {args.rounds} rounds, serializer: {'orjson' if orjson is not None else 'json'}")
+    for name, (timings, size) in results.items():
+        median = statistics.median(timings)
+        print(f"{name:>5}: median {median * 1000:9.1f} ms  {args.rows / median:12,.0f} rows/s  {size / 1e6:6.1f} MB")
+    speedup = statistics.median(results["orm"][0]) / statistics.median(results["core"][0])
+    print(f"core speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Compare per-row ORM mark-to-market against the bulk UPDATE ... FROM (VALUES ...).
+
+Runs against DATABASE_URL inside one transaction that is rolled back, so no
+rows are left behind:
+
+    python scripts/bench_marks.py --trades 500 --symbols 20 --rounds 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import event, select
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from packages.core.database import SessionLocal, get_sync_engine  # noqa: E402
+from packages.core.marks import mark_open_trades  # noqa: E402
+from packages.core.models import Bot, Trade  # noqa: E402
+
+
+def _orm_mark(session, bot_id: int, prices: dict[str, float]) -> int:
+    trades = session.execute(select(Trade).where(Trade.bot_id == bot_id, Trade.status == "open")).scalars().all()
+    for trade in trades:
+        price = prices.get(trade.symbol)
+        if price is None:
+            continue
+        unrealized = float(trade.amount * price - trade.cost_basis_quote - trade.fees_paid_quote)
+        trade.unrealized_pnl_quote = unrealized
+        trade.pnl = unrealized
+    session.flush()
+    return len(trades)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trades", type=int, default=500)
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    statements = 0
+
+    def _count(*_: object) -> None:
+        nonlocal statements
+        statements += 1
+
+    event.listen(get_sync_engine(), "before_cursor_execute", _count)
+    symbols = [f"BENCH{index}/USDT" for index in range(args.symbols)]
+    rng = random.Random(7)
+
+    with SessionLocal() as session:
+        bot = Bot(name="bench-marks", symbols=symbols, timeframe="1m", strategy="baseline", knobs={})
+        session.add(bot)
+        session.flush()
+        session.add_all(
+            Trade(
+                bot_id=bot.id,
+                symbol=rng.choice(symbols),
+                side="buy",
+                amount=1.0,
+                price=100.0,
+                cost_basis_quote=100.0,
+                fees_paid_quote=0.1,
+                status="open",
+            )
+            for _ in range(args.trades)
+        )
+        session.flush()
+        session.expunge_all()
+
+        results: dict[str, tuple[list[float], float]] = {}
+        for name, run in (
+            ("orm", lambda prices: _orm_mark(session, bot.id, prices)),
+            ("bulk", lambda prices: len(mark_open_trades(session, prices, bot_ids=[bot.id]))),
+        ):
+            timings: list[float] = []
+            statements = 0
+            for _ in range(args.rounds):
+                prices = {symbol: rng.uniform(90.0, 110.0) for symbol in symbols}
+                started = time.perf_counter()
+                run(prices)
+                timings.append(time.perf_counter() - started)
+                session.expunge_all()
+            results[name] = (timings, statements / args.rounds)
+
+        session.rollback()
+
+    print(f"{args.trades} open trades over {args.symbols} symbols, {args.rounds} rounds")
+    for name, (timings, per_round) in results.items():
+        print(
+            f"{name:>5}: median {statistics.median(timings) * 1000:8.2f} ms"
+            f"  p95 {sorted(timings)[int(len(timings) * 0.95) - 1] * 1000:8.2f} ms"
+            f"  statements/round {per_round:.0f}"
+        )
+    speedup = statistics.median(results["orm"][0]) / statistics.median(results["bulk"][0])
+    print(f"bulk speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
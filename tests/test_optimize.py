@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import json
+
+from packages.core.optimize import expand_candidates
+from packages.core.schemas import KnobRange
+
+
+def _round_trip(search: dict) -> dict:
+    # The API stores the search in the job params, so the worker sees plain JSON.
+    return json.loads(json.dumps({name: spec.model_dump() for name, spec in search.items()}))
+
+
+def test_grid_range_spec_survives_json() -> None:
+    search = _round_trip({"stop_loss_pct": KnobRange(min=1.0, max=3.0, step=1.0)})
+    candidates = expand_candidates({}, search, "grid", samples=10, max_candidates=100)
+    assert sorted(candidate["stop_loss_pct"] for candidate in candidates) == [1.0, 2.0, 3.0]
+
+
+def test_random_range_spec_survives_json() -> None:
+    search = _round_trip({"stop_loss_pct": KnobRange(min=1.0, max=3.0)})
+    candidates = expand_candidates({}, search, "random", samples=5, max_candidates=100, seed=1)
+    assert candidates
+    assert all(1.0 <= candidate["stop_loss_pct"] <= 3.0 for candidate in candidates)